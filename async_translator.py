@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Moteur de traduction asynchrone (asyncio) à concurrence adaptative.
+
+Le nombre de requêtes simultanées est piloté par un contrôleur AIMD :
+augmentation additive tant que les réponses arrivent sans ralentissement,
+réduction multiplicative sur un 429 ou une latence anormale. Les en-têtes
+Retry-After sont respectés et les autres erreurs temporaires sont retentées
+avec un backoff exponentiel à gigue aléatoire.
+"""
+
+import time
+import random
+import asyncio
+import logging
+from email.utils import parsedate_to_datetime
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+import translate
+from translate import (
+    BatchMismatchError, OPENAI_MODEL, RETRYABLE_STATUS,
+    build_batch_messages, build_translation_messages, build_verification_messages,
+    build_batch_verification_messages, parse_batch_response, pending_translations, plan_translation,
+    record_usage, translation_memory, window_context, _service_model,
+)
+from language_check import assess_translation, verifier_stats, PASS, FAIL
+from utils import config
+from translation_clients import AIMDController, client_manager
+
+logger = logging.getLogger(__name__)
+
+
+class RetryableError(Exception):
+    """Erreur temporaire (429, 5xx, réseau) ; `retry_after` en secondes si le serveur l'indique."""
+
+    def __init__(self, message, retry_after=None, throttled=False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.throttled = throttled
+
+
+def parse_retry_after(value):
+    """Convertit un en-tête Retry-After (secondes ou date HTTP) en secondes, None si absent."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncTranslationEngine:
+    """Traduction d'une liste de textes par lots concurrents, pour un service et une langue cible."""
+
+    def __init__(self, service, target_language, initial_concurrency=None, max_concurrency=None,
+                 max_retries=None, backoff_base=1.0, backoff_cap=60.0):
+        """
+        Initialise le moteur.
+
+        Args:
+            service: 'deepl', 'openai' ou 'o3'
+            target_language: Langue cible
+            initial_concurrency: Requêtes simultanées au départ (None = contrôleur partagé du service)
+            max_concurrency: Plafond de requêtes simultanées (None = contrôleur partagé du service)
+            max_retries: Tentatives supplémentaires par requête (None = config)
+            backoff_base: Délai de base du backoff exponentiel en secondes
+            backoff_cap: Délai maximal entre deux tentatives en secondes
+        """
+        self.service = service.lower()
+        self.target_language = target_language
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = config.translation_max_retries if max_retries is None else max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.controller = None
+        self.counters = {"requests": 0, "segments": 0, "errors": 0, "throttled": 0, "retries": 0}
+        self._start = None
+        self._http = None
+        self._openai = None
+
+    @property
+    def is_o3(self):
+        return self.service in ("o3", "o3-mini")
+
+    def stats(self):
+        """Requêtes en vol, limite courante, débit et compteurs d'erreurs."""
+        elapsed = time.monotonic() - self._start if self._start else 0.0
+        return dict(
+            self.counters,
+            in_flight=self.controller.in_flight if self.controller else 0,
+            limit=int(self.controller.limit) if self.controller else 0,
+            peak_limit=int(self.controller.peak_limit) if self.controller else 0,
+            elapsed=elapsed,
+            segments_per_sec=self.counters["segments"] / elapsed if elapsed else 0.0,
+        )
+
+    # --- Requêtes brutes -------------------------------------------------
+
+    async def _deepl(self, texts):
+        response = await self._http.post(
+            translate.deepl_url,
+            headers={"Authorization": f"DeepL-Auth-Key {translate.deepl_key}"},
+            data={"text": list(texts), "target_lang": self.target_language.upper()},
+        )
+        if response.status_code in RETRYABLE_STATUS:
+            raise RetryableError(
+                f"DeepL {response.status_code}",
+                retry_after=parse_retry_after(response.headers.get("retry-after")),
+                throttled=response.status_code == 429,
+            )
+        if response.status_code != 200:
+            raise Exception(f"DeepL API error: {response.status_code} {response.text}")
+        translations = [t["text"] for t in response.json()["translations"]]
+        if len(translations) != len(texts):
+            raise BatchMismatchError(f"DeepL: {len(translations)} traductions pour {len(texts)} segments")
+        return translations
+
+    async def _chat(self, messages):
+        try:
+            response = await self._openai.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                reasoning_effort="low"
+            )
+            record_usage(response)
+        except openai.APIStatusError as e:
+            if e.status_code not in RETRYABLE_STATUS:
+                raise
+            raise RetryableError(
+                f"OpenAI {e.status_code}",
+                retry_after=parse_retry_after(e.response.headers.get("retry-after")),
+                throttled=e.status_code == 429,
+            )
+        except openai.APIConnectionError as e:
+            raise RetryableError(f"OpenAI: {e}")
+        return response.choices[0].message.content
+
+    async def _with_retry(self, make_request, segments):
+        """Exécute une requête sous le contrôleur de concurrence, avec retentatives."""
+        for attempt in range(self.max_retries + 1):
+            await self.controller.acquire()
+            # Attente du limiteur de débit hors chronomètre : seul l'aller-retour serveur règle l'AIMD
+            await client_manager.rate_limiter.async_acquire()
+            start = time.monotonic()
+            try:
+                result = await make_request()
+            except (RetryableError, httpx.TransportError) as e:
+                error = e
+                retry_after = getattr(e, "retry_after", None)
+                if getattr(e, "throttled", False):
+                    self.counters["throttled"] += 1
+                    self.controller.on_throttle()
+                self.counters["errors"] += 1
+                if attempt == self.max_retries:
+                    raise
+            except Exception:
+                self.counters["errors"] += 1
+                raise
+            else:
+                self.controller.on_success(time.monotonic() - start)
+                self.counters["requests"] += 1
+                self.counters["segments"] += segments
+                return result
+            finally:
+                await self.controller.release()
+
+            # Backoff exponentiel à gigue complète, jamais plus court que Retry-After
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            self.counters["retries"] += 1
+            logger.warning(f"Requête de traduction retentée dans {delay:.1f}s ({error})")
+            await asyncio.sleep(delay)
+
+    # --- Traduction ------------------------------------------------------
+
+    async def _translate_one(self, text):
+        translation = await self._with_retry(
+            lambda: self._chat(build_translation_messages(text, self.target_language)), 1
+        )
+        if self.is_o3:
+            retries = 3
+            while not (await self._verify_many([text], [translation]))[0] and retries > 0:
+                translation = await self._with_retry(
+                    lambda: self._chat(build_translation_messages(text, self.target_language)), 1
+                )
+                retries -= 1
+        return translation
+
+    async def _verify(self, segment):
+        result = await self._with_retry(
+            lambda: self._chat(build_verification_messages(segment, self.target_language)), 0
+        )
+        return 'yes' in result.lower()
+
+    async def _verify_many(self, sources, translations):
+        """Verdict local puis vérification LLM groupée des seuls cas ambigus."""
+        if not config.local_translation_verifier:
+            return list(await asyncio.gather(*(self._verify(t) for t in translations)))
+        verdicts = [assess_translation(src, t, self.target_language) for src, t in zip(sources, translations)]
+        for verdict in verdicts:
+            verifier_stats.record(verdict)
+        results = [verdict == PASS for verdict in verdicts]
+        ambiguous = [i for i, verdict in enumerate(verdicts) if verdict not in (PASS, FAIL)]
+        if not ambiguous:
+            return results
+
+        calls = 1
+        if len(ambiguous) == 1:
+            answers = [await self._verify(translations[ambiguous[0]])]
+        else:
+            content = await self._with_retry(lambda: self._chat(build_batch_verification_messages(
+                [translations[i] for i in ambiguous], self.target_language)), 0)
+            try:
+                answers = ['yes' in v.lower() for v in parse_batch_response(content, len(ambiguous), field="verdict")]
+            except BatchMismatchError as e:
+                logger.warning(f"Vérification groupée incohérente ({e}), vérification unitaire")
+                answers = await asyncio.gather(*(self._verify(translations[i]) for i in ambiguous))
+                calls += len(ambiguous)
+        for i, ok in zip(ambiguous, answers):
+            results[i] = ok
+        verifier_stats.record_escalation(list(answers).count(False), calls)
+        return results
+
+    async def translate_batch(self, texts, context=None):
+        """Traduit un lot ; une réponse incohérente est traitée en deux moitiés."""
+        if len(texts) == 1 and self.service != "deepl":
+            return [await self._translate_one(texts[0])]
+        try:
+            if self.service == "deepl":
+                return await self._with_retry(lambda: self._deepl(texts), len(texts))
+            translations = await self._with_retry(
+                lambda: self._chat_batch(texts, context), len(texts)
+            )
+        except BatchMismatchError as e:
+            if len(texts) == 1:
+                raise
+            logger.warning(f"Lot de {len(texts)} segments incohérent ({e}), découpage en deux")
+            middle = len(texts) // 2
+            first, second = await asyncio.gather(
+                self.translate_batch(texts[:middle], context), self.translate_batch(texts[middle:], context)
+            )
+            return first + second
+        if self.is_o3:
+            checks = await self._verify_many(texts, translations)
+            retranslated = await asyncio.gather(*(
+                self._translate_one(src) for src, ok in zip(texts, checks) if not ok
+            ))
+            retranslated = iter(retranslated)
+            translations = [t if ok else next(retranslated) for t, ok in zip(translations, checks)]
+        return translations
+
+    async def _chat_batch(self, texts, context=None):
+        content = await self._chat(build_batch_messages(texts, self.target_language, context))
+        return parse_batch_response(content, len(texts))
+
+    async def translate_texts(self, texts, use_memory=None, on_translated=None, indices=None, known=None,
+                              file_starts=None):
+        """
+        Traduit une liste de textes (mémoire de traduction puis lots concurrents).
+
+        `on_translated(idx, translation)` est appelé pour chaque segment traduit par l'API.
+        `indices`, `known` et `file_starts` : voir translate.translate_texts.
+
+        Returns:
+            Liste des traductions, alignée sur `texts` ("" pour les textes vides ou non demandés)
+        """
+        if use_memory is None:
+            use_memory = config.use_translation_memory
+        service_name, model = _service_model(self.service)
+        results, pending = pending_translations(
+            texts, self.target_language, self.service, use_memory, indices, known
+        )
+
+        windows = plan_translation(texts, pending, self.service, file_starts=file_starts)
+        logger.info(
+            f"Traduction asynchrone de {len(pending)}/{len(texts) if indices is None else len(indices)} segments en {len(windows)} requête(s)"
+        )
+
+        async def run_batch(window):
+            # Fenêtres concurrentes : seul le contexte source (et les traductions déjà en mémoire) est disponible
+            translations = await self.translate_batch(
+                [texts[idx] for idx in window.indices], window_context(window, texts, results)
+            )
+            for idx, translation in zip(window.indices, translations):
+                results[idx] = translation
+                if use_memory:
+                    translation_memory.put(texts[idx], translation, self.target_language, service_name, model)
+                if on_translated:
+                    on_translated(idx, translation)
+
+        if self.initial_concurrency or self.max_concurrency:
+            self.controller = AIMDController(
+                self.initial_concurrency or config.async_initial_concurrency,
+                maximum=self.max_concurrency or config.async_max_concurrency
+            )
+        else:
+            # Limite apprise partagée par toutes les langues et tous les traitements du service
+            self.controller = client_manager.concurrency_controller("deepl" if self.service == "deepl" else "openai")
+        self._start = time.monotonic()
+        async with client_manager.async_http("async") as http:
+            self._http = http
+            self._openai = AsyncOpenAI(
+                api_key=translate.openai_key, base_url=translate.openai_base_url,
+                http_client=http, max_retries=0
+            )
+            await asyncio.gather(*(run_batch(window) for window in windows))
+        return results
+
+
+def translate_texts_async(texts, target_language, service, on_translated=None, indices=None, known=None,
+                          file_starts=None, **kwargs):
+    """Point d'entrée synchrone : traduit `texts` avec le moteur asynchrone et journalise ses compteurs."""
+    engine = AsyncTranslationEngine(service, target_language, **kwargs)
+    results = asyncio.run(engine.translate_texts(
+        texts, on_translated=on_translated, indices=indices, known=known, file_starts=file_starts
+    ))
+    stats = engine.stats()
+    logger.info(
+        f"Moteur asynchrone: {stats['segments']} segments en {stats['requests']} requêtes, "
+        f"{stats['elapsed']:.1f}s ({stats['segments_per_sec']:.1f} seg/s), "
+        f"concurrence max {stats['peak_limit']}, {stats['throttled']} 429, "
+        f"{stats['errors']} erreurs, {stats['retries']} retentatives"
+    )
+    return results
@@ -1,16 +1,20 @@
 import subprocess
 import os
+import contextlib
 import shutil
 from pydub import AudioSegment
 import logging
 import soundfile as sf
-import librosa
 import numpy as np
 import tempfile
 import torch
 import threading
+import time
 
 from utils import config  # ✅ Ajouté pour lire l'état du multi-threading
+from separation_engine import separate_file, separation_timings
+from music_detection import estimate_music_content
+from resampler import resample_file
 
 # Filtrage pour ne logguer que les messages pertinents dans la console
 class SpecificMessageFilter(logging.Filter):
@@ -32,37 +36,83 @@ fh = logging.FileHandler('error.log', encoding='utf-8')
 fh.setLevel(logging.ERROR)
 logger.addHandler(fh)
 
-def extract_audio(video_file, output_audio_file):
-    command = f'ffmpeg -i "{video_file}" -q:a 0 -map a -y "{output_audio_file}"'
-    subprocess.run(command, shell=True, check=True)
+# Formats attendus en aval : Whisper travaille en mono 16 kHz, Demucs en stéréo 44.1 kHz
+WHISPER_SAMPLE_RATE = 16000
+SEPARATION_SAMPLE_RATE = 44100
+
+def _pcm_output_args(output_file, sample_rate, channels):
+    return ["-map", "0:a:0", "-ac", str(channels), "-ar", str(sample_rate), "-c:a", "pcm_s16le", output_file]
+
+def extract_audio(video_file, output_audio_file, separation_audio_file=None):
+    """
+    Extrait la piste audio en un seul passage ffmpeg, directement en PCM
+    (sans encodage MP3 intermédiaire ni décodages supplémentaires en aval).
+
+    Args:
+        video_file: Vidéo source
+        output_audio_file: WAV mono 16 kHz destiné à Whisper
+        separation_audio_file: WAV stéréo 44.1 kHz destiné à Demucs (optionnel)
+    """
+    command = ["ffmpeg", "-nostdin", "-hide_banner", "-y", "-i", video_file]
+    command += _pcm_output_args(output_audio_file, WHISPER_SAMPLE_RATE, 1)
+    if separation_audio_file:
+        command += _pcm_output_args(separation_audio_file, SEPARATION_SAMPLE_RATE, 2)
+    subprocess.run(command, check=True)
+
+def read_pcm(input_file, sample_rate=WHISPER_SAMPLE_RATE, channels=1):
+    """
+    Décode un fichier audio ou vidéo en PCM float32 via un pipe ffmpeg.
+
+    Returns:
+        Tableau NumPy (échantillons,) en mono, (échantillons, canaux) sinon
+    """
+    process = subprocess.run(
+        ["ffmpeg", "-nostdin", "-v", "error", "-i", input_file, "-map", "0:a:0",
+         "-f", "f32le", "-ac", str(channels), "-ar", str(sample_rate), "-"],
+        stdout=subprocess.PIPE, check=True
+    )
+    data = np.frombuffer(process.stdout, dtype=np.float32)
+    return data if channels == 1 else data.reshape(-1, channels)
 
 def resample_audio(input_path, output_path, target_samplerate):
-    if os.path.exists(input_path):
-        y, sr = librosa.load(input_path, sr=None)
-        y_resampled = librosa.resample(y, orig_sr=sr, target_sr=target_samplerate)
-        sf.write(output_path, y_resampled, target_samplerate)
-    else:
-        raise FileNotFoundError(f"File not found: {input_path}")
-
-def combine_tracks(tracks, output_path):
-    combined = None
+    resample_to_rates(input_path, {target_samplerate: output_path})
+
+def resample_to_rates(input_path, outputs):
+    """
+    Lit un fichier une seule fois (mixé en mono) et écrit une version par fréquence.
+
+    Args:
+        input_path: Fichier source (peut aussi figurer parmi les sorties)
+        outputs: Dictionnaire fréquence -> chemin de sortie
+    """
+    # Lecture par blocs et rééchantillonnage en flux (soxr ou polyphase), voir resampler
+    resample_file(input_path, outputs, quality=config.resample_quality, engine=config.resample_engine)
+
+def combine_tracks(tracks, output_path, blocksize=1 << 18):
+    """Somme des pistes, lue et écrite par blocs (mémoire bornée quelle que soit la durée)."""
     for track in tracks:
-        if os.path.exists(track):
-            data, samplerate = sf.read(track)
-            if combined is None:
-                combined = data
-            else:
-                combined += data
-        else:
+        if not os.path.exists(track):
             raise FileNotFoundError(f"File not found: {track}")
-    sf.write(output_path, combined, samplerate)
+    with contextlib.ExitStack() as stack:
+        readers = [stack.enter_context(sf.SoundFile(track)) for track in tracks]
+        channels = max(reader.channels for reader in readers)
+        output = stack.enter_context(sf.SoundFile(output_path, 'w', samplerate=readers[0].samplerate, channels=channels))
+        while True:
+            blocks = [reader.read(blocksize, dtype='float32', always_2d=True) for reader in readers]
+            length = max(len(block) for block in blocks)
+            if not length:
+                break
+            combined = np.zeros((length, channels), dtype=np.float32)
+            for block in blocks:
+                combined[:len(block)] += block
+            output.write(combined)
 
 def create_empty_track(file_path, sample_rate=44100):
     sf.write(file_path, np.zeros((1,)), sample_rate)
 
 def is_file_empty(file_path):
-    data, _ = sf.read(file_path)
-    return len(data) == 0
+    # L'en-tête WAV suffit : inutile de décoder toute la piste
+    return sf.info(file_path).frames == 0
 
 def run_demucs_with_logs(command_args):
     process = subprocess.Popen(
@@ -96,120 +146,186 @@ def separate_audio(input_file, output_dir, use_gpu=None, use_threading=None):
     logging.info(f"Début de la séparation audio - Fichier source: {input_file}")
     logging.info(f"Dossier de sortie: {output_dir}")
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_input = os.path.join(temp_dir, "temp_audio.mp3")
-        shutil.copy(input_file, temp_input)
-        logging.info(f"Fichier audio temporaire créé: {temp_input}")
-
-        if not os.path.exists(temp_input):
-            raise FileNotFoundError(f"Fichier audio temporaire introuvable: {temp_input}")
+    device = "cuda" if use_gpu else "cpu"
+    if _should_skip_separation(input_file, device):
+        _create_fallback_tracks(input_file, output_dir)
+        return
 
-        device = "cuda" if use_gpu else "cpu"
-        logging.info(f"🧠 Tentative de séparation audio avec {device.upper()}...")
+    logging.info(f"🧠 Tentative de séparation audio avec {device.upper()}...")
 
+    if config.separation_engine == "inprocess":
+        # Modèle chargé une fois et réutilisé ; la CLI reste le recours en cas d'échec
         try:
-            command = [
-                "demucs",
-                "--two-stems=vocals",
-                "-n", "mdx_extra_q",
-                "-d", device,
-                temp_input
-            ]
-
-            logging.info(f"Exécution de Demucs avec la commande: {' '.join(command)}")
-
-            # ✅ Utilisation du threading ou pas selon la config
-            if use_threading:
-                run_demucs_with_logs(command)
-            else:
-                result = subprocess.run(command, capture_output=True, text=True)
-                logging.info(result.stdout)
-
-            base_output_dir = os.path.join(os.getcwd(), "separated", "mdx_extra_q")
-            logging.info(f"Recherche des fichiers séparés dans: {base_output_dir}")
-            possible_dirs = [
-                os.path.join(base_output_dir, "temp_audio"),
-                os.path.join(base_output_dir, os.path.splitext(os.path.basename(temp_input))[0])
-            ]
-            temp_output_subdir = None
-            for dir_path in possible_dirs:
-                if os.path.exists(dir_path):
-                    temp_output_subdir = dir_path
-                    logging.info(f"Dossier de sortie Demucs trouvé: {temp_output_subdir}")
-                    break
-
-            if not temp_output_subdir or not os.path.exists(temp_output_subdir):
-                if os.path.exists(base_output_dir):
-                    logging.info(f"Contenu du dossier: {os.listdir(base_output_dir)}")
-                raise FileNotFoundError("Le modèle de sortie de demucs n'a pas été trouvé.")
-
-            logging.info(f"Fichiers à copier: {os.listdir(temp_output_subdir)}")
-            for filename in os.listdir(temp_output_subdir):
-                src_path = os.path.join(temp_output_subdir, filename)
-                dst_path = os.path.join(output_dir, filename)
-                try:
-                    shutil.copy2(src_path, dst_path)
-                    logging.info(f"Fichier copié avec succès: {src_path} -> {dst_path}")
-                except Exception as e:
-                    logging.error(f"Erreur lors de la copie de {src_path} vers {dst_path}: {e}")
-                    try:
-                        with open(src_path, 'rb') as src_file:
-                            with open(dst_path, 'wb') as dst_file:
-                                dst_file.write(src_file.read())
-                        logging.info(f"Fichier copié avec méthode alternative: {dst_path}")
-                    except Exception as alt_e:
-                        logging.error(f"Échec de la méthode alternative: {alt_e}")
-
-            logging.info(f"Fichiers dans le dossier de sortie après copie: {os.listdir(output_dir)}")
-
-            if os.path.exists(os.path.join(output_dir, 'no_vocals.wav')) and not os.path.exists(os.path.join(output_dir, 'accompaniment.wav')):
-                shutil.copy2(os.path.join(output_dir, 'no_vocals.wav'), os.path.join(output_dir, 'accompaniment.wav'))
-                logging.info("Fichier 'no_vocals.wav' copié en 'accompaniment.wav'")
-
-            for track_name in ['vocals', 'drums', 'bass', 'other']:
-                track_path = os.path.join(output_dir, f'{track_name}.wav')
-                if not os.path.exists(track_path) or is_file_empty(track_path):
-                    create_empty_track(track_path)
-                    logging.info(f"Piste vide créée: {track_path}")
-
-            vocals_path = os.path.join(output_dir, 'vocals.wav')
-            accompaniment_path = os.path.join(output_dir, 'accompaniment.wav')
-
-            if not os.path.exists(accompaniment_path):
-                try:
-                    combine_tracks([
-                        os.path.join(output_dir, 'drums.wav'),
-                        os.path.join(output_dir, 'bass.wav'),
-                        os.path.join(output_dir, 'other.wav')
-                    ], accompaniment_path)
-                    logging.info(f"Piste d'accompagnement créée: {accompaniment_path}")
-                except Exception as e:
-                    logging.error(f"Erreur lors de la création de la piste d'accompagnement: {e}")
-                    create_empty_track(accompaniment_path)
-                    logging.info("Piste d'accompagnement vide créée par défaut")
-
+            separate_file(input_file, {
+                "vocals": os.path.join(output_dir, 'vocals.wav'),
+                "no_vocals": os.path.join(output_dir, 'accompaniment.wav'),
+            }, device=device)
+            _finalize_separation(output_dir)
+            separation_timings.log_stats()
+            return
+        except Exception as e:
+            logging.error(f"Séparation dans le processus impossible ({e}), utilisation de la CLI Demucs")
+
+    start = time.perf_counter()
+    _separate_audio_cli(input_file, output_dir, device, use_threading)
+    timings = {"cli": time.perf_counter() - start}
+    try:
+        separation_timings.record(timings, sf.info(input_file).duration)
+    except Exception:
+        separation_timings.record(timings)
+    logging.info(f"Séparation Demucs via la CLI: {timings['cli']:.1f}s")
+    separation_timings.log_stats()
+
+def _should_skip_separation(input_file, device):
+    """Décide s'il faut séparer les pistes (config.separation_mode : auto, always ou never)."""
+    mode = config.separation_mode
+    if mode == "always":
+        return False
+    if mode == "never":
+        logging.info("Séparation audio désactivée (separation_mode = never), le mélange est utilisé comme piste vocale")
+        return True
+
+    start = time.perf_counter()
+    try:
+        score, duration = estimate_music_content(input_file)
+    except Exception as e:
+        logging.warning(f"Analyse du contenu musical impossible ({e}), séparation effectuée")
+        return False
+    elapsed = time.perf_counter() - start
+
+    if score >= config.music_threshold:
+        logging.info(f"Musique détectée (score {score:.2f} ≥ {config.music_threshold}, analyse {elapsed:.1f}s): séparation effectuée")
+        return False
+    saved = separation_timings.estimate(duration, device)
+    logging.info(
+        f"Peu ou pas de musique (score {score:.2f} < {config.music_threshold}, analyse {elapsed:.1f}s): "
+        f"séparation ignorée, environ {saved:.0f}s économisées"
+    )
+    return True
+
+def _create_fallback_tracks(input_file, output_dir):
+    """Piste vocale = mélange d'origine et accompagnement vide, sans séparation."""
+    vocals_source = input_file
+    if not input_file.lower().endswith('.wav'):
+        # Format non lisible par soundfile : décodage préalable
+        vocals_source = os.path.join(output_dir, 'vocals.wav')
+        try:
+            sf.write(vocals_source, read_pcm(input_file, SEPARATION_SAMPLE_RATE, 2), SEPARATION_SAMPLE_RATE)
+        except Exception as e:
+            logging.error(f"Impossible de reprendre le mélange d'origine comme piste vocale: {e}")
+    logging.info(f"Mélange d'origine utilisé comme piste vocale: {input_file}")
+    create_empty_track(os.path.join(output_dir, 'accompaniment.wav'))
+    _finalize_separation(output_dir, vocals_source)
+
+def _move_file(src_path, dst_path):
+    """Déplace un fichier (simple renommage sur le même disque, copie sinon)."""
+    try:
+        os.replace(src_path, dst_path)
+    except OSError:
+        shutil.move(src_path, dst_path)
+
+def _separate_audio_cli(input_file, output_dir, device, use_threading):
+    # Racine de sortie propre au traitement, sur le même disque que output_dir :
+    # plusieurs séparations simultanées ne partagent aucun fichier et les pistes
+    # sont ensuite déplacées par simple renommage
+    job_root = tempfile.mkdtemp(prefix=".demucs_", dir=output_dir)
+    try:
+        command = [
+            "demucs",
+            "--two-stems=vocals",
+            "-n", config.demucs_model,
+            "-d", device,
+            "-o", job_root,
+            "--filename", "{stem}.{ext}",
+            input_file
+        ]
+
+        logging.info(f"Exécution de Demucs avec la commande: {' '.join(command)}")
+
+        # ✅ Utilisation du threading ou pas selon la config
+        if use_threading:
+            run_demucs_with_logs(command)
+        else:
+            result = subprocess.run(command, capture_output=True, text=True)
+            logging.info(result.stdout)
+
+        demucs_output_subdir = os.path.join(job_root, config.demucs_model)
+        logging.info(f"Recherche des fichiers séparés dans: {demucs_output_subdir}")
+
+        if not os.path.exists(demucs_output_subdir) or not os.listdir(demucs_output_subdir):
+            raise FileNotFoundError("Le modèle de sortie de demucs n'a pas été trouvé.")
+
+        # Les pistes sont déplacées (renommage) plutôt que copiées
+        logging.info(f"Fichiers à déplacer: {os.listdir(demucs_output_subdir)}")
+        for filename in os.listdir(demucs_output_subdir):
+            # no_vocals.wav devient directement accompaniment.wav
+            target_name = 'accompaniment.wav' if filename == 'no_vocals.wav' else filename
+            src_path = os.path.join(demucs_output_subdir, filename)
+            dst_path = os.path.join(output_dir, target_name)
             try:
-                vocals_44khz = os.path.join(output_dir, 'vocals_44khz.wav')
-                if os.path.exists(vocals_path):
-                    resample_audio(vocals_path, vocals_44khz, 44100)
-                    logging.info(f"Piste vocals rééchantillonnée à 44.1kHz: {vocals_44khz}")
-                    resample_audio(vocals_path, vocals_path, 16000)
-                    logging.info(f"Piste vocals rééchantillonnée à 16kHz: {vocals_path}")
-                else:
-                    logging.error(f"Impossible de rééchantillonner: {vocals_path} n'existe pas")
+                _move_file(src_path, dst_path)
+                logging.info(f"Fichier déplacé: {src_path} -> {dst_path}")
             except Exception as e:
-                logging.error(f"Erreur lors du rééchantillonnage: {e}")
-
-            logging.info(f"Audio separation completed successfully! Output saved in {output_dir}")
-            logging.info(f"Vocals track path: {vocals_path}")
-            logging.info(f"Accompaniment track path: {accompaniment_path}")
-
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Erreur lors de l'exécution de Demucs: {str(e)}")
-            _create_fallback_tracks(input_file, output_dir)
+                logging.error(f"Erreur lors du déplacement de {src_path} vers {dst_path}: {e}")
+
+        logging.info(f"Fichiers dans le dossier de sortie: {os.listdir(output_dir)}")
+
+        _finalize_separation(output_dir)
+
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Erreur lors de l'exécution de Demucs: {str(e)}")
+        _create_fallback_tracks(input_file, output_dir)
+    except Exception as e:
+        logging.error(f"An unexpected error occurred: {e}")
+        logging.error("Tentative de fallback...")
+        _create_fallback_tracks(input_file, output_dir)
+    finally:
+        shutil.rmtree(job_root, ignore_errors=True)
+
+def _finalize_separation(output_dir, vocals_source=None):
+    """
+    Complète les pistes manquantes, l'accompagnement et les versions rééchantillonnées.
+
+    `vocals_source` : fichier dont sont tirées les pistes vocales (None = vocals.wav).
+    """
+    vocals_path = os.path.join(output_dir, 'vocals.wav')
+    vocals_source = vocals_source or vocals_path
+    for track_name in ['vocals', 'drums', 'bass', 'other']:
+        if track_name == 'vocals' and vocals_source != vocals_path:
+            # Écrite plus bas par le rééchantillonnage de la source
+            continue
+        track_path = os.path.join(output_dir, f'{track_name}.wav')
+        if not os.path.exists(track_path) or is_file_empty(track_path):
+            create_empty_track(track_path)
+            logging.info(f"Piste vide créée: {track_path}")
+
+    accompaniment_path = os.path.join(output_dir, 'accompaniment.wav')
+
+    if not os.path.exists(accompaniment_path):
+        try:
+            combine_tracks([
+                os.path.join(output_dir, 'drums.wav'),
+                os.path.join(output_dir, 'bass.wav'),
+                os.path.join(output_dir, 'other.wav')
+            ], accompaniment_path)
+            logging.info(f"Piste d'accompagnement créée: {accompaniment_path}")
         except Exception as e:
-            logging.error(f"An unexpected error occurred: {e}")
-            logging.error("Tentative de fallback...")
-            _create_fallback_tracks(input_file, output_dir)
+            logging.error(f"Erreur lors de la création de la piste d'accompagnement: {e}")
+            create_empty_track(accompaniment_path)
+            logging.info("Piste d'accompagnement vide créée par défaut")
+
+    try:
+        vocals_44khz = os.path.join(output_dir, 'vocals_44khz.wav')
+        if os.path.exists(vocals_source):
+            # Une seule lecture pour les deux fréquences
+            resample_to_rates(vocals_source, {44100: vocals_44khz, 16000: vocals_path})
+            logging.info(f"Piste vocals rééchantillonnée à 44.1kHz: {vocals_44khz}")
+            logging.info(f"Piste vocals rééchantillonnée à 16kHz: {vocals_path}")
+        else:
+            logging.error(f"Impossible de rééchantillonner: {vocals_source} n'existe pas")
+    except Exception as e:
+        logging.error(f"Erreur lors du rééchantillonnage: {e}")
 
-# Le reste (fallback + convert_audio_to_16k) reste inchangé
+    logging.info(f"Audio separation completed successfully! Output saved in {output_dir}")
+    logging.info(f"Vocals track path: {vocals_path}")
+    logging.info(f"Accompaniment track path: {accompaniment_path}")
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks hors-ligne des étapes du pipeline.
+
+Usage:
+    python benchmark.py transcription --audio sample.wav --reference sample.txt
+    python benchmark.py transcription --audio sample.wav --backends int8 --shards 4
+    python benchmark.py srt --cues 100000
+    python benchmark.py translation --cues 2000 --latency-ms 150 --error-rate 0.02
+    python benchmark.py separation --audio mix_44k.wav --segments 0 60
+    python benchmark.py resample --seconds 1800
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+
+
+def word_error_rate(reference, hypothesis):
+    """WER = distance d'édition en mots / nombre de mots de la référence."""
+    def words(text):
+        return re.findall(r"\w+", text.lower())
+
+    ref, hyp = words(reference), words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def bench_transcription(args):
+    """Compare facteur temps réel et WER des moteurs de transcription."""
+    import transcriber
+
+    duration = transcriber._probe_duration(args.audio)
+    if not duration:
+        sys.exit(f"Impossible de lire la durée de {args.audio}")
+    reference = None
+    if args.reference:
+        with open(args.reference, "r", encoding="utf-8") as f:
+            reference = f.read()
+
+    print(f"Fichier: {args.audio} ({duration:.1f}s), modèle: {args.model}")
+    print(f"{'moteur':<22}{'chargement':>12}{'transcription':>15}{'RTF':>8}{'WER':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.backends:
+            start = time.perf_counter()
+            transcriber.preload_model(args.model, backend=name)
+            load_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = transcriber.run_transcription(
+                args.audio, os.path.join(tmp, name), model_name=args.model,
+                language=args.language, backend=name, use_cache=False, streaming=False, verbose=False
+            )
+            elapsed = time.perf_counter() - start
+
+            text = " ".join(seg.get("text", "").strip() for seg in result.get("segments", []))
+            wer = f"{word_error_rate(reference, text):.1%}" if reference is not None else "-"
+            print(f"{name:<22}{load_time:>11.1f}s{elapsed:>14.1f}s{elapsed / duration:>8.2f}{wer:>8}")
+            transcriber.unload_model(args.model)
+
+            if args.shards > 1:
+                # Même moteur en multi-processus, comparé au résultat mono-processus hors des coupures
+                start = time.perf_counter()
+                parallel = transcriber.run_parallel_transcription(
+                    args.audio, os.path.join(tmp, f"{name}_shards"), model_name=args.model, shards=args.shards,
+                    language=args.language, backend=name, write_outputs=False, use_cache=False
+                )
+                elapsed = time.perf_counter() - start
+                text = " ".join(seg.get("text", "").strip() for seg in parallel.get("segments", []))
+                wer = f"{word_error_rate(reference, text):.1%}" if reference is not None else "-"
+                label = f"{name} x{args.shards}"
+                print(f"{label:<22}{'-':>12}{elapsed:>14.1f}s{elapsed / duration:>8.2f}{wer:>8}")
+                report = transcriber.check_parallel_determinism(result, parallel, parallel["shard_boundaries"])
+                print(f"{'':<22}segments identiques hors coupures: {report['matched']}/{report['compared']}")
+                for mismatch in report["mismatches"][:5]:
+                    print(f"{'':<22}{mismatch['start']:>8.1f}s attendu {mismatch['expected']!r}, "
+                          f"obtenu {mismatch['got']!r}")
+
+
+def _legacy_parse_srt(srt_content):
+    """Ancien analyseur à expression régulière (référence de comparaison)."""
+    pattern = re.compile(
+        r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\d+\n|\Z)',
+        re.DOTALL)
+    return [m.groups() for m in pattern.finditer(srt_content)]
+
+
+def bench_srt(args):
+    """Lecture/écriture d'un fichier SRT synthétique : ancien analyseur regex contre subtitle_io."""
+    import subtitle_io
+
+    cues = [
+        subtitle_io.Cue(None, i * 2000, i * 2000 + 1500, f"Réplique numéro {i}\navec une deuxième ligne")
+        for i in range(args.cues)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.srt")
+        start = time.perf_counter()
+        with open(path, "w", encoding="utf-8") as f:
+            subtitle_io.write_srt(cues, f)
+        write_time = time.perf_counter() - start
+
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        start = time.perf_counter()
+        legacy = _legacy_parse_srt(content)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parsed = subtitle_io.read_cues(path)
+        read_time = time.perf_counter() - start
+
+    if len(parsed) != args.cues or len(legacy) != args.cues:
+        sys.exit(f"Nombre de sous-titres incorrect: {len(parsed)} (subtitle_io), {len(legacy)} (regex)")
+    print(f"{args.cues} sous-titres ({len(content) / 1e6:.1f} Mo)")
+    print(f"{'opération':<26}{'durée':>10}{'sous-titres/s':>16}")
+    for name, elapsed in [("écriture subtitle_io", write_time), ("lecture regex (ancien)", legacy_time),
+                          ("lecture subtitle_io", read_time)]:
+        print(f"{name:<26}{elapsed:>9.3f}s{args.cues / elapsed:>16,.0f}")
+
+
+def percentile(values, q):
+    """Percentile `q` (0-100) par rang le plus proche."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def bench_translation(args):
+    """Débit de traduction par moteur contre le serveur local mock_translation_server."""
+    import subtitle_io
+    import translate
+    from utils import config
+    from mock_translation_server import MockTranslationServer
+
+    # Chaque passe doit réellement interroger le serveur
+    config.use_translation_memory = False
+    config.translation_journal = False
+
+    server = MockTranslationServer(latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+                                   error_rate=args.error_rate, retry_after=args.retry_after).start()
+    translate.set_api_keys("mock", "mock", server.deepl_url, server.openai_base_url)
+    translate.client_manager.rate_limiter.rate = args.rate_limit or None
+    print(f"{args.cues} sous-titres, latence médiane {args.latency_ms:.0f} ms, 429: {args.error_rate:.0%}")
+    print(f"{'service':<9}{'mode':<10}{'durée':>9}{'sous-titres/s':>15}{'requêtes':>10}"
+          f"{'429':>6}{'p50':>9}{'p99':>9}{'jetons':>10}")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.srt")
+            with open(path, "w", encoding="utf-8") as f:
+                subtitle_io.write_srt(
+                    [subtitle_io.Cue(None, i * 2000, i * 2000 + 1500, f"Réplique numéro {i}, assez courte.")
+                     for i in range(args.cues)], f
+                )
+            for service in args.services:
+                for mode in args.modes:
+                    server.stats.reset()
+                    start = time.perf_counter()
+                    translate.translate_srt_file(path, args.target, service, mode=mode, use_threading=True)
+                    elapsed = time.perf_counter() - start
+                    stats = server.stats.snapshot()
+                    latencies = stats["latencies"]
+                    tokens = stats["prompt_tokens"] + stats["completion_tokens"]
+                    print(f"{service:<9}{mode:<10}{elapsed:>8.2f}s{args.cues / elapsed:>15,.0f}"
+                          f"{stats['total_requests']:>10}{stats['throttled']:>6}"
+                          f"{1000 * percentile(latencies, 50):>7.0f}ms{1000 * percentile(latencies, 99):>7.0f}ms"
+                          f"{tokens:>10}")
+    finally:
+        server.stop()
+
+
+def _separation_run(audio, segment_sec, device):
+    """Une séparation dans un processus neuf : (durée, pic de mémoire en Mo)."""
+    import separation_engine
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        separation_engine.separate_file(audio, {
+            "vocals": os.path.join(tmp, "vocals.wav"),
+            "no_vocals": os.path.join(tmp, "accompaniment.wav"),
+        }, device=device, segment_sec=segment_sec)
+        return time.perf_counter() - start, separation_engine.peak_memory_mb()
+
+
+def bench_separation(args):
+    """Durée et pic de mémoire de la séparation selon la taille des fenêtres."""
+    import multiprocessing
+    import soundfile as sf
+
+    duration = sf.info(args.audio).duration
+    print(f"Fichier: {args.audio} ({duration:.1f}s), device: {args.device}")
+    print(f"{'fenêtre':<16}{'durée':>10}{'RTF':>8}{'mémoire max':>14}")
+    # Un processus par mesure : le pic de mémoire résidente ne redescend jamais
+    context = multiprocessing.get_context("spawn")
+    for segment_sec in args.segments:
+        with context.Pool(1) as pool:
+            elapsed, memory = pool.apply(_separation_run, (args.audio, segment_sec, args.device))
+        label = f"{segment_sec:g}s" if segment_sec else "fichier entier"
+        memory = f"{memory:.0f} Mo" if memory is not None else "-"
+        print(f"{label:<16}{elapsed:>9.1f}s{elapsed / duration:>8.2f}{memory:>14}")
+
+
+def _legacy_resample(input_path, outputs):
+    """Ancien rééchantillonnage librosa : une lecture complète par fréquence (référence de comparaison)."""
+    import librosa
+    import soundfile as sf
+
+    for target_samplerate, output_path in outputs.items():
+        y, sr = librosa.load(input_path, sr=None)
+        sf.write(output_path, librosa.resample(y, orig_sr=sr, target_sr=target_samplerate), target_samplerate)
+
+
+def bench_resample(args):
+    """Ancien chemin librosa contre resampler (44.1 kHz + 16 kHz) sur une piste synthétique."""
+    import numpy as np
+    import soundfile as sf
+    import resampler
+
+    rate = 44100
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "vocals.wav")
+        rng = np.random.default_rng(0)
+        with sf.SoundFile(source, "w", samplerate=rate, channels=2, subtype="PCM_16") as f:
+            t = np.arange(60 * rate) / rate
+            minute = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(len(t))
+            block = np.stack([minute, minute], axis=1).astype(np.float32)
+            for start in range(0, int(args.seconds * rate), len(block)):
+                f.write(block[:int(args.seconds * rate) - start])
+        outputs = {44100: os.path.join(tmp, "vocals_44khz.wav"), 16000: os.path.join(tmp, "vocals_16k.wav")}
+
+        print(f"Piste synthétique: {args.seconds:.0f}s stéréo 44.1 kHz")
+        print(f"{'chemin':<28}{'durée':>10}{'gain':>8}")
+        runs = [("librosa (ancien)", lambda: _legacy_resample(source, outputs))]
+        for engine in args.engines:
+            for quality in args.qualities:
+                runs.append((f"{engine} {quality}", lambda e=engine, q=quality: resampler.resample_file(
+                    source, outputs, quality=q, engine=e)))
+        reference = None
+        for name, run in runs:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            reference = reference or elapsed
+            print(f"{name:<28}{elapsed:>9.2f}s{reference / elapsed:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline SubGen")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("transcription", help="Facteur temps réel et WER par moteur de transcription")
+    p.add_argument("--audio", required=True, help="Fichier audio de test")
+    p.add_argument("--reference", help="Transcription de référence (texte brut) pour le WER")
+    p.add_argument("--model", default="large-v3-turbo")
+    p.add_argument("--language", default=None)
+    p.add_argument("--backends", nargs="+", default=["whisper_timestamped", "int8", "ctranslate2"])
+    p.add_argument("--shards", type=int, default=1,
+                   help="Compare aussi la transcription parallèle en N processus (N > 1)")
+    p.set_defaults(func=bench_transcription)
+
+    p = sub.add_parser("srt", help="Lecture/écriture SRT sur un fichier synthétique")
+    p.add_argument("--cues", type=int, default=100000, help="Nombre de sous-titres générés")
+    p.set_defaults(func=bench_srt)
+
+    p = sub.add_parser("translation", help="Débit de traduction contre un serveur DeepL/OpenAI local")
+    p.add_argument("--cues", type=int, default=2000, help="Nombre de sous-titres générés")
+    p.add_argument("--target", default="French")
+    p.add_argument("--services", nargs="+", default=["deepl", "openai"])
+    p.add_argument("--modes", nargs="+", default=["batched", "threaded", "async"])
+    p.add_argument("--latency-ms", type=float, default=100.0, help="Latence médiane simulée")
+    p.add_argument("--latency-sigma", type=float, default=0.5, help="Dispersion log-normale de la latence")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Probabilité d'une réponse 429")
+    p.add_argument("--retry-after", type=int, default=1, help="Retry-After des réponses 429 (s)")
+    p.add_argument("--rate-limit", type=float, default=0, help="Requêtes/s du limiteur partagé (0 = illimité)")
+    p.set_defaults(func=bench_translation)
+
+    p = sub.add_parser("separation", help="Durée et pic de mémoire de la séparation Demucs par fenêtres")
+    p.add_argument("--audio", required=True, help="Mélange à séparer (WAV 44.1 kHz stéréo)")
+    p.add_argument("--segments", type=float, nargs="+", default=[0, 60],
+                   help="Durées de fenêtre à comparer en secondes (0 = fichier entier)")
+    p.add_argument("--device", default="cpu")
+    p.set_defaults(func=bench_separation)
+
+    p = sub.add_parser("resample", help="Rééchantillonnage 44.1 kHz + 16 kHz : librosa contre resampler")
+    p.add_argument("--seconds", type=float, default=1800, help="Durée de la piste synthétique")
+    p.add_argument("--engines", nargs="+", default=["soxr", "polyphase"])
+    p.add_argument("--qualities", nargs="+", default=["fast", "high"])
+    p.set_defaults(func=bench_resample)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
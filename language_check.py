@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Vérification locale de la langue d'une traduction.
+
+Identification par écriture Unicode (CJK, cyrillique, arabe, devanagari,
+hangul) puis, pour les langues à alphabet latin, par mots outils et
+trigrammes de caractères ; un contrôle de fuite repère les mots recopiés
+depuis le texte source. Seuls les cas ambigus sont confiés au vérificateur
+LLM.
+"""
+
+import re
+import logging
+import threading
+import unicodedata
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+PASS = "pass"
+FAIL = "fail"
+AMBIGUOUS = "ambiguous"
+
+# Plages Unicode des langues à écriture non latine
+_SCRIPT_RANGES = {
+    "han": [(0x4E00, 0x9FFF), (0x3400, 0x4DBF)],
+    "kana": [(0x3040, 0x30FF)],
+    "hangul": [(0xAC00, 0xD7AF), (0x1100, 0x11FF)],
+    "cyrillic": [(0x0400, 0x04FF)],
+    "arabic": [(0x0600, 0x06FF), (0x0750, 0x077F)],
+    "devanagari": [(0x0900, 0x097F)],
+}
+SCRIPT_LANGUAGES = {
+    "ZH": ("han",),
+    "JA": ("kana", "han"),
+    "KO": ("hangul",),
+    "RU": ("cyrillic",),
+    "AR": ("arabic",),
+    "HI": ("devanagari",),
+}
+
+STOPWORDS = {
+    "EN": "the and you that is it to of in what this have not for are with was we be i'm don't my your he she they but know just can",
+    "FR": "le la les et est vous je tu que qui pas une des du ce c'est il elle nous mais pour dans avec sur suis ne on au mon oui",
+    "ES": "el la los las y es que de no un una por con para está pero lo se mi tu yo muy qué sí del como esto eso",
+    "DE": "der die das und ist nicht ich du sie wir ein eine zu mit auf es den dem was aber ja sind habe auch noch wie",
+    "IT": "il la che di e non è un una per sono ho mi ti ma con questo cosa come lo gli della anche perché sì",
+    "NL": "de het een en is niet ik je van dat wat met zijn op maar voor we ze ook nog hier er",
+    "PT": "o a os as e é que de não um uma para com por mas eu você isso está muito sim do da em meu",
+    "TR": "ve bir bu da de ne için ben sen çok var yok mi mı değil ama gibi evet şey o daha",
+}
+
+# Échantillons servant à construire les profils de trigrammes
+_SAMPLES = {
+    "EN": "I think we should go home now, there is nothing else to see here and it's getting late tonight.",
+    "FR": "Je pense qu'il faudrait rentrer maintenant, il n'y a plus rien à voir ici et il commence à être tard.",
+    "ES": "Creo que deberíamos volver a casa ahora, aquí no hay nada más que ver y ya se está haciendo tarde.",
+    "DE": "Ich glaube, wir sollten jetzt nach Hause gehen, hier gibt es nichts mehr zu sehen und es wird schon spät.",
+    "IT": "Penso che dovremmo tornare a casa adesso, qui non c'è più niente da vedere e si sta facendo tardi.",
+    "NL": "Ik denk dat we nu naar huis moeten gaan, er is hier niets meer te zien en het wordt al laat.",
+    "PT": "Acho que devíamos voltar para casa agora, não há mais nada para ver aqui e já está ficando tarde.",
+    "TR": "Bence artık eve dönmeliyiz, burada görecek başka bir şey yok ve hava kararmaya başlıyor.",
+}
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+
+def _words(text):
+    return _WORD_RE.findall(text.lower())
+
+
+def _trigrams(text):
+    padded = f" {' '.join(_words(text))} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+_STOPWORDS = {lang: set(words.split()) for lang, words in STOPWORDS.items()}
+_PROFILES = {
+    lang: {gram for gram, _ in Counter(_trigrams(_SAMPLES[lang] + " " + STOPWORDS[lang])).most_common(150)}
+    for lang in STOPWORDS
+}
+
+
+def _script(char):
+    code = ord(char)
+    for name, ranges in _SCRIPT_RANGES.items():
+        if any(start <= code <= end for start, end in ranges):
+            return name
+    return "latin" if unicodedata.category(char).startswith("L") else None
+
+
+def script_shares(text):
+    """Part de chaque écriture parmi les lettres du texte."""
+    counts = Counter(s for s in map(_script, text) if s)
+    total = sum(counts.values())
+    return {name: n / total for name, n in counts.items()} if total else {}
+
+
+def latin_scores(text):
+    """Score par langue latine : proportion de mots outils + moitié de la proportion de trigrammes connus."""
+    words = _words(text)
+    grams = _trigrams(text)
+    if not words:
+        return {}
+    return {
+        lang: sum(w in _STOPWORDS[lang] for w in words) / len(words)
+        + 0.5 * sum(g in _PROFILES[lang] for g in grams) / max(1, len(grams))
+        for lang in STOPWORDS
+    }
+
+
+def leakage(source, translation):
+    """Proportion des mots (4 lettres et plus) de la traduction recopiés tels quels depuis la source."""
+    source_words = {w for w in _words(source) if len(w) >= 4}
+    words = [w for w in _words(translation) if len(w) >= 4]
+    if not words:
+        return 0.0
+    return sum(w in source_words for w in words) / len(words)
+
+
+def assess_translation(source, translation, target_language):
+    """
+    Classe une traduction sans appel réseau.
+
+    Returns:
+        PASS, FAIL ou AMBIGUOUS (à confier au vérificateur LLM)
+    """
+    if not translation.strip():
+        return PASS
+    target = target_language.upper()[:2]
+    shares = script_shares(translation)
+
+    if target in SCRIPT_LANGUAGES:
+        share = sum(shares.get(s, 0.0) for s in SCRIPT_LANGUAGES[target])
+        if target == "ZH" and shares.get("kana", 0.0) > 0.1:
+            return AMBIGUOUS
+        if share >= 0.6:
+            return PASS
+        return FAIL if share <= 0.2 else AMBIGUOUS
+
+    if target not in STOPWORDS:
+        return AMBIGUOUS
+    if shares and shares.get("latin", 0.0) < 0.5:
+        return FAIL
+
+    scores = latin_scores(translation)
+    best = max(scores, key=scores.get) if scores else None
+    leaked = leakage(source, translation)
+    if len(_words(translation)) < 3:
+        # Réplique courte : trop peu d'indices, seule la recopie de la source est suspecte
+        return PASS if leaked < 0.34 else AMBIGUOUS
+    if leaked >= 0.6:
+        return AMBIGUOUS if best == target else FAIL
+
+    ranked = sorted(scores.values(), reverse=True)
+    if best == target and scores[target] - ranked[1] >= 0.05:
+        return PASS
+    if scores[best] >= 0.3 and scores[target] < 0.5 * scores[best]:
+        return FAIL
+    return AMBIGUOUS
+
+
+class VerifierStats:
+    """Compteurs du vérificateur : verdicts locaux et escalades vers le LLM."""
+
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.escalated = 0
+        self.escalation_failed = 0
+        self.llm_calls = 0
+        self._lock = threading.Lock()
+
+    def record(self, verdict):
+        with self._lock:
+            if verdict == PASS:
+                self.passed += 1
+            elif verdict == FAIL:
+                self.failed += 1
+            else:
+                self.escalated += 1
+
+    def record_escalation(self, failures, calls):
+        with self._lock:
+            self.escalation_failed += failures
+            self.llm_calls += calls
+
+    def stats(self):
+        with self._lock:
+            total = self.passed + self.failed + self.escalated
+            return {
+                "checked": total,
+                "pass_rate": self.passed / total if total else 0.0,
+                "fail_rate": self.failed / total if total else 0.0,
+                "escalation_rate": self.escalated / total if total else 0.0,
+                "escalation_failed": self.escalation_failed,
+                "llm_calls": self.llm_calls,
+                # Sans vérificateur local : un appel LLM par segment vérifié
+                "llm_calls_saved": total - self.llm_calls,
+            }
+
+    def log_stats(self):
+        stats = self.stats()
+        if stats["checked"]:
+            logger.info(
+                f"Vérification locale: {stats['checked']} segments, {stats['pass_rate']:.0%} validés, "
+                f"{stats['fail_rate']:.0%} rejetés, {stats['escalation_rate']:.0%} escaladés "
+                f"({stats['llm_calls']} appels LLM, {stats['llm_calls_saved']} économisés)"
+            )
+
+
+# Compteurs partagés par tous les threads de traduction
+verifier_stats = VerifierStats()
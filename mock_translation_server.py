@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Serveur local imitant les API de traduction utilisées par translate.py.
+
+Sous-ensemble pris en charge :
+- DeepL `POST /v2/translate` (paramètres `text` multiples, `target_lang`)
+- OpenAI `POST /v1/chat/completions` (traduction unitaire, lots JSON,
+  vérifications unitaires et groupées)
+
+La latence suit une loi log-normale configurable, des réponses 429 (avec
+Retry-After) peuvent être injectées et les jetons sont comptabilisés.
+
+Usage:
+    python mock_translation_server.py --port 8765 --latency-ms 120 --error-rate 0.05
+"""
+
+import re
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from translation_planner import estimate_tokens
+
+_TARGET_RE = re.compile(r"(?:into|should be in|completely in) ([\w-]+)")
+
+
+class MockStats:
+    """Compteurs du serveur : requêtes, 429 injectés, jetons et latences."""
+
+    def __init__(self):
+        self.requests = {}
+        self.throttled = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, latency, throttled=False, prompt_tokens=0, completion_tokens=0):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.throttled += throttled
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.latencies.append(latency)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "total_requests": sum(self.requests.values()),
+                "throttled": self.throttled,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "latencies": list(self.latencies),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.__init__()
+
+
+def _fake_translation(text, target):
+    return f"[{target}] {text}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        start = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+        endpoint = "deepl" if self.path.endswith("/v2/translate") else "openai" if self.path.endswith("/chat/completions") else None
+        if endpoint is None:
+            self._send(404, {"message": f"Chemin inconnu: {self.path}"})
+            return
+
+        time.sleep(server.sample_latency())
+        if random.random() < server.error_rate:
+            server.stats.record(endpoint, time.perf_counter() - start, throttled=True)
+            self._send(429, {"message": "Too Many Requests"}, {"Retry-After": str(server.retry_after)})
+            return
+
+        if endpoint == "deepl":
+            form = parse_qs(body)
+            target = form.get("target_lang", ["EN"])[0]
+            texts = form.get("text", [])
+            payload = {"translations": [
+                {"detected_source_language": "EN", "text": _fake_translation(t, target)} for t in texts
+            ]}
+            server.stats.record(endpoint, time.perf_counter() - start)
+        else:
+            payload, prompt_tokens, completion_tokens = _chat_completion(json.loads(body))
+            server.stats.record(endpoint, time.perf_counter() - start, False, prompt_tokens, completion_tokens)
+        self._send(200, payload)
+
+
+def _chat_completion(request):
+    """Réponse de chat déterministe selon le type de prompt (traduction/vérification, unitaire/lot)."""
+    prompt = request["messages"][-1]["content"]
+    match = _TARGET_RE.search(prompt)
+    target = match.group(1) if match else "XX"
+    verify = prompt.startswith("Verify") or prompt.startswith("For each text below, verify")
+    # Le texte à traiter suit la dernière ligne vide (après l'éventuel contexte)
+    payload_text = prompt.rsplit("\n\n", 1)[-1]
+
+    if payload_text.lstrip().startswith("["):
+        items = json.loads(payload_text)
+        field = "verdict" if verify else "translation"
+        content = json.dumps(
+            [{"id": item["id"], field: "yes" if verify else _fake_translation(item["text"], target)} for item in items],
+            ensure_ascii=False
+        )
+    elif verify:
+        content = "yes"
+    else:
+        content = _fake_translation(payload_text, target)
+
+    prompt_tokens = sum(estimate_tokens(m["content"]) for m in request["messages"])
+    completion_tokens = estimate_tokens(content)
+    payload = {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+    return payload, prompt_tokens, completion_tokens
+
+
+class MockTranslationServer(ThreadingHTTPServer):
+    """Serveur HTTP multi-thread imitant DeepL et OpenAI."""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=100.0, latency_sigma=0.5,
+                 error_rate=0.0, retry_after=1):
+        """
+        Initialise le serveur (port 0 = port libre choisi par le système).
+
+        Args:
+            latency_ms: Latence médiane simulée en millisecondes
+            latency_sigma: Écart-type de la loi log-normale (0 = latence fixe)
+            error_rate: Probabilité de répondre 429
+            retry_after: Valeur de l'en-tête Retry-After des 429 (secondes)
+        """
+        super().__init__((host, port), _Handler)
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.stats = MockStats()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def deepl_url(self):
+        return f"{self.base_url}/v2/translate"
+
+    @property
+    def openai_base_url(self):
+        return f"{self.base_url}/v1"
+
+    def sample_latency(self):
+        if self.latency_ms <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.latency_ms / 1000), self.latency_sigma)
+
+    def start(self):
+        """Démarre le serveur dans un thread d'arrière-plan."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local imitant DeepL et OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Latence médiane simulée")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Dispersion log-normale de la latence")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilité d'une réponse 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After des réponses 429 (s)")
+    args = parser.parse_args()
+
+    server = MockTranslationServer(args.host, args.port, args.latency_ms, args.latency_sigma,
+                                   args.error_rate, args.retry_after)
+    print(f"DeepL:  {server.deepl_url}\nOpenAI: {server.openai_base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Registre des modèles chargés en mémoire, partagé par tout le processus.
+
+Les modèles sont indexés par (nom, device, précision) et comptés par référence :
+un modèle en cours d'utilisation n'est jamais déchargé. Les modèles inutilisés
+sont évincés selon une politique LRU, bornée par un nombre maximal de modèles
+et/ou un budget mémoire.
+"""
+
+import gc
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_model_size(model):
+    """Estime la taille résidente d'un modèle torch (paramètres + buffers) en octets."""
+    if not isinstance(model, torch.nn.Module):
+        return 0
+    size = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        size += tensor.numel() * tensor.element_size()
+    return size
+
+
+class _ModelEntry:
+    """Entrée du registre : le modèle et ses statistiques."""
+
+    def __init__(self, model, load_time, size_bytes):
+        self.model = model
+        self.load_time = load_time
+        self.size_bytes = size_bytes
+        self.refcount = 0
+        self.hits = 0
+        self.last_used = time.time()
+
+
+class ModelRegistry:
+    """Cache LRU de modèles avec comptage de références."""
+
+    def __init__(self, loader, max_models=2, memory_budget_mb=None, name="modèles"):
+        """
+        Initialise le registre.
+
+        Args:
+            loader: Fonction (nom, device, précision) -> modèle
+            max_models: Nombre maximal de modèles gardés en mémoire (None = illimité)
+            memory_budget_mb: Budget mémoire total en Mo (None = illimité)
+            name: Nom du registre utilisé dans les logs
+        """
+        self.loader = loader
+        self.max_models = max_models
+        self.memory_budget_mb = memory_budget_mb
+        self.name = name
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Condition()
+
+    @staticmethod
+    def make_key(model_name, device, precision):
+        return (model_name, device, precision)
+
+    def acquire(self, model_name, device, precision="fp32"):
+        """Retourne le modèle demandé (chargé si besoin) et incrémente son compteur."""
+        key = self.make_key(model_name, device, precision)
+        with self._lock:
+            while True:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refcount += 1
+                    entry.hits += 1
+                    entry.last_used = time.time()
+                    self._entries.move_to_end(key)
+                    return entry.model
+                if key not in self._loading:
+                    # Ce thread se charge du chargement, les autres attendent
+                    self._loading[key] = True
+                    break
+                self._lock.wait()
+
+        try:
+            start = time.perf_counter()
+            model = self.loader(model_name, device, precision)
+            load_time = time.perf_counter() - start
+            entry = _ModelEntry(model, load_time, estimate_model_size(model))
+            logger.info(
+                f"Modèle {model_name} ({device}, {precision}) chargé en {load_time:.1f}s "
+                f"({entry.size_bytes / (1024 * 1024):.0f} Mo)"
+            )
+        except Exception:
+            with self._lock:
+                del self._loading[key]
+                self._lock.notify_all()
+            raise
+
+        with self._lock:
+            del self._loading[key]
+            entry.refcount = 1
+            self._entries[key] = entry
+            self._evict_locked()
+            self._lock.notify_all()
+        return model
+
+    def release(self, model_name, device, precision="fp32"):
+        """Décrémente le compteur de références du modèle et applique l'éviction."""
+        key = self.make_key(model_name, device, precision)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refcount = max(0, entry.refcount - 1)
+            entry.last_used = time.time()
+            self._evict_locked()
+
+    @contextmanager
+    def lease(self, model_name, device, precision="fp32"):
+        """Gestionnaire de contexte : acquire() puis release() en sortie."""
+        model = self.acquire(model_name, device, precision)
+        try:
+            yield model
+        finally:
+            self.release(model_name, device, precision)
+
+    def preload(self, model_name, device, precision="fp32"):
+        """Charge un modèle à l'avance sans le garder réservé."""
+        self.acquire(model_name, device, precision)
+        self.release(model_name, device, precision)
+
+    def unload(self, model_name=None, device=None, precision=None, force=False):
+        """
+        Décharge les modèles correspondant aux critères (tous si aucun critère).
+
+        Les modèles encore utilisés ne sont déchargés que si force=True.
+
+        Returns:
+            Nombre de modèles déchargés
+        """
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if (model_name is None or key[0] == model_name)
+                and (device is None or key[1] == device)
+                and (precision is None or key[2] == precision)
+            ]
+            unloaded = 0
+            for key in keys:
+                entry = self._entries[key]
+                if entry.refcount > 0 and not force:
+                    logger.warning(f"Modèle {key[0]} encore utilisé ({entry.refcount} réf.), non déchargé")
+                    continue
+                self._drop_locked(key)
+                unloaded += 1
+        if unloaded:
+            self._free_memory()
+        return unloaded
+
+    def stats(self):
+        """Retourne les statistiques par modèle en cache (ordre LRU, le plus ancien en premier)."""
+        with self._lock:
+            return [
+                {
+                    "model": key[0],
+                    "device": key[1],
+                    "precision": key[2],
+                    "load_time": entry.load_time,
+                    "size_mb": entry.size_bytes / (1024 * 1024),
+                    "refcount": entry.refcount,
+                    "hits": entry.hits,
+                }
+                for key, entry in self._entries.items()
+            ]
+
+    def log_stats(self):
+        """Affiche les statistiques du registre dans les logs."""
+        stats = self.stats()
+        if not stats:
+            logger.info(f"Registre des {self.name}: vide")
+            return
+        total_mb = sum(s["size_mb"] for s in stats)
+        logger.info(f"Registre des {self.name}: {len(stats)} modèle(s), {total_mb:.0f} Mo résidents")
+        for s in stats:
+            logger.info(
+                f"  - {s['model']} [{s['device']}/{s['precision']}] "
+                f"chargement {s['load_time']:.1f}s, {s['size_mb']:.0f} Mo, "
+                f"{s['hits']} utilisation(s), {s['refcount']} en cours"
+            )
+
+    def _total_size_mb(self):
+        return sum(e.size_bytes for e in self._entries.values()) / (1024 * 1024)
+
+    def _over_budget(self):
+        if self.max_models is not None and len(self._entries) > self.max_models:
+            return True
+        if self.memory_budget_mb is not None and self._total_size_mb() > self.memory_budget_mb:
+            return True
+        return False
+
+    def _evict_locked(self):
+        evicted = False
+        while self._over_budget():
+            # Le plus ancien modèle non utilisé est évincé en premier
+            victim = next((k for k, e in self._entries.items() if e.refcount == 0), None)
+            if victim is None:
+                break
+            logger.info(f"Éviction du modèle {victim[0]} ({victim[1]}, {victim[2]})")
+            self._drop_locked(victim)
+            evicted = True
+        if evicted:
+            self._free_memory()
+
+    def _drop_locked(self, key):
+        entry = self._entries.pop(key)
+        entry.model = None
+
+    @staticmethod
+    def _free_memory():
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
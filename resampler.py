@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Rééchantillonnage par blocs, en une seule lecture pour plusieurs fréquences.
+
+Le fichier source est lu une fois, bloc par bloc (projection mémoire des
+données WAV quand c'est possible), mixé en mono et envoyé à un flux de
+rééchantillonnage par fréquence cible ; les sorties sont écrites au fil de
+l'eau. La mémoire utilisée ne dépend pas de la durée du fichier.
+
+Deux moteurs :
+- soxr (dépendance de librosa) en flux continu ;
+- filtre polyphase scipy (resample_poly), traité par blocs avec une marge de
+  la demi-longueur du filtre de chaque côté : le résultat est identique à un
+  rééchantillonnage du fichier entier.
+"""
+
+import os
+import math
+import struct
+import logging
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import firwin, resample_poly
+
+try:
+    import soxr
+except ImportError:
+    # soxr optionnel : filtre polyphase scipy
+    soxr = None
+
+logger = logging.getLogger(__name__)
+
+# Niveaux de qualité : (qualité soxr, demi-longueur du filtre polyphase par facteur, beta de Kaiser)
+QUALITY_TIERS = {
+    "fast": ("LQ", 4, 5.0),
+    "medium": ("MQ", 10, 5.0),
+    "high": ("HQ", 16, 8.0),
+    "very_high": ("VHQ", 32, 9.0),
+}
+
+
+class PolyphaseStream:
+    """Rééchantillonneur polyphase à état : des blocs successifs donnent le même signal qu'un appel unique."""
+
+    def __init__(self, in_rate, out_rate, quality="high"):
+        _, half_len, beta = QUALITY_TIERS[quality]
+        g = math.gcd(int(in_rate), int(out_rate))
+        self.up, self.down = int(out_rate) // g, int(in_rate) // g
+        max_rate = max(self.up, self.down)
+        half = half_len * max_rate
+        self.taps = firwin(2 * half + 1, 1.0 / max_rate, window=("kaiser", beta))
+        # Marge (échantillons d'entrée) couvrant la demi-longueur du filtre, multiple de `down`
+        # pour que chaque bloc reste aligné sur la grille de sortie
+        self.pad = -(-math.ceil(half / self.up) // self.down) * self.down
+        self._buffer = np.zeros(self.pad, dtype=np.float32)
+
+    def process(self, block, last=False):
+        """Ajoute un bloc d'entrée ; retourne les échantillons de sortie désormais définitifs."""
+        parts = [self._buffer, np.asarray(block, dtype=np.float32)]
+        if last:
+            parts.append(np.zeros(self.pad, dtype=np.float32))
+        buffer = np.concatenate(parts)
+        count = len(buffer) - 2 * self.pad
+        if not last:
+            count = count // self.down * self.down
+        if count <= 0:
+            self._buffer = buffer
+            return np.zeros(0, dtype=np.float32)
+
+        # resample_poly met les coefficients à l'échelle en place : copie à chaque appel
+        y = resample_poly(buffer[:count + 2 * self.pad], self.up, self.down, window=self.taps.copy())
+        skip = self.pad * self.up // self.down
+        out = y[skip:skip + -(-count * self.up // self.down)]
+        self._buffer = buffer[count:]
+        return out.astype(np.float32, copy=False)
+
+
+class _SoxrStream:
+    def __init__(self, in_rate, out_rate, quality="high"):
+        self._stream = soxr.ResampleStream(in_rate, out_rate, 1, dtype="float32", quality=QUALITY_TIERS[quality][0])
+
+    def process(self, block, last=False):
+        return self._stream.resample_chunk(np.asarray(block, dtype=np.float32), last=last)
+
+
+class _IdentityStream:
+    def process(self, block, last=False):
+        return block
+
+
+def _wav_memmap(path):
+    """
+    Projection mémoire des données d'un WAV PCM 16/32 bits ou flottant 32 bits.
+
+    Returns:
+        (tableau (échantillons, canaux), fréquence) ou None si le format n'est pas pris en charge
+    """
+    dtypes = {(1, 16): "<i2", (1, 32): "<i4", (3, 32): "<f4"}
+    with open(path, "rb") as f:
+        if f.read(12)[8:] != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                data = f.read(size)
+                tag, channels, rate = struct.unpack("<HHI", data[:8])
+                bits = struct.unpack("<H", data[14:16])[0]
+                if tag == 0xFFFE and size >= 26:
+                    # WAVE_FORMAT_EXTENSIBLE : le format réel est en tête du GUID
+                    tag = struct.unpack("<H", data[24:26])[0]
+                fmt = (tag, bits, channels, rate)
+                f.seek(size % 2, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if fmt is None or (fmt[0], fmt[1]) not in dtypes:
+                    return None
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + size % 2, os.SEEK_CUR)
+    tag, bits, channels, rate = fmt
+    itemsize = bits // 8
+    frames = min(size, os.path.getsize(path) - offset) // (itemsize * channels)
+    if not frames:
+        return np.zeros((0, channels), dtype=np.float32), rate
+    data = np.memmap(path, dtype=dtypes[(tag, bits)], mode="r", offset=offset, shape=(frames, channels))
+    return data, rate
+
+
+def _iter_mono_blocks(path, block_sec):
+    """Blocs mono float32 de `block_sec` secondes (projection mémoire si WAV, soundfile sinon) et fréquence."""
+    mapped = None
+    try:
+        mapped = _wav_memmap(path)
+    except (OSError, ValueError, struct.error):
+        mapped = None
+
+    if mapped is not None:
+        data, rate = mapped
+        block_frames = max(1, int(block_sec * rate))
+        scale = {np.dtype("<i2"): 1 / 32768, np.dtype("<i4"): 1 / 2147483648}.get(data.dtype, 1.0)
+
+        def blocks():
+            for start in range(0, len(data), block_frames):
+                block = data[start:start + block_frames].mean(axis=1, dtype=np.float32)
+                yield block * np.float32(scale) if scale != 1.0 else block
+        return blocks(), rate
+
+    rate = sf.info(path).samplerate
+    block_frames = max(1, int(block_sec * rate))
+
+    def sf_blocks():
+        for block in sf.blocks(path, blocksize=block_frames, dtype="float32", always_2d=True):
+            yield block.mean(axis=1)
+    return sf_blocks(), rate
+
+
+def make_stream(in_rate, out_rate, quality="high", engine=None):
+    """Flux de rééchantillonnage ("soxr", "polyphase", None = soxr si disponible)."""
+    if in_rate == out_rate:
+        return _IdentityStream()
+    if engine is None:
+        engine = "soxr" if soxr is not None else "polyphase"
+    if engine == "soxr":
+        return _SoxrStream(in_rate, out_rate, quality)
+    return PolyphaseStream(in_rate, out_rate, quality)
+
+
+def resample_file(input_path, outputs, quality="high", engine=None, block_sec=30.0):
+    """
+    Lit un fichier une seule fois (mixé en mono) et écrit une version par fréquence.
+
+    Args:
+        input_path: Fichier source (peut aussi figurer parmi les sorties)
+        outputs: Dictionnaire fréquence -> chemin de sortie (WAV 16 bits)
+        quality: Niveau de QUALITY_TIERS
+        engine: "soxr", "polyphase" ou None (automatique)
+        block_sec: Durée d'un bloc de lecture en secondes
+    """
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"File not found: {input_path}")
+    blocks, rate = _iter_mono_blocks(input_path, block_sec)
+
+    # Fichiers temporaires : une sortie peut remplacer la source en cours de lecture
+    temp_paths = {target: f"{path}.part" for target, path in outputs.items()}
+    streams = {target: make_stream(rate, target, quality, engine) for target in outputs}
+    writers = {}
+    try:
+        for target, temp_path in temp_paths.items():
+            writers[target] = sf.SoundFile(temp_path, "w", samplerate=target, channels=1,
+                                           subtype="PCM_16", format="WAV")
+        # Un bloc d'avance pour signaler le dernier aux flux
+        pending = next(blocks, None)
+        while pending is not None:
+            following = next(blocks, None)
+            for target, stream in streams.items():
+                out = stream.process(pending, last=following is None)
+                if len(out):
+                    writers[target].write(out)
+            pending = following
+    except Exception:
+        for writer in writers.values():
+            writer.close()
+        for temp_path in temp_paths.values():
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        raise
+    finally:
+        blocks.close()
+    for writer in writers.values():
+        writer.close()
+    for target, path in outputs.items():
+        os.replace(temp_paths[target], path)
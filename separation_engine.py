@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Séparation de sources Demucs dans le processus.
+
+Le modèle est chargé une seule fois dans un registre partagé (voir
+model_registry) et réutilisé d'une vidéo à l'autre, au lieu de relancer la
+CLI `demucs` à chaque traitement (démarrage de Python, import de torch et
+chargement du modèle). L'entrée est un tableau NumPy ou un tenseur, les
+pistes sont retournées en mémoire et seules celles demandées sont écrites.
+Les fichiers longs sont traités par fenêtres recouvrantes, écrites au fil de
+l'eau, pour borner la mémoire. Le temps passé dans chaque étape est cumulé
+sur tout le lot.
+"""
+
+import sys
+import time
+import logging
+import threading
+from contextlib import ExitStack, contextmanager
+
+import numpy as np
+import soundfile as sf
+import torch
+
+from model_registry import ModelRegistry
+from utils import config
+
+logger = logging.getLogger(__name__)
+
+# Secondes de calcul par seconde d'audio, tant qu'aucune séparation n'a été mesurée
+DEFAULT_REALTIME_FACTOR = {"cpu": 0.5, "cuda": 0.05}
+
+
+def _load_demucs_model(model_name, device, precision):
+    from demucs.pretrained import get_model
+
+    model = get_model(model_name)
+    model.to(device)
+    model.eval()
+    return model
+
+
+# Un seul modèle Demucs en mémoire, partagé par tous les traitements du lot
+demucs_models = ModelRegistry(_load_demucs_model, max_models=1, name="modèles Demucs")
+
+
+class StageTimings:
+    """Temps cumulés par étape de séparation, sur tous les traitements du processus."""
+
+    def __init__(self):
+        self.jobs = 0
+        self.audio_seconds = 0.0
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, timings, stage):
+        """Mesure une étape et l'ajoute au dictionnaire du traitement courant."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+    def record(self, timings, audio_seconds=0.0):
+        with self._lock:
+            self.jobs += 1
+            self.audio_seconds += audio_seconds
+            for stage, elapsed in timings.items():
+                self.totals[stage] = self.totals.get(stage, 0.0) + elapsed
+
+    def stats(self):
+        with self._lock:
+            return {"jobs": self.jobs, "audio_seconds": self.audio_seconds, "totals": dict(self.totals)}
+
+    def estimate(self, duration, device="cpu"):
+        """Durée de séparation attendue pour `duration` secondes d'audio (mesures du lot, sinon estimation)."""
+        with self._lock:
+            if self.audio_seconds:
+                return duration * sum(self.totals.values()) / self.audio_seconds
+        return duration * DEFAULT_REALTIME_FACTOR.get(device, DEFAULT_REALTIME_FACTOR["cpu"])
+
+    def log_stats(self):
+        stats = self.stats()
+        if stats["jobs"]:
+            details = ", ".join(f"{stage} {elapsed:.1f}s" for stage, elapsed in stats["totals"].items())
+            logger.info(f"Séparation: {stats['jobs']} traitement(s), cumul {details}")
+
+
+separation_timings = StageTimings()
+
+
+def _format_timings(timings):
+    return ", ".join(f"{stage} {elapsed:.1f}s" for stage, elapsed in timings.items())
+
+
+def separate_waveform(model, waveform, sample_rate, two_stems="vocals", shifts=1, overlap=0.25, normalization=None):
+    """
+    Sépare un signal avec un modèle Demucs déjà chargé.
+
+    Args:
+        model: Modèle Demucs (voir demucs_models)
+        waveform: Tableau (échantillons, canaux) ou tenseur (canaux, échantillons)
+        sample_rate: Fréquence d'échantillonnage du signal
+        two_stems: Piste isolée (les autres sont sommées en "no_vocals"), None = toutes les pistes
+        shifts: Nombre de décalages aléatoires moyennés (qualité contre temps)
+        overlap: Recouvrement entre les fenêtres de Demucs
+        normalization: (moyenne, écart-type) du fichier complet, None = calculés sur ce signal
+
+    Returns:
+        Dictionnaire piste -> tableau float32 (échantillons, canaux) à model.samplerate
+    """
+    from demucs.apply import apply_model
+    from demucs.audio import convert_audio
+
+    if isinstance(waveform, np.ndarray):
+        waveform = torch.from_numpy(np.ascontiguousarray(waveform.T, dtype=np.float32))
+    wav = convert_audio(waveform, sample_rate, model.samplerate, model.audio_channels)
+    device = next(model.parameters()).device
+
+    # Normalisation identique à la CLI Demucs
+    if normalization is None:
+        ref = wav.mean(0)
+        normalization = (float(ref.mean()), float(ref.std()))
+    mean, std = normalization[0], normalization[1] + 1e-8
+    with torch.no_grad():
+        sources = apply_model(
+            model, ((wav - mean) / std)[None], device=device, shifts=shifts,
+            split=True, overlap=overlap, progress=False
+        )[0]
+    sources = (sources * std + mean).cpu()
+
+    stems = {name: sources[i].numpy().T for i, name in enumerate(model.sources)}
+    if two_stems:
+        isolated = stems.pop(two_stems)
+        stems = {two_stems: isolated, f"no_{two_stems}": sum(stems.values())}
+    return stems
+
+
+def peak_memory_mb():
+    """Pic de mémoire résidente du processus en Mo (None si indisponible)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en kilo-octets ailleurs
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _file_normalization(f, blocksize=1 << 20):
+    """Moyenne et écart-type du signal mono d'un fichier, lus par blocs."""
+    total, total_sq, count = 0.0, 0.0, 0
+    f.seek(0)
+    for block in f.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+        ref = block.mean(axis=1, dtype=np.float64)
+        total += ref.sum()
+        total_sq += np.square(ref).sum()
+        count += len(ref)
+    if not count:
+        return 0.0, 0.0
+    mean = total / count
+    return mean, float(np.sqrt(max(total_sq / count - mean * mean, 0.0)))
+
+
+def iter_windows(total, segment, overlap):
+    """
+    Fenêtres (début, fin) couvrant `total` échantillons.
+
+    Chaque fenêtre recouvre la précédente de `overlap` échantillons ; la
+    dernière est toujours plus longue que le recouvrement.
+    """
+    segment = max(segment, 2 * overlap + 1)
+    start = 0
+    while True:
+        end = min(start + segment, total)
+        yield start, end, end >= total
+        if end >= total:
+            break
+        start = end - overlap
+
+
+def overlap_add(results, overlap):
+    """
+    Assemble les pistes de fenêtres recouvrantes par fondu enchaîné linéaire.
+
+    Args:
+        results: Itérable de (dictionnaire piste -> tableau (échantillons, canaux), dernière fenêtre ?)
+        overlap: Recouvrement entre fenêtres consécutives, en échantillons de sortie
+
+    Yields:
+        Dictionnaire piste -> bloc définitif ; la concaténation des blocs donne le signal complet
+    """
+    fade_in = np.linspace(0.0, 1.0, overlap + 2, dtype=np.float32)[1:-1, None]
+    tail = None
+    for stems, last in results:
+        out = {}
+        for name, data in stems.items():
+            data = np.array(data, dtype=np.float32)
+            if tail is not None:
+                head = min(overlap, len(data))
+                data[:head] = data[:head] * fade_in[:head] + tail[name][:head]
+            out[name] = data
+        if last or not overlap:
+            tail = None
+            yield out
+        else:
+            tail = {name: data[-overlap:] * (1.0 - fade_in) for name, data in out.items()}
+            yield {name: data[:-overlap] for name, data in out.items()}
+
+
+def separate_file(input_file, output_files, device="cpu", model_name=None, segment_sec=None, overlap_sec=None):
+    """
+    Sépare un fichier audio par fenêtres et écrit les pistes demandées au fil de l'eau.
+
+    Seule une fenêtre et ses pistes sont en mémoire à un instant donné : le
+    pic de mémoire ne dépend pas de la durée de la vidéo. Les fenêtres se
+    recouvrent et sont raccordées par fondu enchaîné ; la normalisation est
+    calculée sur tout le fichier, comme pour une séparation d'un seul tenant.
+
+    Args:
+        input_file: Fichier audio lisible par soundfile (WAV 44.1 kHz stéréo de l'extraction)
+        output_files: Dictionnaire piste -> chemin ("vocals", "no_vocals", ou pistes du modèle)
+        device: "cpu" ou "cuda"
+        model_name: Modèle Demucs (None = config.demucs_model)
+        segment_sec: Durée d'une fenêtre (None = config.separation_segment_sec, 0 = fichier entier)
+        overlap_sec: Recouvrement entre fenêtres (None = config.separation_overlap_sec)
+
+    Returns:
+        Dictionnaire étape -> durée en secondes
+    """
+    model_name = model_name or config.demucs_model
+    segment_sec = config.separation_segment_sec if segment_sec is None else segment_sec
+    overlap_sec = config.separation_overlap_sec if overlap_sec is None else overlap_sec
+    timings = {}
+    two_stems = None if set(output_files) - {"vocals", "no_vocals"} else "vocals"
+
+    with separation_timings.measure(timings, "modèle"):
+        model = demucs_models.acquire(model_name, device)
+    try:
+        with ExitStack() as stack:
+            f = stack.enter_context(sf.SoundFile(input_file))
+            sample_rate, total = f.samplerate, f.frames
+            audio_seconds = total / sample_rate
+            segment = int(segment_sec * sample_rate) if segment_sec else total
+            overlap = int(overlap_sec * sample_rate) if segment < total else 0
+            out_overlap = int(round(overlap * model.samplerate / sample_rate))
+
+            with separation_timings.measure(timings, "lecture"):
+                normalization = _file_normalization(f)
+            writers = {
+                name: stack.enter_context(sf.SoundFile(
+                    path, "w", samplerate=model.samplerate, channels=model.audio_channels, subtype="PCM_16"
+                ))
+                for name, path in output_files.items()
+            }
+
+            def results():
+                for start, end, last in iter_windows(total, segment, overlap):
+                    with separation_timings.measure(timings, "lecture"):
+                        f.seek(start)
+                        block = f.read(end - start, dtype="float32", always_2d=True)
+                    with separation_timings.measure(timings, "séparation"):
+                        stems = separate_waveform(
+                            model, block, sample_rate, two_stems=two_stems, normalization=normalization
+                        )
+                    yield {name: stems[name] for name in writers}, last
+
+            for chunk in overlap_add(results(), out_overlap):
+                with separation_timings.measure(timings, "écriture"):
+                    for name, data in chunk.items():
+                        writers[name].write(data)
+    finally:
+        demucs_models.release(model_name, device)
+
+    separation_timings.record(timings, audio_seconds)
+    memory = peak_memory_mb()
+    logger.info(
+        f"Séparation Demucs ({model_name}, {device}) dans le processus: {_format_timings(timings)}"
+        + (f", mémoire max {memory:.0f} Mo" if memory is not None else "")
+        + (f", mémoire GPU max {torch.cuda.max_memory_allocated() / 2**20:.0f} Mo" if device == "cuda" else "")
+    )
+    return timings
+
+
+def preload_separation_model(device="cpu", model_name=None):
+    """Charge le modèle Demucs avant le traitement d'un lot."""
+    demucs_models.preload(model_name or config.demucs_model, device)
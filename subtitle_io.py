@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Lecture et écriture de sous-titres SRT/VTT en une seule passe.
+
+Les sous-titres sont représentés par des `Cue` compacts (début/fin en
+millisecondes entières). Le lecteur traite les lignes au fil de l'eau et
+tolère les fichiers réels : BOM, fins de ligne CRLF, lignes vides multiples
+ou manquantes, numéros absents, horodatages VTT (avec ou sans heures,
+réglages de position), blocs NOTE/STYLE/REGION. Un texte isolé entre deux
+sous-titres est rattaché au sous-titre précédent au lieu de former un
+segment orphelin.
+"""
+
+import re
+from itertools import chain
+
+_TIME = r"(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})"
+_TIMING_RE = re.compile(rf"^{_TIME}\s*-+>\s*{_TIME}")
+_VTT_BLOCKS = ("WEBVTT", "NOTE", "STYLE", "REGION")
+
+
+class Cue:
+    """Un sous-titre : numéro d'origine (ou None), début et fin en ms, texte."""
+
+    __slots__ = ("index", "start", "end", "text")
+
+    def __init__(self, index, start, end, text=""):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.text = text
+
+    @classmethod
+    def from_seconds(cls, start, end, text="", index=None):
+        return cls(index, int(round(start * 1000)), int(round(end * 1000)), text)
+
+    def __repr__(self):
+        return f"Cue({self.index}, {self.start}, {self.end}, {self.text!r})"
+
+
+def parse_timestamp(value):
+    """Horodatage "HH:MM:SS,mmm" (ou "MM:SS.mmm", virgule ou point) en millisecondes."""
+    clock, _, frac = value.strip().replace(",", ".").partition(".")
+    parts = clock.split(":")
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds * 1000 + int((frac + "00")[:3])
+
+
+def _to_ms(hours, minutes, seconds, fraction):
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, "0"))
+
+
+def format_timestamp(ms, separator=","):
+    """Millisecondes en "HH:MM:SS,mmm" (séparateur "." pour le VTT)."""
+    ms = max(0, int(ms))
+    return f"{ms // 3600000:02}:{ms // 60000 % 60:02}:{ms // 1000 % 60:02}{separator}{ms % 1000:03}"
+
+
+def iter_cues(lines):
+    """
+    Lit des sous-titres SRT ou VTT ligne par ligne.
+
+    Une ligne ne sert de numéro (ou d'identifiant VTT) que si elle précède
+    directement une ligne d'horodatage : un sous-titre dont le texte n'est
+    qu'un nombre reste un texte.
+
+    Args:
+        lines: Itérable de lignes (fichier ouvert, liste de chaînes)
+
+    Yields:
+        Cue dans l'ordre du fichier
+    """
+    cue = None
+    text = []
+    index = None
+    after_blank = True
+    skipping = False      # bloc d'en-tête VTT en cours
+
+    match_timing = _TIMING_RE.match
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+    stripped = first.lstrip("\ufeff").strip()
+    timing = match_timing(stripped) if "-->" in stripped else None
+
+    # Lecture avec une ligne d'avance : la ligne suivante décide du rôle de la courante
+    for line in chain(lines, (None,)):
+        if line is None:
+            next_stripped, next_timing = None, None
+        else:
+            next_stripped = line.strip()
+            next_timing = match_timing(next_stripped) if "-->" in next_stripped else None
+
+        if not stripped:
+            after_blank = True
+            skipping = False
+        elif skipping:
+            pass
+        elif timing:
+            if cue is not None:
+                cue.text = "\n".join(text)
+                yield cue
+            bounds = timing.groups()
+            cue = Cue(index, _to_ms(*bounds[:4]), _to_ms(*bounds[4:]))
+            text = []
+            index = None
+            after_blank = False
+        elif next_timing and (after_blank or stripped.isdigit()):
+            # Numéro du sous-titre suivant (ligne vide éventuellement manquante) ou identifiant VTT
+            index = int(stripped) if stripped.isdigit() else None
+        elif after_blank and stripped.startswith(_VTT_BLOCKS):
+            skipping = True
+        else:
+            # Texte du sous-titre ; un texte isolé après une ligne vide est rattaché au précédent
+            if cue is not None:
+                text.append(stripped)
+            after_blank = False
+
+        stripped, timing = next_stripped, next_timing
+
+    if cue is not None:
+        cue.text = "\n".join(text)
+        yield cue
+
+
+def parse_cues(content):
+    """Sous-titres d'un contenu SRT/VTT en mémoire."""
+    return list(iter_cues(content.splitlines()))
+
+
+def read_cues(path):
+    """Sous-titres d'un fichier SRT/VTT (BOM et CRLF acceptés)."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return list(iter_cues(f))
+
+
+def _clean_text(text):
+    text = text.strip()
+    if "\n\n" not in text and "\r" not in text:
+        return text
+    # Une ligne vide dans le texte terminerait le sous-titre
+    return "\n".join(line for line in text.splitlines() if line.strip())
+
+
+def srt_block(number, cue):
+    """Bloc SRT d'un sous-titre."""
+    return f"{number}\n{format_timestamp(cue.start)} --> {format_timestamp(cue.end)}\n{_clean_text(cue.text)}\n\n"
+
+
+def vtt_block(cue):
+    """Bloc VTT d'un sous-titre."""
+    return f"{format_timestamp(cue.start, '.')} --> {format_timestamp(cue.end, '.')}\n{_clean_text(cue.text)}\n\n"
+
+
+def write_srt(cues, f):
+    """Écrit des sous-titres SRT (renumérotés à partir de 1) dans un fichier ouvert."""
+    for number, cue in enumerate(cues, start=1):
+        f.write(srt_block(number, cue))
+
+
+def write_vtt(cues, f):
+    """Écrit des sous-titres VTT dans un fichier ouvert."""
+    f.write("WEBVTT\n\n")
+    for cue in cues:
+        f.write(vtt_block(cue))
+
+
+def format_srt(cues):
+    """Contenu SRT complet."""
+    return "".join(srt_block(number, cue) for number, cue in enumerate(cues, start=1))
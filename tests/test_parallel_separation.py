@@ -0,0 +1,73 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("torch")
+pytest.importorskip("pydub")
+
+import audio_extractor
+from utils import config
+
+JOBS = 6
+RATE = 44100
+
+
+def job_level(job):
+    # Amplitude propre à chaque traitement : une piste croisée se repère à sa valeur
+    return round(0.05 * (job + 1), 2)
+
+
+def fake_demucs(command):
+    """Imite la CLI Demucs : écrit sous `-o` des pistes marquées par le fichier d'entrée."""
+    root = command[command.index("-o") + 1]
+    model = command[command.index("-n") + 1]
+    input_file = command[-1]
+    level = float(sf.read(input_file, dtype="float32")[0][0, 0])
+    out_dir = os.path.join(root, model)
+    os.makedirs(out_dir, exist_ok=True)
+    # Laisse les autres traitements s'intercaler
+    time.sleep(0.05)
+    for stem in ("vocals", "no_vocals"):
+        sf.write(os.path.join(out_dir, f"{stem}.wav"), np.full((RATE // 2, 2), level, dtype=np.float32), RATE,
+                 subtype="FLOAT")
+
+
+@pytest.fixture
+def cli_separation(monkeypatch):
+    monkeypatch.setattr(config, "separation_engine", "cli")
+    monkeypatch.setattr(config, "separation_mode", "always")
+    monkeypatch.setattr(audio_extractor, "run_demucs_with_logs", fake_demucs)
+
+
+def test_parallel_cli_separations_keep_their_own_stems(tmp_path, cli_separation):
+    jobs = []
+    for job in range(JOBS):
+        # Même nom de fichier pour tous : seules les racines de sortie les distinguent
+        source_dir = tmp_path / f"video{job}"
+        source_dir.mkdir()
+        input_file = source_dir / "audio_44k.wav"
+        sf.write(input_file, np.full((RATE // 2, 2), job_level(job), dtype=np.float32), RATE, subtype="FLOAT")
+        jobs.append((job, str(input_file), str(source_dir / "separated")))
+
+    with ThreadPoolExecutor(max_workers=JOBS) as executor:
+        futures = [
+            executor.submit(audio_extractor.separate_audio, input_file, output_dir, use_gpu=False, use_threading=True)
+            for _, input_file, output_dir in jobs
+        ]
+        for future in futures:
+            future.result()
+
+    for job, _, output_dir in jobs:
+        assert sorted(os.listdir(output_dir)) == [
+            "accompaniment.wav", "bass.wav", "drums.wav", "other.wav", "vocals.wav", "vocals_44khz.wav"
+        ]
+        accompaniment, _ = sf.read(os.path.join(output_dir, "accompaniment.wav"), dtype="float32")
+        assert np.allclose(accompaniment, job_level(job), atol=1e-4)
+        vocals, rate = sf.read(os.path.join(output_dir, "vocals_44khz.wav"), dtype="float32")
+        assert rate == RATE
+        # Milieu du signal : loin des bords du filtre de rééchantillonnage
+        assert np.median(vocals) == pytest.approx(job_level(job), abs=1e-3)
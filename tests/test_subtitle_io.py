@@ -0,0 +1,64 @@
+import io
+
+from subtitle_io import Cue, parse_cues, write_srt, write_vtt
+
+
+def _roundtrip_srt(cues):
+    buffer = io.StringIO()
+    write_srt(cues, buffer)
+    return parse_cues(buffer.getvalue())
+
+
+def _fields(cues):
+    return [(cue.index, cue.start, cue.end, cue.text) for cue in cues]
+
+
+def test_srt_basic():
+    content = "1\n00:00:01,000 --> 00:00:02,500\nBonjour\nà tous\n\n2\n00:00:03,000 --> 00:00:04,000\nSalut\n"
+    assert _fields(parse_cues(content)) == [
+        (1, 1000, 2500, "Bonjour\nà tous"),
+        (2, 3000, 4000, "Salut"),
+    ]
+
+
+def test_trailing_numeric_cue_survives_roundtrip():
+    cues = [Cue(1, 1000, 2000, "hello"), Cue(2, 3000, 4000, "2019")]
+    assert _fields(_roundtrip_srt(cues)) == [(1, 1000, 2000, "hello"), (2, 3000, 4000, "2019")]
+
+
+def test_numeric_cue_in_middle_survives_roundtrip():
+    cues = [Cue(1, 1000, 2000, "avant"), Cue(2, 3000, 4000, "42"), Cue(3, 5000, 6000, "après")]
+    assert _fields(_roundtrip_srt(cues)) == [
+        (1, 1000, 2000, "avant"),
+        (2, 3000, 4000, "42"),
+        (3, 5000, 6000, "après"),
+    ]
+
+
+def test_numeric_text_in_vtt_without_cue_numbers():
+    content = "WEBVTT\n\n00:00:01.000 --> 00:00:02.000\n42\n\n00:00:03.000 --> 00:00:04.000\nx\n"
+    assert _fields(parse_cues(content)) == [(None, 1000, 2000, "42"), (None, 3000, 4000, "x")]
+
+
+def test_vtt_roundtrip_with_numeric_text():
+    buffer = io.StringIO()
+    write_vtt([Cue(None, 0, 1000, "7"), Cue(None, 1000, 2000, "8")], buffer)
+    assert [cue.text for cue in parse_cues(buffer.getvalue())] == ["7", "8"]
+
+
+def test_missing_blank_line_before_next_number():
+    content = "1\n00:00:01,000 --> 00:00:02,000\nun\n2\n00:00:03,000 --> 00:00:04,000\ndeux\n"
+    assert _fields(parse_cues(content)) == [(1, 1000, 2000, "un"), (2, 3000, 4000, "deux")]
+
+
+def test_bom_crlf_and_orphan_text():
+    content = "﻿1\r\n00:00:01,000 --> 00:00:02,000\r\nun\r\n\r\nsuite\r\n\r\n2\r\n00:00:03,000 --> 00:00:04,000\r\ndeux\r\n"
+    assert _fields(parse_cues(content)) == [(1, 1000, 2000, "un\nsuite"), (2, 3000, 4000, "deux")]
+
+
+def test_vtt_header_blocks_and_identifiers():
+    content = (
+        "WEBVTT\nKind: captions\n\nNOTE une remarque\nsur deux lignes\n\n"
+        "intro\n00:01.000 --> 00:02.000 align:start\nBonjour\n"
+    )
+    assert _fields(parse_cues(content)) == [(None, 1000, 2000, "Bonjour")]
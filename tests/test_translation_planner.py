@@ -0,0 +1,25 @@
+from translation_planner import plan_windows
+
+
+def unit_cost(text):
+    return 1
+
+
+def test_windows_follow_cue_order_with_gaps():
+    texts = ["a", "b", "c", "d", "e"]
+    windows = plan_windows(texts, [0, 2, 4], budget=2, cost=unit_cost, context_cues=2)
+    assert [w.indices for w in windows] == [[0, 2], [4]]
+    # Le contexte reprend les sous-titres réellement précédents, même déjà traduits
+    assert windows[1].context == [2, 3]
+
+
+def test_context_stops_at_file_start():
+    texts = ["a1", "a2", "b1", "b2"]
+    windows = plan_windows(texts, [3], budget=10, cost=unit_cost, context_cues=3, context_floor=2)
+    assert windows[0].context == [2]
+
+
+def test_context_skips_empty_cues():
+    texts = ["a", "", "b", "c"]
+    windows = plan_windows(texts, [3], budget=10, cost=unit_cost, context_cues=2)
+    assert windows[0].context == [0, 2]
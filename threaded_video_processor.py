@@ -10,15 +10,14 @@ import logging
 import shutil
 import threading
 import concurrent.futures
-from openai import OpenAI
 import time
 import queue
 
 from utils import progress_queue, command_queue, restore_std_redirects, enable_std_redirects
 from video_downloader import download_video, sanitize_filename, ensure_unique_path
-from audio_extractor import extract_audio, separate_audio
-from transcriber import transcribe_audio
-from translate import translate_srt_file, set_api_keys
+from audio_extractor import extract_audio, separate_audio, is_file_empty
+from transcriber import transcribe_single_pass, TranscriptionService
+from translate import translate_srt_files_multi, parse_target_languages, set_api_keys
 from utils import progress_queue, command_queue, restore_std_redirects, enable_std_redirects, format_whisper_model_name
 
 class ThreadedVideoProcessor:
@@ -44,12 +43,14 @@ class ThreadedVideoProcessor:
         
         # Verrou pour éviter les conflits d'accès
         self.lock = threading.Lock()
+        
+        # Service de transcription du traitement en cours
+        self.transcription_service = None
     
     def update_api_client(self):
         """Met à jour le client OpenAI avec la clé de l'utilisateur."""
-        self.client = OpenAI(api_key=self.config.openai_key)
-        # Mettre à jour aussi dans le module translate
-        set_api_keys(self.config.deepl_key, self.config.openai_key)
+        # Client partagé avec le module translate, réutilisé tant que la clé ne change pas
+        self.client = set_api_keys(self.config.deepl_key, self.config.openai_key)
     
     def process_video(self, url=None, video_path=None, target_language=None, translation_service=None, use_gpu=None):
         """
@@ -58,7 +59,7 @@ class ThreadedVideoProcessor:
         Args:
             url: URL de la vidéo à télécharger (facultatif)
             video_path: Chemin vers un fichier vidéo local (facultatif)
-            target_language: Langue cible pour la traduction
+            target_language: Langue cible, ou liste de langues cibles ("FR", ["FR", "DE"], "FR, DE")
             translation_service: Service de traduction à utiliser ('DeepL' ou 'ChatGPT')
             use_gpu: Indique s'il faut utiliser le GPU pour le traitement
             
@@ -153,16 +154,16 @@ class ThreadedVideoProcessor:
             
             return video_path, video_title
     
-    def _extract_audio_task(self, video_path, audio_path):
+    def _extract_audio_task(self, video_path, audio_path, mix_path):
         """Tâche d'extraction audio exécutée dans un thread."""
         self._update_progress(30, "Extraction de l'audio...")
-        extract_audio(video_path, audio_path)
+        extract_audio(video_path, audio_path, mix_path)
         return audio_path
     
-    def _separate_audio_task(self, audio_path, separated_folder, use_gpu):
+    def _separate_audio_task(self, mix_path, separated_folder, use_gpu):
         """Tâche de séparation audio exécutée dans un thread."""
         self._update_progress(40, "Séparation des pistes audio...")
-        separate_audio(audio_path, separated_folder, use_gpu=use_gpu)
+        separate_audio(mix_path, separated_folder, use_gpu=use_gpu)
         
         vocal_path = os.path.join(separated_folder, 'vocals.wav')
         accompaniment_path = os.path.join(separated_folder, 'accompaniment.wav')
@@ -186,23 +187,29 @@ class ThreadedVideoProcessor:
         logging.info(f"ℹ️ DEBUG: Modèle dans config: {self.config.whisper_model}")
         logging.info(f"ℹ️ DEBUG: Modèle après formatage: {model_name}")
         
-        transcribe_audio(audio_path, transcript_path, model_name=model_name, use_gpu=use_gpu)
+        # Le service partagé évite de charger une seconde copie du modèle
+        self.transcription_service.transcribe(audio_path, transcript_path, use_gpu=use_gpu)
         return f"{transcript_path}.srt"
     
-    def _translate_srt_task(self, srt_path, target_language, translation_service, is_vocal):
-        """Tâche de traduction exécutée dans un thread."""
-        if is_vocal:
-            self._update_progress(90, f"Traduction de la transcription vocale en {target_language}...")
-        else:
-            self._update_progress(80, f"Traduction de la transcription principale en {target_language}...")
-            
-        translated_path, translated_content = translate_srt_file(
-            srt_path, 
-            target_language, 
-            translation_service
+    def _transcribe_single_pass_task(self, audio_path, vocal_path, transcript_path, vocal_transcript_path, mode, use_gpu):
+        """Tâche de transcription unique : la transcription principale est dérivée de la vocale."""
+        self._update_progress(55, "Transcription unique de la piste vocale...")
+        vocal_ok = os.path.exists(vocal_path) and not is_file_empty(vocal_path)
+        transcribe_single_pass(
+            audio_path,
+            vocal_path if vocal_ok else None,
+            transcript_path,
+            vocal_transcript_path,
+            mode=mode,
+            service=self.transcription_service,
+            use_gpu=use_gpu
         )
-        
-        return translated_path, translated_content
+        return f"{transcript_path}.srt", f"{vocal_transcript_path}.srt"
+    
+    def _translate_srt_task(self, srt_paths, target_languages, translation_service):
+        """Tâche de traduction exécutée dans un thread (fichiers traduits ensemble, toutes langues en parallèle)."""
+        self._update_progress(80, f"Traduction des transcriptions en {', '.join(target_languages)}...")
+        return translate_srt_files_multi(srt_paths, target_languages, translation_service)
     
     def _process_video_thread(self, url, video_path, target_language, translation_service, use_gpu):
         """Fonction exécutée dans un thread séparé pour traiter la vidéo avec parallélisation."""
@@ -257,7 +264,9 @@ class ThreadedVideoProcessor:
                 shutil.copy(video_path, destination_video_path)
                 video_path = destination_video_path
 
-            audio_path = os.path.join(video_folder, f"{video_title}.mp3")
+            # Audio extrait en PCM : mono 16 kHz pour Whisper, stéréo 44.1 kHz pour Demucs
+            audio_path = os.path.join(video_folder, f"{video_title}.wav")
+            mix_path = os.path.join(video_folder, f"{video_title}_44k.wav")
             transcript_path = os.path.join(video_folder, video_title)
             vocal_transcript_path = os.path.join(video_folder, f"{video_title}_vocal")
             separated_folder = os.path.join(video_folder, "separated")
@@ -267,6 +276,7 @@ class ThreadedVideoProcessor:
 
             logging.info(f"Chemin de la vidéo : {video_path}")
             logging.info(f"Chemin de l'audio : {audio_path}")
+            logging.info(f"Chemin de l'audio à séparer : {mix_path}")
             logging.info(f"Chemin de la transcription : {transcript_path}")
             logging.info(f"Chemin de la transcription vocale : {vocal_transcript_path}")
             logging.info(f"Chemin des fichiers séparés : {separated_folder}")
@@ -274,13 +284,19 @@ class ThreadedVideoProcessor:
             if self._check_cancelled():
                 return
 
+            # Un seul modèle Whisper partagé par les transcriptions principale et vocale
+            self.transcription_service = TranscriptionService(
+                model_name=format_whisper_model_name(self.config.whisper_model)
+            )
+
             # Utiliser un ThreadPoolExecutor pour paralléliser les tâches
             with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
                 # Étape 3: Extraction audio (exécutée séquentiellement car nécessaire avant la séparation)
                 future_extract = executor.submit(
                     self._extract_audio_task, 
                     video_path, 
-                    audio_path
+                    audio_path,
+                    mix_path
                 )
                 
                 try:
@@ -290,26 +306,28 @@ class ThreadedVideoProcessor:
                     if self._check_cancelled():
                         return
                     
-                    if not os.path.exists(audio_path):
+                    if not os.path.exists(audio_path) or not os.path.exists(mix_path):
                         raise FileNotFoundError(f"Audio non trouvé à {audio_path}")
                     
                     # Soumettre les tâches en parallèle
                     # 1. Séparation audio
                     future_separate = executor.submit(
                         self._separate_audio_task,
-                        audio_path,
+                        mix_path,
                         separated_folder,
                         use_gpu
                     )
                     
-                    # 2. Transcription de l'audio principal
-                    future_transcribe_main = executor.submit(
-                        self._transcribe_audio_task,
-                        audio_path,
-                        transcript_path,
-                        False,
-                        use_gpu
-                    )
+                    # 2. Transcription de l'audio principal (mode double uniquement)
+                    mode = self.config.transcription_mode
+                    if mode == "dual":
+                        future_transcribe_main = executor.submit(
+                            self._transcribe_audio_task,
+                            audio_path,
+                            transcript_path,
+                            False,
+                            use_gpu
+                        )
                     
                     # Attendre la séparation audio
                     vocal_path, _ = future_separate.result()
@@ -317,65 +335,76 @@ class ThreadedVideoProcessor:
                     if self._check_cancelled():
                         return
                     
-                    # 3. Transcription de la piste vocale (démarre après séparation)
-                    future_transcribe_vocal = executor.submit(
-                        self._transcribe_audio_task,
-                        vocal_path,
-                        vocal_transcript_path,
-                        True,
-                        use_gpu
-                    )
-                    
-                    # Attendre la transcription principale
-                    main_srt_path = future_transcribe_main.result()
+                    if mode == "dual":
+                        # 3. Transcription de la piste vocale (démarre après séparation)
+                        future_transcribe_vocal = executor.submit(
+                            self._transcribe_audio_task,
+                            vocal_path,
+                            vocal_transcript_path,
+                            True,
+                            use_gpu
+                        )
+                        
+                        # Attendre la transcription principale
+                        main_srt_path = future_transcribe_main.result()
+                    else:
+                        # 3. Une seule transcription complète, la seconde en est dérivée
+                        main_srt_path, _ = self._transcribe_single_pass_task(
+                            audio_path, vocal_path, transcript_path, vocal_transcript_path, mode, use_gpu
+                        )
+                        future_transcribe_vocal = None
                     
                     if self._check_cancelled():
                         return
                     
-                    # 4. Traduction de la transcription principale
-                    future_translate_main = executor.submit(
-                        self._translate_srt_task,
-                        main_srt_path,
-                        target_language,
-                        translation_service,
-                        False
-                    )
-                    
                     # Attendre la transcription vocale
-                    vocal_srt_path = future_transcribe_vocal.result()
+                    if future_transcribe_vocal is not None:
+                        vocal_srt_path = future_transcribe_vocal.result()
+                    else:
+                        vocal_srt_path = f"{vocal_transcript_path}.srt"
                     
                     if self._check_cancelled():
                         return
                     
-                    # 5. Traduction de la transcription vocale
-                    future_translate_vocal = executor.submit(
+                    # 4. Traduction des transcriptions principale et vocale en une passe :
+                    # les segments communs aux deux fichiers ne sont traduits qu'une fois
+                    # (la vocale est identique à la principale en mode 'single')
+                    srt_paths = [main_srt_path] if mode == "single" else [main_srt_path, vocal_srt_path]
+                    target_languages = parse_target_languages(target_language)
+                    future_translate = executor.submit(
                         self._translate_srt_task,
-                        vocal_srt_path,
-                        target_language,
-                        translation_service,
-                        True
+                        srt_paths,
+                        target_languages,
+                        translation_service
                     )
                     
                     # Attendre les traductions et enregistrer les résultats
-                    _, main_translated_content = future_translate_main.result()
-                    
-                    final_translated_path = os.path.join(video_folder, f"{target_language}_{video_title}_{target_language}.srt")
-                    with open(final_translated_path, 'w', encoding='utf-8') as f:
-                        f.write(main_translated_content)
-                    
-                    logging.info(f"Transcription traduite enregistrée: {final_translated_path}")
+                    translations_by_language = future_translate.result()
                     
                     if self._check_cancelled():
                         return
                     
-                    # Sauvegarder la traduction vocale
-                    _, vocal_translated_content = future_translate_vocal.result()
-                    
-                    final_vocal_translated_path = os.path.join(video_folder, f"{target_language}_{video_title}_vocal_{target_language}.srt")
-                    with open(final_vocal_translated_path, 'w', encoding='utf-8') as f:
-                        f.write(vocal_translated_content)
-                    
-                    logging.info(f"Transcription vocale traduite enregistrée: {final_vocal_translated_path}")
+                    for lang in target_languages:
+                        translations = translations_by_language[lang]
+                        main_translated_content = translations[0][1]
+                        
+                        final_translated_path = os.path.join(video_folder, f"{lang}_{video_title}_{lang}.srt")
+                        with open(final_translated_path, 'w', encoding='utf-8') as f:
+                            f.write(main_translated_content)
+                        
+                        logging.info(f"Transcription traduite enregistrée: {final_translated_path}")
+                        
+                        # Sauvegarder la traduction vocale
+                        if len(translations) > 1:
+                            vocal_translated_content = translations[1][1]
+                        else:
+                            vocal_translated_content = main_translated_content
+                        
+                        final_vocal_translated_path = os.path.join(video_folder, f"{lang}_{video_title}_vocal_{lang}.srt")
+                        with open(final_vocal_translated_path, 'w', encoding='utf-8') as f:
+                            f.write(vocal_translated_content)
+                        
+                        logging.info(f"Transcription vocale traduite enregistrée: {final_vocal_translated_path}")
                     
                 except concurrent.futures.CancelledError:
                     logging.warning("Une ou plusieurs tâches ont été annulées")
@@ -393,6 +422,9 @@ class ThreadedVideoProcessor:
             # Signal d'erreur
             command_queue.put({"command": "error", "message": str(e)})
         finally:
+            if self.transcription_service is not None:
+                self.transcription_service.close()
+                self.transcription_service = None
             # S'assurer que la redirection est restaurée
             enable_std_redirects()
     
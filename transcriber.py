@@ -1,9 +1,18 @@
+import abc
 import importlib
+import contextlib
 import json
 import csv
+import os
+import shutil
+import subprocess
+import threading
+import time
+import concurrent.futures
+import numpy as np
 import torch
 import logging
-from typing import Dict, Optional
+from typing import ContextManager, Dict, Generator, Iterator, List, Optional, Tuple
 
 # === Patch robust pour hook_attention_weights ===
 ts_transcribe = importlib.import_module("whisper_timestamped.transcribe")
@@ -33,6 +42,9 @@ if _orig_hook is None:
 
 import whisper_timestamped as whisper
 from utils import progress_queue, config
+from model_registry import ModelRegistry
+from transcription_cache import TranscriptionCache, hash_audio_blocks
+from subtitle_io import Cue, format_timestamp, srt_block, vtt_block, write_srt, write_vtt
 
 # Afficher les logs Whisper pour voir le verbose
 logging.basicConfig(level=logging.INFO)
@@ -40,46 +52,125 @@ logging.getLogger("huggingface_hub").setLevel(logging.ERROR)
 logging.getLogger("whisper_timestamped").setLevel(logging.INFO)
 
 
+def _load_whisper_model(model_name: str, device: str, precision: str):
+    # La précision détermine le moteur (fp32/fp16/int8 torch, ct2-* CTranslate2)
+    return _backend_for_precision(precision).load_model(model_name, device, precision)
+
+
+# Registre partagé : un même modèle n'est chargé qu'une fois pour tout le lot de vidéos
+whisper_models = ModelRegistry(
+    _load_whisper_model,
+    max_models=config.model_cache_size,
+    memory_budget_mb=config.model_memory_budget_mb,
+    name="modèles Whisper",
+)
+
+
+# Cache des résultats : une vidéo déjà transcrite avec les mêmes paramètres n'est pas retranscrite
+transcription_cache = TranscriptionCache(
+    config.transcription_cache_dir,
+    max_size_mb=config.transcription_cache_max_mb,
+)
+
+
+def get_cache_stats() -> Dict:
+    """Statistiques du cache de transcriptions."""
+    return transcription_cache.stats()
+
+
+def _default_device() -> str:
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def preload_model(model_name: Optional[str] = None, device: Optional[str] = None, backend: Optional[str] = None) -> None:
+    """Charge un modèle Whisper dans le registre avant le traitement d'un lot."""
+    engine = get_backend(backend)
+    device = engine.resolve_device(device or _default_device())
+    whisper_models.preload(model_name or config.whisper_model, device, engine.precision(device))
+
+
+def unload_model(model_name: Optional[str] = None, device: Optional[str] = None, force: bool = False) -> int:
+    """Décharge un modèle Whisper (ou tous si aucun nom n'est donné) du registre."""
+    return whisper_models.unload(model_name, device, force=force)
+
+
+def get_model_stats() -> List[Dict]:
+    """Temps de chargement et taille résidente de chaque modèle en cache."""
+    return whisper_models.stats()
+
+
 def _fmt_time(sec: float) -> str:
-    ms = int((sec - int(sec)) * 1000)
-    total = int(sec)
-    s = total % 60
-    m = (total // 60) % 60
-    h = total // 3600
-    return f"{h:02}:{m:02}:{s:02},{ms:03}"
+    return format_timestamp(int(round(sec * 1000)))
+
+
+def _segment_cue(seg: Dict) -> Cue:
+    return Cue.from_seconds(seg["start"], seg["end"], seg.get("text", "").strip())
 
 
 def _write_all_outputs(result: Dict, base: str) -> None:
     try:
         with open(f"{base}.json", "w", encoding="utf-8") as f:
             json.dump(result, f, ensure_ascii=False, indent=2)
+        cues = [_segment_cue(seg) for seg in result.get("segments", [])]
         with open(f"{base}.srt", "w", encoding="utf-8") as srt:
-            for i, seg in enumerate(result.get("segments", []), start=1):
-                s, e = _fmt_time(seg["start"]), _fmt_time(seg["end"])
-                txt = seg.get("text", "").strip()
-                srt.write(f"{i}\n{s} --> {e}\n{txt}\n\n")
+            write_srt(cues, srt)
         with open(f"{base}.vtt", "w", encoding="utf-8") as vtt:
-            vtt.write("WEBVTT\n\n")
-            for seg in result.get("segments", []):
-                s = _fmt_time(seg["start"]).replace(",", ".")
-                e = _fmt_time(seg["end"]).replace(",", ".")
-                txt = seg.get("text", "").strip()
-                vtt.write(f"{s} --> {e}\n{txt}\n\n")
+            write_vtt(cues, vtt)
         for sep, ext in [(",", "csv"), ("\t", "tsv")]:
             with open(f"{base}.{ext}", "w", encoding="utf-8", newline="") as f:
                 w = csv.writer(f, delimiter=sep)
                 w.writerow(["start", "end", "text"])
-                for seg in result.get("segments", []):
-                    w.writerow([_fmt_time(seg["start"]), _fmt_time(seg["end"]), seg.get("text","").strip()])
+                for cue in cues:
+                    w.writerow([format_timestamp(cue.start), format_timestamp(cue.end), cue.text])
     except Exception as e:
         logging.error(f"Erreur lors de l'écriture des fichiers: {e}")
         raise
 
 
-def run_transcription(
-    audio_path: str,
-    base_name: str,
-    model_name: Optional[str] = None,
+class _StreamingOutputWriter:
+    """Écrit les segments au fil de l'eau dans les mêmes fichiers que _write_all_outputs."""
+
+    def __init__(self, base: str):
+        self.base = base
+        self.language = None
+        self.count = 0
+        self._json = open(f"{base}.json", "w", encoding="utf-8")
+        self._srt = open(f"{base}.srt", "w", encoding="utf-8")
+        self._vtt = open(f"{base}.vtt", "w", encoding="utf-8")
+        self._tables = []
+        for sep, ext in [(",", "csv"), ("\t", "tsv")]:
+            f = open(f"{base}.{ext}", "w", encoding="utf-8", newline="")
+            w = csv.writer(f, delimiter=sep)
+            w.writerow(["start", "end", "text"])
+            self._tables.append((f, w))
+        self._json.write('{\n  "segments": [')
+        self._vtt.write("WEBVTT\n\n")
+
+    def write_segment(self, seg: Dict) -> None:
+        self.count += 1
+        cue = _segment_cue(seg)
+        self._json.write(("\n    " if self.count == 1 else ",\n    ") + json.dumps(seg, ensure_ascii=False))
+        self._srt.write(srt_block(self.count, cue))
+        self._vtt.write(vtt_block(cue))
+        for _, w in self._tables:
+            w.writerow([format_timestamp(cue.start), format_timestamp(cue.end), cue.text])
+        # Rendre la progression visible sur disque sans attendre la fin
+        for f in (self._json, self._srt, self._vtt):
+            f.flush()
+
+    def close(self) -> None:
+        self._json.write(f'\n  ],\n  "language": {json.dumps(self.language)}\n}}\n')
+        for f in [self._json, self._srt, self._vtt] + [f for f, _ in self._tables]:
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _build_params(
     accurate: bool = False,
     vad_method: str = "silero:v3.1",
     language: Optional[str] = None,
@@ -114,30 +205,811 @@ def run_transcription(
     kwargs.pop("punctuations_with_words", None)
     params = {k: v for k, v in defaults.items() if v is not None}
     params.update(kwargs)
+    return params
 
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model_to_load = model_name or config.whisper_model
-    logging.info(f"Chargement du modèle {model_to_load} sur {device}")
-    progress_queue.put({"value": 20, "status_text": f"Transcription sur {device}..."})
-    model = whisper.load_model(model_to_load, device=device)
 
+def _transcribe_with_model(model, audio, params: Dict, backend: Optional["TranscriptionBackend"] = None) -> Dict:
+    if backend is not None and not isinstance(backend, WhisperTimestampedBackend):
+        return backend.transcribe(model, audio, params)
     try:
-        result = whisper.transcribe(model, audio_path, **params)
+        return whisper.transcribe(model, audio, **params)
     except AssertionError as ae:
         logging.warning("Timestamped failed (%s), fallback transcription.", ae)
         basic = model.transcribe(
-            audio_path,
-            language=language,
+            audio,
+            language=params.get("language"),
             beam_size=params.get("beam_size"),
             best_of=params.get("best_of"),
             temperature=params.get("temperature")
         )
-        result = {"language": basic["language"], "segments": basic["segments"]}
+        return {"language": basic["language"], "segments": basic["segments"]}
+
+
+# === Moteurs de transcription ===
+
+class TranscriptionBackend(abc.ABC):
+    """
+    Interface d'un moteur de transcription.
+
+    Chaque moteur produit le même format de résultat que whisper_timestamped
+    ({"language", "segments": [{"id", "start", "end", "text", "words": [...]}]})
+    afin que _write_all_outputs et la traduction fonctionnent à l'identique.
+    """
+
+    name = None
+
+    def resolve_device(self, device: str) -> str:
+        return device
+
+    @abc.abstractmethod
+    def precision(self, device: str) -> str:
+        """Précision du modèle chargé sur `device` (clé du registre de modèles)."""
+
+    @abc.abstractmethod
+    def load_model(self, model_name: str, device: str, precision: str):
+        """Charge le modèle (appelé par le registre, une fois par clé)."""
+
+    @abc.abstractmethod
+    def transcribe(self, model, audio, params: Dict) -> Dict:
+        """Transcrit un signal mono 16 kHz avec les paramètres de _build_params."""
+
+    @abc.abstractmethod
+    def detect_language(self, model, audio) -> str:
+        """Code de la langue parlée au début du signal."""
+
+
+class WhisperTimestampedBackend(TranscriptionBackend):
+    """Moteur historique : Whisper PyTorch + whisper_timestamped."""
+
+    name = "whisper_timestamped"
+
+    def precision(self, device: str) -> str:
+        return "fp32"
+
+    def load_model(self, model_name: str, device: str, precision: str):
+        model = whisper.load_model(model_name, device=device)
+        if precision == "fp16" and device == "cuda":
+            model = model.half()
+        return model
+
+    def transcribe(self, model, audio, params: Dict) -> Dict:
+        return _transcribe_with_model(model, audio, params)
+
+    def detect_language(self, model, audio) -> str:
+        # Même détection que Whisper : spectrogramme des 30 premières secondes
+        from whisper import log_mel_spectrogram, pad_or_trim
+
+        mel = log_mel_spectrogram(pad_or_trim(np.asarray(audio, dtype=np.float32)), model.dims.n_mels)
+        _, probs = model.detect_language(mel.to(model.device, dtype=next(model.parameters()).dtype))
+        return max(probs, key=probs.get)
+
+
+class QuantizedWhisperBackend(WhisperTimestampedBackend):
+    """Whisper PyTorch avec quantification dynamique int8 des couches linéaires (CPU uniquement)."""
+
+    name = "int8"
+
+    def resolve_device(self, device: str) -> str:
+        if device != "cpu":
+            logging.warning("La quantification int8 dynamique n'est disponible que sur CPU")
+        return "cpu"
+
+    def precision(self, device: str) -> str:
+        return "int8"
+
+    def load_model(self, model_name: str, device: str, precision: str):
+        model = whisper.load_model(model_name, device="cpu")
+        # Les Linear de Whisper sont une sous-classe que quantize_dynamic ne reconnaît pas ;
+        # sur CPU en fp32 leur forward est identique à celui de torch.nn.Linear.
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear):
+                module.__class__ = torch.nn.Linear
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class CTranslate2Backend(TranscriptionBackend):
+    """Moteur CTranslate2 (faster-whisper), quantifié int8 sur CPU."""
+
+    name = "ctranslate2"
+
+    def precision(self, device: str) -> str:
+        return "ct2-int8" if device == "cpu" else "ct2-float16"
+
+    def load_model(self, model_name: str, device: str, precision: str):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError("Le moteur 'ctranslate2' nécessite le paquet faster-whisper") from e
+        compute_type = precision.split("-", 1)[1]
+        return WhisperModel(
+            model_name.replace("openai/whisper-", ""),
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=config.transcription_threads or 0
+        )
+
+    def transcribe(self, model, audio, params: Dict) -> Dict:
+        segments, info = model.transcribe(
+            audio,
+            language=params.get("language"),
+            task=params.get("task", "transcribe"),
+            beam_size=params.get("beam_size") or 1,
+            best_of=params.get("best_of") or 1,
+            temperature=list(params.get("temperature", (0.0,))),
+            compression_ratio_threshold=params.get("compression_ratio_threshold"),
+            log_prob_threshold=params.get("logprob_threshold"),
+            no_speech_threshold=params.get("no_speech_threshold"),
+            condition_on_previous_text=params.get("condition_on_previous_text", True),
+            initial_prompt=params.get("initial_prompt"),
+            vad_filter=bool(params.get("vad")),
+            word_timestamps=True
+        )
+        result_segments = []
+        for seg in segments:
+            words = [
+                {
+                    "text": w.word.strip(),
+                    "start": round(w.start, 3),
+                    "end": round(w.end, 3),
+                    "confidence": round(w.probability, 3),
+                }
+                for w in (seg.words or [])
+            ]
+            result_segments.append({
+                "id": len(result_segments),
+                "start": round(seg.start, 3),
+                "end": round(seg.end, 3),
+                "text": seg.text,
+                "confidence": round(sum(w["confidence"] for w in words) / len(words), 3) if words else None,
+                "no_speech_prob": seg.no_speech_prob,
+                "words": words,
+            })
+        return {
+            "language": info.language,
+            "text": "".join(seg["text"] for seg in result_segments),
+            "segments": result_segments,
+        }
+
+    def detect_language(self, model, audio) -> str:
+        # La langue est détectée dès l'appel ; les segments (générateur) ne sont pas décodés
+        _, info = model.transcribe(audio[:30 * STREAM_SAMPLE_RATE], beam_size=1)
+        return info.language
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (WhisperTimestampedBackend(), QuantizedWhisperBackend(), CTranslate2Backend())
+}
+
+
+def get_backend(name: Optional[str] = None) -> TranscriptionBackend:
+    """Moteur de transcription par nom (config.transcription_backend par défaut)."""
+    name = name or config.transcription_backend
+    if name not in BACKENDS:
+        raise ValueError(f"Moteur de transcription inconnu: {name} (disponibles: {', '.join(BACKENDS)})")
+    return BACKENDS[name]
+
+
+def _backend_for_precision(precision: str) -> TranscriptionBackend:
+    if precision.startswith("ct2-"):
+        return BACKENDS["ctranslate2"]
+    if precision == "int8":
+        return BACKENDS["int8"]
+    return BACKENDS["whisper_timestamped"]
+
+
+STREAM_SAMPLE_RATE = 16000
+_PROMPT_CHARS = 200
+
+
+def _probe_duration(audio_path: str) -> Optional[float]:
+    """Durée du fichier en secondes via ffprobe (None si indisponible)."""
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", audio_path],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        return float(out)
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+
+
+def _iter_pcm_blocks(audio_path: str, block_sec: float = 30.0) -> Iterator[np.ndarray]:
+    """Décode le fichier en PCM float32 mono 16 kHz par blocs via un pipe ffmpeg."""
+    block_bytes = int(block_sec * STREAM_SAMPLE_RATE) * 4
+    process = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-v", "error", "-i", audio_path,
+         "-f", "f32le", "-ac", "1", "-ar", str(STREAM_SAMPLE_RATE), "-"],
+        stdout=subprocess.PIPE
+    )
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) - len(data) % 4], dtype=np.float32)
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+def _find_silence_cut(samples: np.ndarray, search_start: int, frame: int = 400) -> int:
+    """Index de l'échantillon le plus silencieux après search_start (énergie lissée par trame)."""
+    region = samples[search_start:]
+    n_frames = len(region) // frame
+    if n_frames < 2:
+        return len(samples)
+    energy = np.square(region[:n_frames * frame].reshape(n_frames, frame)).mean(axis=1)
+    smooth = min(8, n_frames)
+    energy = np.convolve(energy, np.ones(smooth) / smooth, mode="same")
+    return search_start + int(np.argmin(energy)) * frame + frame // 2
+
+
+def _iter_audio_windows(
+    audio_path: str,
+    window_sec: float,
+    search_sec: float = 30.0
+) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    Découpe l'audio en fenêtres d'environ window_sec secondes, coupées sur un silence.
+
+    Seule la fenêtre courante est en mémoire : la consommation ne dépend pas de
+    la durée de la vidéo.
+
+    Yields:
+        (décalage en secondes, échantillons de la fenêtre)
+    """
+    window = int(window_sec * STREAM_SAMPLE_RATE)
+    search = min(int(search_sec * STREAM_SAMPLE_RATE), window // 2)
+    buffer = np.empty(0, dtype=np.float32)
+    offset = 0
+    for block in _iter_pcm_blocks(audio_path):
+        buffer = np.concatenate([buffer, block])
+        while len(buffer) >= window:
+            cut = _find_silence_cut(buffer[:window], window - search)
+            yield offset / STREAM_SAMPLE_RATE, buffer[:cut].copy()
+            buffer = buffer[cut:].copy()
+            offset += cut
+    if len(buffer):
+        yield offset / STREAM_SAMPLE_RATE, buffer
+
+
+def _shift_segment(seg: Dict, offset: float, seg_id: int) -> Dict:
+    """Décale les horodatages d'un segment (et de ses mots) dans la timeline globale."""
+    seg = dict(seg)
+    seg["id"] = seg_id
+    seg["start"] = round(seg["start"] + offset, 3)
+    seg["end"] = round(seg["end"] + offset, 3)
+    if seg.get("words"):
+        seg["words"] = [
+            dict(w, start=round(w["start"] + offset, 3), end=round(w["end"] + offset, 3))
+            for w in seg["words"]
+        ]
+    # Les tokens n'ont de sens que relativement à la fenêtre d'origine
+    seg.pop("tokens", None)
+    return seg
+
+
+def _stream_segments(
+    model,
+    audio_path: str,
+    base_name: str,
+    params: Dict,
+    window_sec: Optional[float] = None,
+    inference_lock: Optional[ContextManager] = None,
+    backend: Optional[TranscriptionBackend] = None
+) -> Generator[Dict, None, Optional[str]]:
+    """Transcrit et écrit les segments fenêtre par fenêtre ; retourne la langue (imposée ou détectée)."""
+    params = dict(params)
+    window_sec = window_sec or config.streaming_window_sec
+    prompt = None
+    seg_id = 0
+    with _StreamingOutputWriter(base_name) as writer:
+        writer.language = params.get("language")
+        for offset, window in _iter_audio_windows(audio_path, window_sec):
+            window_params = dict(params)
+            if prompt:
+                # Contexte reporté depuis la fenêtre précédente
+                window_params["initial_prompt"] = prompt
+            with inference_lock or contextlib.nullcontext():
+                result = _transcribe_with_model(model, window, window_params, backend)
+            del window
+            if not params.get("language"):
+                # La langue détectée sur la première fenêtre est imposée aux suivantes
+                params["language"] = writer.language = result.get("language")
+            texts = []
+            for seg in result.get("segments", []):
+                seg = _shift_segment(seg, offset, seg_id)
+                seg_id += 1
+                writer.write_segment(seg)
+                texts.append(seg.get("text", "").strip())
+                yield seg
+            if texts:
+                prompt = " ".join(texts)[-_PROMPT_CHARS:]
+            logging.info(f"Fenêtre transcrite: {_fmt_time(offset)} ({seg_id} segments au total)")
+    return writer.language
+
+
+def _drain_stream(segments: Generator[Dict, None, Optional[str]]) -> Dict:
+    """Consomme _stream_segments : résultat réduit à la langue et au nombre de segments écrits."""
+    count = 0
+    while True:
+        try:
+            next(segments)
+        except StopIteration as stop:
+            return {"language": stop.value, "segments": [], "num_segments": count}
+        count += 1
+
+
+def _should_stream(audio_path: str, streaming: Optional[bool]) -> bool:
+    if streaming is not None:
+        return streaming
+    duration = _probe_duration(audio_path)
+    return duration is not None and duration >= config.streaming_min_duration
+
+
+def _model_key(model_name: str, backend: TranscriptionBackend) -> str:
+    """Identifiant du modèle pour le cache : deux moteurs ne donnent pas le même résultat."""
+    return f"{model_name}@{backend.name}"
+
+
+def _cache_key(audio_path: str, model_name: str, params: Dict) -> str:
+    """Clé de cache : empreinte des échantillons décodés + modèle + paramètres."""
+    return TranscriptionCache.make_key(hash_audio_blocks(_iter_pcm_blocks(audio_path)), model_name, params)
+
+
+def _cache_lookup(audio_path: str, base_name: str, model_name: str, params: Dict, use_cache: Optional[bool]):
+    """
+    Cherche la transcription dans le cache et réécrit les sorties en cas de succès.
+
+    Returns:
+        (résultat ou None, clé à utiliser pour enregistrer le résultat ou None)
+    """
+    if use_cache is None:
+        use_cache = config.use_transcription_cache
+    if not use_cache:
+        return None, None
+    start = time.perf_counter()
+    key = _cache_key(audio_path, model_name, params)
+    result = transcription_cache.get(key)
+    if result is not None:
+        logging.info(f"Transcription trouvée dans le cache en {(time.perf_counter() - start) * 1000:.0f} ms")
+        _write_all_outputs(result, base_name)
+    return result, key
+
+
+def transcribe_streaming(
+    audio_path: str,
+    base_name: str,
+    model_name: Optional[str] = None,
+    accurate: bool = False,
+    vad_method: str = "silero:v3.1",
+    language: Optional[str] = None,
+    window_sec: Optional[float] = None,
+    backend: Optional[str] = None,
+    **kwargs
+) -> Generator[Dict, None, Optional[str]]:
+    """
+    Transcrit un long fichier fenêtre par fenêtre et produit les segments au fur et à mesure.
+
+    Les fichiers .json/.srt/.vtt/.csv/.tsv sont complétés à chaque segment ; la
+    mémoire utilisée est bornée par la taille d'une fenêtre. La valeur de retour
+    du générateur est la langue imposée ou détectée.
+    """
+    params = _build_params(accurate=accurate, vad_method=vad_method, language=language, **kwargs)
+    engine = get_backend(backend)
+    device = engine.resolve_device(_default_device())
+    model_to_load = model_name or config.whisper_model
+    with whisper_models.lease(model_to_load, device, engine.precision(device)) as model:
+        return (yield from _stream_segments(model, audio_path, base_name, params, window_sec, backend=engine))
+
+
+def run_transcription(
+    audio_path: str,
+    base_name: str,
+    model_name: Optional[str] = None,
+    accurate: bool = False,
+    vad_method: str = "silero:v3.1",
+    language: Optional[str] = None,
+    streaming: Optional[bool] = None,
+    use_cache: Optional[bool] = None,
+    backend: Optional[str] = None,
+    **kwargs
+) -> Dict:
+    """
+    Transcrit un fichier audio et écrit les sorties base.{json,srt,vtt,csv,tsv}.
+
+    En mode streaming (forcé, ou automatique au-delà de config.streaming_min_duration),
+    les segments ne sont pas conservés : le résultat ne contient que la langue et
+    le nombre de segments écrits. Le cache de résultats n'est utilisé que hors
+    streaming ; use_cache=False le contourne pour ce fichier. `backend` choisit
+    le moteur (config.transcription_backend par défaut).
+    """
+    params = _build_params(accurate=accurate, vad_method=vad_method, language=language, **kwargs)
+
+    engine = get_backend(backend)
+    device = engine.resolve_device(_default_device())
+    precision = engine.precision(device)
+    model_to_load = model_name or config.whisper_model
+    logging.info(f"Chargement du modèle {model_to_load} sur {device} (moteur {engine.name})")
+    progress_queue.put({"value": 20, "status_text": f"Transcription sur {device}..."})
+
+    if _should_stream(audio_path, streaming):
+        logging.info("Transcription en continu par fenêtres (fichier long)")
+        with whisper_models.lease(model_to_load, device, precision) as model:
+            return _drain_stream(_stream_segments(model, audio_path, base_name, params, backend=engine))
+
+    result, cache_key = _cache_lookup(audio_path, base_name, _model_key(model_to_load, engine), params, use_cache)
+    if result is not None:
+        return result
+
+    with whisper_models.lease(model_to_load, device, precision) as model:
+        result = _transcribe_with_model(model, audio_path, params, engine)
 
     _write_all_outputs(result, base_name)
+    if cache_key:
+        transcription_cache.put(cache_key, result)
+    return result
+
+
+def _transcribe_regions(
+    model,
+    backend: TranscriptionBackend,
+    audio: np.ndarray,
+    regions: List[Tuple[float, float]],
+    params: Dict,
+    inference_lock: Optional[ContextManager] = None
+) -> List[List[Dict]]:
+    """Transcrit des extraits (début, fin en secondes) ; segments en temps global pour chaque extrait."""
+    params = dict(params, verbose=False)
+    outputs = []
+    for start, end in regions:
+        chunk = audio[int(start * STREAM_SAMPLE_RATE):int(end * STREAM_SAMPLE_RATE)]
+        with inference_lock or contextlib.nullcontext():
+            result = _transcribe_with_model(model, chunk, params, backend)
+        outputs.append([_shift_segment(seg, start, seg.get("id", 0)) for seg in result.get("segments", [])])
+    return outputs
+
+
+class _InferenceLane:
+    """
+    Voie d'inférence unique : verrou et nombre de threads torch.
+
+    Le nombre de threads est global au processus ; il n'est modifié que
+    verrou tenu, donc jamais par deux transcriptions à la fois.
+    """
+
+    def __init__(self, num_threads: int, device: str):
+        self.num_threads = num_threads
+        self.device = device
+        self._lock = threading.Lock()
+        self._previous_threads = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self.device == "cpu":
+            self._previous_threads = torch.get_num_threads()
+            torch.set_num_threads(self.num_threads)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._previous_threads is not None:
+                torch.set_num_threads(self._previous_threads)
+                self._previous_threads = None
+        finally:
+            self._lock.release()
+
+
+class TranscriptionService:
+    """
+    Service de transcription possédant une seule instance du modèle Whisper.
+
+    Plusieurs fichiers audio peuvent être soumis en parallèle : le décodage audio
+    (ffmpeg) et l'écriture des sorties se font en concurrence, tandis que
+    l'inférence passe par une voie unique sérialisée qui dispose de tous les
+    threads torch alloués. On évite ainsi deux copies du modèle en RAM et deux
+    inférences qui se disputent les mêmes cœurs.
+
+    Sur CPU avec config.transcription_shards > 1, chaque fichier est transcrit
+    par run_parallel_transcription (un modèle par processus), un fichier à la
+    fois dans la même voie.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        device: Optional[str] = None,
+        backend: Optional[str] = None,
+        num_threads: Optional[int] = None,
+        max_pending: int = 2
+    ):
+        """
+        Initialise le service.
+
+        Args:
+            model_name: Modèle Whisper à utiliser (config.whisper_model par défaut)
+            device: 'cuda' ou 'cpu' (détection automatique par défaut)
+            backend: Moteur de transcription (config.transcription_backend par défaut)
+            num_threads: Threads torch réservés à l'inférence (config.transcription_threads par défaut,
+                sinon les cœurs moins un par fichier décodé en parallèle)
+            max_pending: Nombre de fichiers décodés en parallèle
+        """
+        self.model_name = model_name or config.whisper_model
+        self.backend = get_backend(backend)
+        self.device = self.backend.resolve_device(device or _default_device())
+        self.precision = self.backend.precision(self.device)
+        # Un cœur laissé à chaque décodage ffmpeg qui se superpose à l'inférence
+        self.num_threads = num_threads or config.transcription_threads or max(1, (os.cpu_count() or 1) - max_pending)
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._inference_lane = _InferenceLane(self.num_threads, self.device)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_pending, thread_name_prefix="transcription"
+        )
+
+    def _get_model(self):
+        with self._model_lock:
+            if self._model is None:
+                logging.info(f"Chargement du modèle {self.model_name} sur {self.device}")
+                self._model = whisper_models.acquire(self.model_name, self.device, self.precision)
+            return self._model
+
+    def submit(self, audio_path: str, base_name: str, **kwargs) -> concurrent.futures.Future:
+        """Soumet un fichier audio ; retourne un Future contenant le résultat."""
+        return self._executor.submit(self.transcribe, audio_path, base_name, **kwargs)
+
+    def transcribe(
+        self,
+        audio_path: str,
+        base_name: str,
+        accurate: bool = False,
+        vad_method: str = "silero:v3.1",
+        language: Optional[str] = None,
+        streaming: Optional[bool] = None,
+        use_cache: Optional[bool] = None,
+        **kwargs
+    ) -> Dict:
+        """Transcrit un fichier audio via la voie d'inférence partagée."""
+        shards = kwargs.pop("shards", None) or config.transcription_shards
+        threads_per_shard = kwargs.pop("threads_per_shard", None)
+        if shards and shards > 1 and self.device == "cpu":
+            # Les shards occupent déjà les cœurs : pas d'autre inférence en même temps
+            with self._inference_lane:
+                return run_parallel_transcription(
+                    audio_path, base_name, model_name=self.model_name, shards=shards,
+                    threads_per_shard=threads_per_shard, accurate=accurate, vad_method=vad_method,
+                    language=language, use_cache=use_cache, backend=self.backend.name, **kwargs
+                )
+
+        params = _build_params(accurate=accurate, vad_method=vad_method, language=language, **kwargs)
+
+        if _should_stream(audio_path, streaming):
+            model = self._get_model()
+            # Verrou pris par fenêtre : un autre fichier peut s'intercaler entre deux fenêtres
+            return _drain_stream(_stream_segments(model, audio_path, base_name, params,
+                                                  inference_lock=self._inference_lane, backend=self.backend))
+
+        result, cache_key = _cache_lookup(
+            audio_path, base_name, _model_key(self.model_name, self.backend), params, use_cache
+        )
+        if result is not None:
+            return result
+        model = self._get_model()
+
+        # Décodage hors du verrou : il se superpose à l'inférence d'un autre fichier
+        audio = whisper.load_audio(audio_path)
+
+        with self._inference_lane:
+            progress_queue.put({"value": 20, "status_text": f"Transcription sur {self.device}..."})
+            result = _transcribe_with_model(model, audio, params, self.backend)
+
+        del audio
+        _write_all_outputs(result, base_name)
+        if cache_key:
+            transcription_cache.put(cache_key, result)
+        return result
+
+    def transcribe_regions(
+        self,
+        audio_path: str,
+        regions: List[Tuple[float, float]],
+        accurate: bool = False,
+        vad_method: str = "silero:v3.1",
+        language: Optional[str] = None,
+        **kwargs
+    ) -> List[List[Dict]]:
+        """Transcrit uniquement certaines zones d'un fichier, via la voie d'inférence partagée."""
+        params = _build_params(accurate=accurate, vad_method=vad_method, language=language, **kwargs)
+        model = self._get_model()
+        audio = whisper.load_audio(audio_path)
+        return _transcribe_regions(model, self.backend, audio, regions, params, self._inference_lane)
+
+    def close(self) -> None:
+        """Attend les transcriptions en cours et rend le modèle au registre."""
+        self._executor.shutdown(wait=True)
+        with self._model_lock:
+            if self._model is not None:
+                self._model = None
+                whisper_models.release(self.model_name, self.device, self.precision)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# === Transcription parallèle multi-processus ===
+
+_shard_model = None
+_shard_backend = None
+
+
+def _init_shard_worker(model_name: str, device: str, num_threads: int, backend: str) -> None:
+    """Initialise un processus de travail : threads torch et modèle propre au processus."""
+    global _shard_model, _shard_backend
+    torch.set_num_threads(num_threads)
+    _shard_backend = get_backend(backend)
+    _shard_model = whisper_models.acquire(model_name, device, _shard_backend.precision(device))
+
+
+def _transcribe_shard(samples: np.ndarray, params: Dict) -> Dict:
+    return _transcribe_with_model(_shard_model, samples, params, _shard_backend)
+
+
+def _detect_shard_language(samples: np.ndarray) -> str:
+    return _shard_backend.detect_language(_shard_model, samples)
+
+
+def _speech_segments(audio: np.ndarray, vad_method: str) -> List[Tuple[int, int]]:
+    """Zones de parole (en échantillons) détectées par le VAD de whisper_timestamped."""
+    try:
+        segments = ts_transcribe.get_vad_segments(audio, output_sample=True, method=vad_method)
+        return [(int(seg["start"]), int(seg["end"])) for seg in segments]
+    except Exception as e:
+        logging.warning(f"VAD indisponible ({e}), découpage sur l'énergie du signal")
+        return []
+
+
+def _plan_shards(audio: np.ndarray, shards: int, vad_method: str) -> List[Tuple[int, int]]:
+    """
+    Découpe l'audio en shards de tailles proches, coupés au milieu des silences.
+
+    Returns:
+        Liste d'intervalles (début, fin) en échantillons couvrant tout l'audio
+    """
+    total = len(audio)
+    speech = _speech_segments(audio, vad_method)
+    gaps = [(a_end + b_start) // 2 for (_, a_end), (b_start, _) in zip(speech, speech[1:]) if b_start > a_end]
+
+    cuts = []
+    for k in range(1, shards):
+        ideal = total * k // shards
+        if gaps:
+            cut = min(gaps, key=lambda g: abs(g - ideal))
+        else:
+            search = min(30 * STREAM_SAMPLE_RATE, total // (2 * shards))
+            cut = _find_silence_cut(audio[:ideal + search], max(0, ideal - search))
+        if (not cuts or cut > cuts[-1]) and 0 < cut < total:
+            cuts.append(cut)
+
+    bounds = [0] + cuts + [total]
+    return list(zip(bounds, bounds[1:]))
+
+
+def _stitch_shards(results: List[Dict], offsets: List[float]) -> Dict:
+    """Recolle les résultats des shards avec des horodatages globaux et des ids renumérotés."""
+    segments = []
+    for result, offset in zip(results, offsets):
+        for seg in result.get("segments", []):
+            segments.append(_shift_segment(seg, offset, len(segments)))
+    language = next((r.get("language") for r in results if r.get("language")), None)
+    return {
+        "language": language,
+        "text": " ".join(seg.get("text", "").strip() for seg in segments),
+        "segments": segments,
+    }
+
+
+def run_parallel_transcription(
+    audio_path: str,
+    base_name: str,
+    model_name: Optional[str] = None,
+    shards: Optional[int] = None,
+    threads_per_shard: Optional[int] = None,
+    accurate: bool = False,
+    vad_method: str = "silero:v3.1",
+    language: Optional[str] = None,
+    write_outputs: bool = True,
+    use_cache: Optional[bool] = None,
+    backend: Optional[str] = None,
+    **kwargs
+) -> Dict:
+    """
+    Transcrit l'audio découpé sur les silences dans un pool de processus.
+
+    Chaque processus charge son propre modèle et utilise threads_per_shard
+    threads torch ; shards x threads_per_shard ne devrait pas dépasser le nombre
+    de cœurs. Le résultat est recollé avec des horodatages globaux.
+    """
+    shards = shards or config.transcription_shards or 1
+    threads_per_shard = threads_per_shard or config.threads_per_shard or max(1, (os.cpu_count() or 1) // shards)
+    params = _build_params(accurate=accurate, vad_method=vad_method, language=language, **kwargs)
+    # Pas d'affichage live depuis plusieurs processus à la fois
+    params["verbose"] = False
+    model_to_load = model_name or config.whisper_model
+    engine = get_backend(backend)
+
+    # La clé ignore le découpage : un résultat mono-processus est réutilisable et inversement
+    cached, cache_key = _cache_lookup(
+        audio_path, base_name, _model_key(model_to_load, engine), params, use_cache if write_outputs else False
+    )
+    if cached is not None:
+        return cached
+
+    audio = whisper.load_audio(audio_path)
+    plan = _plan_shards(audio, shards, vad_method)
+    offsets = [start / STREAM_SAMPLE_RATE for start, _ in plan]
+    logging.info(
+        f"Transcription parallèle: {len(plan)} shard(s) x {threads_per_shard} thread(s), "
+        f"coupures à {', '.join(_fmt_time(o) for o in offsets[1:]) or 'aucune'}"
+    )
+    progress_queue.put({"value": 20, "status_text": f"Transcription parallèle ({len(plan)} processus)..."})
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=len(plan),
+        initializer=_init_shard_worker,
+        initargs=(model_to_load, "cpu", threads_per_shard, engine.name)
+    ) as executor:
+        if not params.get("language"):
+            # Langue détectée une fois sur le premier shard et imposée à tous
+            params["language"] = executor.submit(_detect_shard_language, audio[plan[0][0]:plan[0][1]]).result()
+            logging.info(f"Langue détectée pour tous les shards: {params['language']}")
+        futures = [executor.submit(_transcribe_shard, audio[start:end], params) for start, end in plan]
+        results = [f.result() for f in futures]
+
+    result = _stitch_shards(results, offsets)
+    result["shard_boundaries"] = offsets[1:]
+    if write_outputs:
+        _write_all_outputs(result, base_name)
+    if cache_key:
+        transcription_cache.put(cache_key, result)
     return result
 
 
+def check_parallel_determinism(single: Dict, parallel: Dict, boundaries: List[float], margin: float = 2.0) -> Dict:
+    """
+    Compare une transcription mono-processus et sa version parallèle hors des zones de coupure.
+
+    Les segments à moins de `margin` secondes d'une frontière de shard sont
+    ignorés ; les autres doivent avoir le même texte et des horodatages proches.
+
+    Returns:
+        Dictionnaire {compared, matched, mismatches}
+    """
+    def far_from_boundaries(seg):
+        return all(seg["end"] < b - margin or seg["start"] > b + margin for b in boundaries)
+
+    def norm(text):
+        return " ".join(text.lower().split())
+
+    candidates = [seg for seg in parallel.get("segments", []) if far_from_boundaries(seg)]
+    reference = [seg for seg in single.get("segments", []) if far_from_boundaries(seg)]
+    mismatches = []
+    matched = 0
+    for seg in reference:
+        twin = min(candidates, key=lambda c: abs(c["start"] - seg["start"]), default=None)
+        if twin is not None and abs(twin["start"] - seg["start"]) <= 0.5 and norm(twin["text"]) == norm(seg["text"]):
+            matched += 1
+        else:
+            mismatches.append({"start": seg["start"], "expected": seg["text"], "got": twin and twin["text"]})
+    report = {"compared": len(reference), "matched": matched, "mismatches": mismatches}
+    logging.info(f"Vérification du mode parallèle: {matched}/{len(reference)} segments identiques")
+    return report
+
+
 def transcribe_audio(
     audio_path: str,
     base_name: str,
@@ -148,6 +1020,20 @@ def transcribe_audio(
     **extra
 ) -> Dict:
     progress_queue.put({"value": 10, "status_text": "📥 Chargement du modèle Whisper..."})
+    shards = extra.pop("shards", None) or config.transcription_shards
+    threads_per_shard = extra.pop("threads_per_shard", None)
+    if shards and shards > 1 and _default_device() == "cpu":
+        return run_parallel_transcription(
+            audio_path=audio_path,
+            base_name=base_name,
+            model_name=model_name,
+            shards=shards,
+            threads_per_shard=threads_per_shard,
+            accurate=accurate,
+            vad_method=vad_method,
+            language=language,
+            **extra
+        )
     return run_transcription(
         audio_path=audio_path,
         base_name=base_name,
@@ -173,3 +1059,183 @@ def transcribe_vocal(
         accurate=accurate,
         **extra
     )
+
+
+# === Transcription unique : la seconde sortie est dérivée de la première ===
+
+TRANSCRIPT_EXTENSIONS = ("json", "srt", "vtt", "csv", "tsv")
+
+
+def copy_transcript_outputs(src_base: str, dst_base: str) -> None:
+    """Duplique les sorties d'une transcription sous un autre nom de base."""
+    for ext in TRANSCRIPT_EXTENSIONS:
+        src = f"{src_base}.{ext}"
+        if os.path.exists(src):
+            shutil.copyfile(src, f"{dst_base}.{ext}")
+
+
+_PIPELINE_OPTIONS = ("backend", "use_cache", "streaming", "shards", "threads_per_shard")
+
+
+def _decoding_kwargs(kwargs: Dict) -> Dict:
+    """Retire les options du pipeline pour ne garder que les paramètres de décodage."""
+    return {k: v for k, v in kwargs.items() if k not in _PIPELINE_OPTIONS}
+
+
+def _segment_confidence(seg: Dict) -> Optional[float]:
+    if seg.get("confidence") is not None:
+        return seg["confidence"]
+    scores = [w["confidence"] for w in seg.get("words", []) if w.get("confidence") is not None]
+    return sum(scores) / len(scores) if scores else None
+
+
+def low_confidence_regions(result: Dict, threshold: float, padding: float = 0.5) -> List[Tuple[float, float]]:
+    """Zones (début, fin) couvrant les segments dont la confiance moyenne des mots est sous le seuil."""
+    regions = []
+    for seg in result.get("segments", []):
+        confidence = _segment_confidence(seg)
+        if confidence is None or confidence >= threshold:
+            continue
+        start, end = max(0.0, seg["start"] - padding), seg["end"] + padding
+        if regions and start <= regions[-1][1]:
+            # Zones adjacentes fusionnées : un seul passage du modèle
+            regions[-1] = (regions[-1][0], max(regions[-1][1], end))
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def _mean_confidence(segments: List[Dict]) -> float:
+    scores = [c for c in (_segment_confidence(seg) for seg in segments) if c is not None]
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def _segment_from_words(seg: Dict, words: List[Dict]) -> Dict:
+    part = dict(seg, words=words, start=words[0]["start"], end=words[-1]["end"])
+    part["text"] = " ".join(w.get("text", "").strip() for w in words)
+    scores = [w["confidence"] for w in words if w.get("confidence") is not None]
+    part["confidence"] = round(sum(scores) / len(scores), 3) if scores else None
+    return part
+
+
+def _split_at_region(seg: Dict, start: float, end: float) -> Tuple[Optional[Dict], Optional[Dict], Optional[Dict]]:
+    """
+    Découpe un segment autour de la zone [start, end] selon le milieu de chaque mot.
+
+    Returns:
+        (partie avant, partie dans la zone, partie après), None pour une partie vide
+    """
+    def slot(a, b):
+        middle = (a + b) / 2
+        return 0 if middle < start else (2 if middle > end else 1)
+
+    words = seg.get("words") or []
+    if not words:
+        parts = [None, None, None]
+        parts[slot(seg["start"], seg["end"])] = seg
+        return tuple(parts)
+    groups = ([], [], [])
+    for w in words:
+        groups[slot(w["start"], w["end"])].append(w)
+    if any(len(group) == len(words) for group in groups):
+        return tuple(seg if len(group) == len(words) else None for group in groups)
+    return tuple(_segment_from_words(seg, group) if group else None for group in groups)
+
+
+def merge_region_transcripts(
+    base_result: Dict,
+    regions: List[Tuple[float, float]],
+    region_segments: List[List[Dict]]
+) -> Tuple[Dict, int]:
+    """
+    Remplace, zone par zone, les segments de base par ceux du second passage s'ils sont plus sûrs.
+
+    Les segments de base qui débordent de la zone sont coupés au niveau des
+    mots, et les candidats sont ramenés à la zone : chaque mot n'apparaît
+    qu'une fois dans le résultat.
+
+    Returns:
+        (résultat fusionné, nombre de zones remplacées)
+    """
+    segments = list(base_result.get("segments", []))
+    replaced = 0
+    for (start, end), candidates in zip(regions, region_segments):
+        outside, inside = [], []
+        for seg in segments:
+            if seg["end"] <= start or seg["start"] >= end:
+                outside.append(seg)
+                continue
+            before, within, after = _split_at_region(seg, start, end)
+            outside += [part for part in (before, after) if part]
+            if within:
+                inside.append(within)
+        clipped = [part for part in (_split_at_region(seg, start, end)[1] for seg in candidates) if part]
+        if clipped and _mean_confidence(clipped) > _mean_confidence(inside):
+            segments = outside + clipped
+            replaced += 1
+    segments.sort(key=lambda seg: seg["start"])
+    for i, seg in enumerate(segments):
+        seg["id"] = i
+    merged = dict(base_result, segments=segments)
+    merged["text"] = " ".join(seg.get("text", "").strip() for seg in segments)
+    return merged, replaced
+
+
+def transcribe_single_pass(
+    mix_path: str,
+    vocal_path: Optional[str],
+    main_base: str,
+    vocal_base: str,
+    mode: str = "single",
+    service: Optional[TranscriptionService] = None,
+    model_name: Optional[str] = None,
+    confidence_threshold: Optional[float] = None,
+    **kwargs
+) -> Dict:
+    """
+    Produit les transcriptions principale et vocale à partir d'une seule transcription complète.
+
+    La piste vocale est transcrite si la séparation a réussi (vocal_path non vide),
+    sinon le mixage. En mode 'single', les sorties principales sont une copie des
+    sorties vocales. En mode 'quality', le mixage est retranscrit uniquement sur les
+    zones où la confiance des mots de la passe vocale est faible.
+
+    Returns:
+        Résultat de la transcription principale
+    """
+    source = vocal_path or mix_path
+    logging.info(f"Transcription unique ({mode}) de {os.path.basename(source)}")
+    if service is not None:
+        result = service.transcribe(source, vocal_base, **kwargs)
+    else:
+        result = transcribe_audio(source, vocal_base, model_name=model_name, **kwargs)
+
+    if mode != "quality" or not vocal_path or not result.get("segments"):
+        copy_transcript_outputs(vocal_base, main_base)
+        return result
+
+    threshold = confidence_threshold if confidence_threshold is not None else config.quality_confidence_threshold
+    regions = low_confidence_regions(result, threshold)
+    total = sum(seg["end"] - seg["start"] for seg in result["segments"]) or 1.0
+    covered = sum(end - start for start, end in regions)
+    logging.info(
+        f"{len(regions)} zone(s) de faible confiance (< {threshold:.2f}), "
+        f"{covered:.0f}s à retranscrire sur le mixage ({covered / total:.0%})"
+    )
+    if not regions:
+        copy_transcript_outputs(vocal_base, main_base)
+        return result
+
+    if service is not None:
+        region_segments = service.transcribe_regions(mix_path, regions, **_decoding_kwargs(kwargs))
+    else:
+        params = _build_params(**_decoding_kwargs(kwargs))
+        engine = get_backend(kwargs.get("backend"))
+        device = engine.resolve_device(_default_device())
+        with whisper_models.lease(model_name or config.whisper_model, device, engine.precision(device)) as model:
+            region_segments = _transcribe_regions(model, engine, whisper.load_audio(mix_path), regions, params)
+
+    merged, replaced = merge_region_transcripts(result, regions, region_segments)
+    logging.info(f"{replaced}/{len(regions)} zone(s) remplacée(s) par la transcription du mixage")
+    _write_all_outputs(merged, main_base)
+    return merged
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cache persistant des résultats de transcription, adressé par contenu.
+
+La clé combine l'empreinte des échantillons audio décodés, le nom du modèle et
+l'ensemble des paramètres de décodage : relancer le pipeline sur la même vidéo
+(pour une autre langue cible, ou après un échec de traduction) réutilise la
+transcription au lieu de la recalculer.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Paramètres sans effet sur le résultat, exclus de la clé
+_IGNORED_PARAMS = {"verbose"}
+
+
+class TranscriptionCache:
+    """Cache disque de résultats Whisper avec éviction LRU bornée en taille."""
+
+    def __init__(self, cache_dir, max_size_mb=2048):
+        """
+        Initialise le cache.
+
+        Args:
+            cache_dir: Dossier de stockage des résultats
+            max_size_mb: Taille maximale du cache en Mo
+        """
+        self.cache_dir = cache_dir
+        self.max_size_mb = max_size_mb
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(audio_digest, model_name, params):
+        """Construit la clé à partir de l'empreinte audio, du modèle et des paramètres."""
+        relevant = {k: v for k, v in params.items() if k not in _IGNORED_PARAMS}
+        payload = json.dumps(
+            {"audio": audio_digest, "model": model_name, "params": relevant},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Retourne le résultat en cache ou None."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    result = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            # La date de modification sert d'horodatage LRU
+            os.utime(path, None)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        """Enregistre un résultat puis applique la limite de taille."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._evict_locked()
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict_locked(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        limit = self.max_size_mb * 1024 * 1024
+        while entries and total > limit:
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            except OSError:
+                break
+
+    def clear(self):
+        """Vide entièrement le cache."""
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self):
+        """Statistiques du cache : entrées, taille, succès/échecs et évictions."""
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(entries),
+                "size_mb": sum(size for _, size, _ in entries) / (1024 * 1024),
+                "max_size_mb": self.max_size_mb,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+def hash_audio_blocks(blocks):
+    """Empreinte SHA-256 d'un flux de blocs d'échantillons (numpy)."""
+    digest = hashlib.sha256()
+    for block in blocks:
+        digest.update(block.tobytes())
+    return digest.hexdigest()
+
@@ -1,11 +1,16 @@
-import re
-import requests
 import json
 import os
+import time
 import logging
+import threading
 import concurrent.futures
-from openai import OpenAI
 from utils import config
+from translation_memory import TranslationMemory, normalize_text
+from translation_clients import client_manager
+from translation_journal import TranslationJournal
+from subtitle_io import Cue, parse_cues, read_cues, format_srt
+from translation_planner import plan_windows
+from language_check import assess_translation, verifier_stats, PASS, FAIL
 
 # Logger configuration
 logger = logging.getLogger(__name__)
@@ -16,15 +21,85 @@ deepl_key = ""
 openai_key = ""
 client = None
 
-def set_api_keys(deepl, openai_api_key):
-    global deepl_key, openai_key, client
+DEEPL_URL = "https://api-free.deepl.com/v2/translate"
+# Points d'accès effectifs (modifiables pour un serveur local ou un proxy)
+deepl_url = DEEPL_URL
+openai_base_url = None
+
+OPENAI_MODEL = "o3-mini"
+
+# Mémoire de traduction partagée par tous les threads de traduction
+translation_memory = TranslationMemory(
+    config.translation_memory_path,
+    ttl_days=config.translation_memory_ttl_days,
+    max_entries=config.translation_memory_max_entries
+)
+
+def set_api_keys(deepl, openai_api_key, deepl_api_url=None, openai_api_base=None):
+    """
+    Met à jour les clés et les points d'accès des services.
+
+    Le client OpenAI partagé n'est recréé que si la clé ou l'URL de base change.
+    Sans URL explicite, config.deepl_api_url / config.openai_base_url sont utilisées
+    (None = API publiques).
+    """
+    global deepl_key, openai_key, client, deepl_url, openai_base_url
     deepl_key = deepl
     openai_key = openai_api_key
-    client = OpenAI(api_key=openai_key)
+    deepl_url = deepl_api_url or config.deepl_api_url or DEEPL_URL
+    openai_base_url = openai_api_base or config.openai_base_url
+    client = client_manager.openai_client(openai_key, openai_base_url)
+    return client
+
+# Consommation cumulée des appels de chat (requêtes et jetons)
+_usage_lock = threading.Lock()
+token_usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+
+def record_usage(response):
+    """Ajoute la consommation d'une réponse de chat aux compteurs."""
+    usage = getattr(response, "usage", None)
+    with _usage_lock:
+        token_usage["requests"] += 1
+        if usage is not None:
+            token_usage["prompt_tokens"] += usage.prompt_tokens or 0
+            token_usage["completion_tokens"] += usage.completion_tokens or 0
+# Statuts HTTP temporaires : la requête peut être retentée après une pause
+RETRYABLE_STATUS = (429, 500, 502, 503, 504, 529)
+
+
+def build_translation_messages(text, target_language):
+    """Messages de chat pour la traduction d'un segment."""
+    prompt = (
+        "Note: The automatic transcription may contain errors. "
+        "Please ensure the translated sentence makes sense in context, "
+        "correcting any mistakes as needed. "
+        "Provide an accurate translation that preserves the original meaning, "
+        "without any additional comments or formatting. "
+        f"The translation should be in {target_language}:\n\n{text}"
+    )
+    return [
+        {"role": "assistant", "content": "You are a highly skilled translator."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def build_verification_messages(segment, target_language):
+    """Messages de chat pour la vérification de la langue d'une traduction."""
+    prompt = (
+        f"Verify if the following translation is completely in {target_language} "
+        f"and has no words from the original language. "
+        f"Return 'yes' if it is accurate and 'no' otherwise:\n\n{segment}"
+    )
+    return [
+        {"role": "assistant", "content": "You are a translation quality checker."},
+        {"role": "user", "content": prompt}
+    ]
+
 
 def translate_text_deepl(text, target_language):
     logger.info(f"\n📤 [DeepL] Sending text to translate ({target_language}):\n{text}")
-    url = "https://api-free.deepl.com/v2/translate"
+    url = deepl_url
     headers = {
         "Authorization": f"DeepL-Auth-Key {deepl_key}",
         "Content-Type": "application/x-www-form-urlencoded"
@@ -33,7 +108,7 @@ def translate_text_deepl(text, target_language):
         "text": text,
         "target_lang": target_language.upper()
     }
-    response = requests.post(url, headers=headers, data=data)
+    response = client_manager.http("deepl").post(url, headers=headers, data=data)
     if response.status_code == 200:
         result = response.json()
         translation = result['translations'][0]['text']
@@ -44,71 +119,35 @@ def translate_text_deepl(text, target_language):
 
 def translate_text_openai(text, target_language):
     logger.info(f"\n📤 [OpenAI] Sending text to translate ({target_language}):\n{text}")
-    prompt = (
-        "Note: The automatic transcription may contain errors. "
-        "Please ensure the translated sentence makes sense in context, "
-        "correcting any mistakes as needed. "
-        "Provide an accurate translation that preserves the original meaning, "
-        "without any additional comments or formatting. "
-        f"The translation should be in {target_language}:\n\n{text}"
-    )
-
-    messages = [
-        {"role": "assistant", "content": "You are a highly skilled translator."},
-        {"role": "user", "content": prompt}
-    ]
-
     response = client.chat.completions.create(
-        model="o3-mini",
-        messages=messages,
+        model=OPENAI_MODEL,
+        messages=build_translation_messages(text, target_language),
         reasoning_effort="low"
     )
+    record_usage(response)
     translation = response.choices[0].message.content
     logger.info(f"\n📥 [OpenAI] Translation received:\n{translation}")
     return translation
 
 def translate_text_o3(text, target_language):
     logger.info(f"\n📤 [O3] Sending text to translate ({target_language}):\n{text}")
-    prompt = (
-        "Note: The automatic transcription may contain errors. "
-        "Please ensure the translated sentence makes sense in context, "
-        "correcting any mistakes as needed. "
-        "Provide an accurate translation that preserves the original meaning, "
-        "without any additional comments or formatting. "
-        f"The translation should be in {target_language}:\n\n{text}"
-    )
-
-    messages = [
-        {"role": "assistant", "content": "You are a highly skilled translator."},
-        {"role": "user", "content": prompt}
-    ]
-
     response = client.chat.completions.create(
-        model="o3-mini",
-        messages=messages,
+        model=OPENAI_MODEL,
+        messages=build_translation_messages(text, target_language),
         reasoning_effort="low"
     )
+    record_usage(response)
     translation = response.choices[0].message.content
     logger.info(f"\n📥 [O3] Translation received:\n{translation}")
     return translation
 
 def verify_translation(segment, target_language):
-    prompt = (
-        f"Verify if the following translation is completely in {target_language} "
-        f"and has no words from the original language. "
-        f"Return 'yes' if it is accurate and 'no' otherwise:\n\n{segment}"
-    )
-
-    messages = [
-        {"role": "assistant", "content": "You are a translation quality checker."},
-        {"role": "user", "content": prompt}
-    ]
-
     response = client.chat.completions.create(
-        model="o3-mini",
-        messages=messages,
+        model=OPENAI_MODEL,
+        messages=build_verification_messages(segment, target_language),
         reasoning_effort="low"
     )
+    record_usage(response)
     result = response.choices[0].message.content
     return 'yes' in result.lower()
 
@@ -122,126 +161,500 @@ def write_file(file_path, content):
 
 
 def parse_srt_segments(srt_content):
-    # regex segments {num}\n{time}\n{text (peut être multi lignes)}
-    pattern = re.compile(
-        r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\d+\n|\Z)', 
-        re.DOTALL)
-    segments = []
-    last_idx = 0
-    for m in pattern.finditer(srt_content):
-        if m.start() > last_idx:
-            bloc = srt_content[last_idx:m.start()].strip()
-            if bloc:
-                segments.append({"number": None, "timecode": None, "text": bloc})
-        segments.append({
-            "number": m.group(1),
-            "timecode": m.group(2),
-            "text": m.group(3).strip()
-        })
-        last_idx = m.end()
-    if last_idx < len(srt_content):
-        bloc = srt_content[last_idx:].strip()
-        if bloc:
-            segments.append({"number": None, "timecode": None, "text": bloc})
-    return segments
+    """Sous-titres (Cue) d'un contenu SRT ; le texte orphelin est rattaché au sous-titre précédent."""
+    return parse_cues(srt_content)
 
 def reconstruct_srt(segments, translated_texts):
-    out_lines = []
-    idx_trans = 0
-    for seg in segments:
-        if seg["number"] is None:
-            out_lines.append(translated_texts[idx_trans])
-            idx_trans += 1
+    """Contenu SRT des sous-titres `segments` avec les textes traduits (horodatages inchangés)."""
+    return format_srt([Cue(seg.index, seg.start, seg.end, text) for seg, text in zip(segments, translated_texts)])
+
+
+def _service_model(service):
+    """(service, modèle) normalisés pour la mémoire de traduction."""
+    service = service.lower()
+    if service == "deepl":
+        return "deepl", "deepl"
+    if service in ("o3", "o3-mini"):
+        return "o3", OPENAI_MODEL
+    return "openai", OPENAI_MODEL
+
+
+def _call_translation_service(text, target_language, service):
+    if service.lower() == "deepl":
+        return translate_text_deepl(text, target_language)
+    elif service.lower() in ("o3", "o3-mini"):
+        translation = translate_text_o3(text, target_language)
+        retries = 3
+        while not verify_translations([text], [translation], target_language)[0] and retries > 0:
+            translation = translate_text_o3(text, target_language)
+            retries -= 1
+        return translation
+    else:
+        return translate_text_openai(text, target_language)
+
+
+class BatchMismatchError(Exception):
+    """La réponse d'un lot ne contient pas exactement une traduction par segment."""
+
+
+DEEPL_MAX_TEXTS = 50
+
+
+def translate_batch_deepl(texts, target_language):
+    """Traduit plusieurs segments en une requête DeepL (paramètres `text` multiples)."""
+    logger.info(f"\n📤 [DeepL] Sending batch of {len(texts)} segments ({target_language})")
+    url = deepl_url
+    headers = {
+        "Authorization": f"DeepL-Auth-Key {deepl_key}",
+        "Content-Type": "application/x-www-form-urlencoded"
+    }
+    data = {"text": list(texts), "target_lang": target_language.upper()}
+    response = client_manager.http("deepl").post(url, headers=headers, data=data)
+    if response.status_code != 200:
+        raise Exception(f"DeepL API error: {response.status_code} {response.text}")
+    translations = [t["text"] for t in response.json()["translations"]]
+    if len(translations) != len(texts):
+        raise BatchMismatchError(f"DeepL: {len(translations)} traductions pour {len(texts)} segments")
+    return translations
+
+
+def build_batch_messages(texts, target_language, context=None):
+    """
+    Messages de chat pour un lot : segments numérotés en JSON, réponse attendue en JSON.
+
+    `context` : liste de (source, traduction ou None) des sous-titres qui précèdent le lot.
+    """
+    payload = json.dumps([{"id": i, "text": text} for i, text in enumerate(texts)], ensure_ascii=False)
+    context_note = ""
+    if context:
+        previous = json.dumps(
+            [{"text": src, "translation": tgt} if tgt else {"text": src} for src, tgt in context],
+            ensure_ascii=False
+        )
+        context_note = (
+            "For context only, here are the subtitles just before these ones "
+            "(with their translation when available); do not translate them again:\n"
+            f"{previous}\n\n"
+        )
+    prompt = (
+        "Note: The automatic transcription may contain errors. "
+        "Please ensure each translated subtitle makes sense in context, "
+        "correcting any mistakes as needed. "
+        "Provide an accurate translation that preserves the original meaning. "
+        f"Translate each subtitle below into {target_language}. "
+        "The input is a JSON array of objects with an \"id\" and a \"text\". "
+        "Answer only with a JSON array containing exactly one object per input, "
+        "with the same \"id\" and the translated text in \"translation\", "
+        "without any additional comments or formatting:\n\n"
+        f"{context_note}{payload}"
+    )
+    return [
+        {"role": "assistant", "content": "You are a highly skilled translator."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_batch_response(content, count, field="translation"):
+    """Extrait les valeurs de `field` (dans l'ordre des ids) d'une réponse JSON ; BatchMismatchError sinon."""
+    start, end = content.find("["), content.rfind("]")
+    if start == -1 or end <= start:
+        raise BatchMismatchError("Réponse sans tableau JSON")
+    try:
+        items = json.loads(content[start:end + 1])
+        by_id = {int(item["id"]): str(item[field]) for item in items}
+    except (ValueError, TypeError, KeyError) as e:
+        raise BatchMismatchError(f"Réponse JSON invalide: {e}")
+    if len(items) != count or sorted(by_id) != list(range(count)):
+        raise BatchMismatchError(f"{len(items)} réponses pour {count} segments")
+    return [by_id[i] for i in range(count)]
+
+
+def build_batch_verification_messages(translations, target_language):
+    """Messages de chat pour vérifier plusieurs traductions en un seul appel."""
+    payload = json.dumps([{"id": i, "text": t} for i, t in enumerate(translations)], ensure_ascii=False)
+    prompt = (
+        f"For each text below, verify if it is completely in {target_language} "
+        f"and has no words from the original language. "
+        "The input is a JSON array of objects with an \"id\" and a \"text\". "
+        "Answer only with a JSON array containing one object per input, with the same \"id\" "
+        "and \"verdict\" set to 'yes' if it is accurate and 'no' otherwise:\n\n"
+        f"{payload}"
+    )
+    return [
+        {"role": "assistant", "content": "You are a translation quality checker."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def verify_translations(sources, translations, target_language):
+    """
+    Vérifie des traductions : verdict local d'abord, cas ambigus groupés en un appel LLM.
+
+    Returns:
+        Liste de booléens alignée sur `translations`
+    """
+    if not config.local_translation_verifier:
+        return [verify_translation(t, target_language) for t in translations]
+    verdicts = [assess_translation(src, t, target_language) for src, t in zip(sources, translations)]
+    for verdict in verdicts:
+        verifier_stats.record(verdict)
+    results = [verdict == PASS for verdict in verdicts]
+    ambiguous = [i for i, verdict in enumerate(verdicts) if verdict not in (PASS, FAIL)]
+    if not ambiguous:
+        return results
+
+    if len(ambiguous) == 1:
+        answers = [verify_translation(translations[ambiguous[0]], target_language)]
+        calls = 1
+    else:
+        response = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=build_batch_verification_messages([translations[i] for i in ambiguous], target_language),
+            reasoning_effort="low"
+        )
+        record_usage(response)
+        calls = 1
+        try:
+            answers = ['yes' in v.lower() for v in parse_batch_response(
+                response.choices[0].message.content, len(ambiguous), field="verdict")]
+        except BatchMismatchError as e:
+            logger.warning(f"Vérification groupée incohérente ({e}), vérification unitaire")
+            answers = [verify_translation(translations[i], target_language) for i in ambiguous]
+            calls += len(ambiguous)
+    for i, ok in zip(ambiguous, answers):
+        results[i] = ok
+    verifier_stats.record_escalation(answers.count(False), calls)
+    return results
+
+
+def translate_batch_openai(texts, target_language, label="OpenAI", context=None):
+    """Traduit plusieurs segments en un seul appel de chat."""
+    logger.info(f"\n📤 [{label}] Sending batch of {len(texts)} segments ({target_language})")
+    response = client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=build_batch_messages(texts, target_language, context),
+        reasoning_effort="low"
+    )
+    record_usage(response)
+    return parse_batch_response(response.choices[0].message.content, len(texts))
+
+
+def plan_translation(texts, indices, service, max_tokens=None, file_starts=None):
+    """
+    Fenêtres de traduction des positions `indices` de `texts` pour le service.
+
+    DeepL : lots bornés en caractères et en nombre de textes, sans contexte.
+    LLM : fenêtres bornées en jetons, avec les sous-titres précédents en contexte.
+
+    `file_starts` donne la première position de chaque fichier quand `texts`
+    en concatène plusieurs : une fenêtre et son contexte ne débordent jamais
+    sur le fichier voisin.
+    """
+    bounds = list(file_starts or [0]) + [len(texts)]
+    indices = sorted(indices)
+    windows = []
+    for start, end in zip(bounds, bounds[1:]):
+        selected = [idx for idx in indices if start <= idx < end]
+        if not selected:
+            continue
+        if service.lower() == "deepl":
+            windows += plan_windows(texts, selected, config.deepl_batch_chars, cost=len, max_items=DEEPL_MAX_TEXTS)
+        else:
+            windows += plan_windows(
+                texts, selected, max_tokens or config.translation_window_tokens,
+                context_cues=config.translation_context_cues, context_floor=start
+            )
+    return windows
+
+
+def pending_translations(texts, target_language, service, use_memory, indices=None, known=None):
+    """
+    Résultats initiaux et positions restant à traduire.
+
+    Args:
+        indices: Positions à traduire (None = tous les textes non vides)
+        known: Dictionnaire position -> traduction déjà connue (ex. journal de reprise)
+
+    Returns:
+        (liste des résultats alignée sur `texts`, positions à envoyer à l'API)
+    """
+    service_name, model = _service_model(service)
+    results = [""] * len(texts)
+    for idx, translation in (known or {}).items():
+        results[idx] = translation
+    pending = []
+    for idx in (range(len(texts)) if indices is None else indices):
+        text = texts[idx]
+        if not text.strip():
+            continue
+        cached = translation_memory.get(text, target_language, service_name, model) if use_memory else None
+        if cached is not None:
+            results[idx] = cached
         else:
-            out_lines.append(str(seg["number"]))
-            out_lines.append(seg["timecode"])
-            out_lines.append(translated_texts[idx_trans] if seg["text"] else "")
-            idx_trans += 1
-        out_lines.append("")
-    return "\n".join(out_lines).strip()
+            pending.append(idx)
+    return results, pending
+
+
+def window_context(window, texts, results):
+    """Contexte d'une fenêtre : (source, traduction déjà connue ou None) des sous-titres précédents."""
+    return [(texts[idx], results[idx] or None) for idx in window.context]
+
 
+def translate_batch(texts, target_language, service, context=None):
+    """
+    Traduit un lot en une requête, en le scindant en deux si la réponse est incohérente.
 
-def translate_srt_file(srt_path, target_language, service='openai', mode='batched', use_threading=None):
+    Un lot réduit à un seul segment retombe sur la traduction unitaire.
+    """
+    if len(texts) == 1:
+        return [_call_translation_service(texts[0], target_language, service)]
+    try:
+        if service.lower() == "deepl":
+            return translate_batch_deepl(texts, target_language)
+        is_o3 = service.lower() in ("o3", "o3-mini")
+        translations = translate_batch_openai(texts, target_language, "O3" if is_o3 else "OpenAI", context)
+    except BatchMismatchError as e:
+        logger.warning(f"Lot de {len(texts)} segments incohérent ({e}), découpage en deux")
+        middle = len(texts) // 2
+        return (translate_batch(texts[:middle], target_language, service, context)
+                + translate_batch(texts[middle:], target_language, service, context))
+    if is_o3:
+        # Les traductions refusées par le vérificateur sont refaites individuellement
+        checks = verify_translations(texts, translations, target_language)
+        translations = [
+            t if ok else _call_translation_service(src, target_language, service)
+            for src, t, ok in zip(texts, translations, checks)
+        ]
+    return translations
+
+
+def translate_texts(texts, target_language, service, max_workers=1, max_tokens=None, use_memory=None,
+                    on_translated=None, indices=None, known=None, file_starts=None):
+    """
+    Traduit une liste de textes : mémoire de traduction puis fenêtres de sous-titres consécutifs.
+
+    En séquentiel, chaque fenêtre reçoit aussi les traductions des sous-titres
+    précédents comme contexte ; en parallèle, seulement celles déjà connues.
+
+    `on_translated(idx, translation)` est appelé pour chaque segment traduit par l'API.
+    `indices`, `known` et `file_starts` : voir pending_translations et plan_translation.
+
+    Returns:
+        Liste des traductions, alignée sur `texts` ("" pour les textes vides ou non demandés)
+    """
+    if use_memory is None:
+        use_memory = config.use_translation_memory
+    service_name, model = _service_model(service)
+    results, pending = pending_translations(texts, target_language, service, use_memory, indices, known)
+
+    windows = plan_translation(texts, pending, service, max_tokens, file_starts)
+    requested = len(texts) if indices is None else len(indices)
+    logger.info(
+        f"Traduction de {len(pending)}/{requested} segments en {len(windows)} requête(s) "
+        f"({requested - len(pending)} vides ou déjà en mémoire)"
+    )
+
+    def run_batch(window):
+        translations = translate_batch(
+            [texts[idx] for idx in window.indices], target_language, service, window_context(window, texts, results)
+        )
+        for idx, translation in zip(window.indices, translations):
+            results[idx] = translation
+            if use_memory:
+                translation_memory.put(texts[idx], translation, target_language, service_name, model)
+            if on_translated:
+                on_translated(idx, translation)
+
+    if max_workers > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for future in [executor.submit(run_batch, window) for window in windows]:
+                future.result()
+    else:
+        for window in windows:
+            run_batch(window)
+    return results
+
+
+def _log_translation_stats():
+    client_manager.log_stats()
+    verifier_stats.log_stats()
+    with _usage_lock:
+        usage = dict(token_usage)
+    if usage["requests"]:
+        logger.info(
+            f"Appels de chat: {usage['requests']} requêtes, {usage['prompt_tokens']} jetons de prompt, "
+            f"{usage['completion_tokens']} jetons de réponse"
+        )
+    if config.use_translation_memory:
+        stats = translation_memory.stats()
+        logger.info(
+            f"Mémoire de traduction: {stats['hits']} succès, {stats['misses']} échecs "
+            f"({stats['hit_rate']:.0%}), {stats['entries']} entrées"
+        )
+
+
+def _translate_srt_paths(srt_paths, target_language, service, translate_fn):
+    """
+    Traduit plusieurs fichiers SRT en ne traduisant qu'une fois chaque texte distinct.
+
+    Les fenêtres et leur contexte suivent l'ordre réel des sous-titres de
+    chaque fichier ; la déduplication et le journal servent seulement à
+    éviter des requêtes. Les segments traduits sont journalisés à côté du
+    premier SRT : une reprise après interruption ne retraduit que les
+    segments manquants.
+
+    Args:
+        srt_paths: Fichiers SRT du même traitement (ex. principal et vocal)
+        target_language: Langue cible
+        service: Service de traduction
+        translate_fn: Fonction `translate_fn(texts, on_translated, indices=, known=, file_starts=)`
+            (voir translate_texts)
+
+    Returns:
+        Liste de (chemin traduit, contenu traduit), dans l'ordre de `srt_paths`
+    """
+    parsed = [read_cues(path) for path in srt_paths]
+    # Tous les segments à la suite, fichier par fichier, dans l'ordre des fichiers
+    texts, file_starts = [], []
+    for segments in parsed:
+        file_starts.append(len(texts))
+        texts.extend(seg.text for seg in segments)
+
+    # Première occurrence de chaque texte normalisé : seule position envoyée à l'API
+    keys = [normalize_text(text) for text in texts]
+    first = {}
+    for idx, key in enumerate(keys):
+        first.setdefault(key, idx)
+
+    if texts:
+        logger.info(
+            f"Déduplication: {len(first)} textes distincts pour {len(texts)} segments "
+            f"sur {len(srt_paths)} fichier(s) ({1 - len(first) / len(texts):.0%} évités)"
+        )
+
+    journal = None
+    done = {}
+    if config.translation_journal and srt_paths:
+        journal = TranslationJournal(
+            f"{os.path.splitext(srt_paths[0])[0]}.{target_language}.{_service_model(service)[0]}.journal",
+            sync_every=config.translation_journal_sync_every
+        )
+        done = journal.load()
+    indices = sorted(idx for key, idx in first.items() if key not in done)
+    known = {idx: done[key] for idx, key in enumerate(keys) if key in done}
+
+    def on_translated(idx, translation):
+        if journal is not None:
+            journal.record(keys[idx], translation)
+
+    try:
+        translations = translate_fn(texts, on_translated, indices=indices, known=known, file_starts=file_starts)
+    finally:
+        if journal is not None:
+            journal.close()
+    # Les doublons reprennent la traduction de leur première occurrence
+    translations = [translations[first[key]] for key in keys]
+    _log_translation_stats()
+
+    results = []
+    bounds = file_starts + [len(texts)]
+    for path, segments, start, end in zip(srt_paths, parsed, bounds, bounds[1:]):
+        translated_content = reconstruct_srt(segments, translations[start:end])
+        translated_path = path.replace('.srt', f'_translated_{target_language}.srt')
+        write_file(translated_path, translated_content)
+        results.append((translated_path, translated_content))
+    if journal is not None:
+        journal.remove()
+    return results
+
+
+def translate_srt_files(srt_paths, target_language, service='openai', mode=None, use_threading=None):
+    """Traduit ensemble les fichiers SRT d'un traitement (segments dédupliqués entre fichiers)."""
     if use_threading is None:
         use_threading = config.use_threading
+    if mode is None:
+        mode = config.translation_engine
 
-    if use_threading and mode == 'threaded':
-        return translate_srt_file_threaded(srt_path, target_language, service)
+    if mode == 'async':
+        # Import local : async_translator dépend de ce module
+        from async_translator import translate_texts_async
+        translate_fn = lambda texts, cb, **job: translate_texts_async(
+            texts, target_language, service, on_translated=cb, **job)
+    elif use_threading and mode == 'threaded':
+        translate_fn = lambda texts, cb, **job: translate_texts(
+            texts, target_language, service, max_workers=4, on_translated=cb, **job)
     else:
-        return translate_srt_file_batched(srt_path, target_language, service)
-
-def translate_srt_file_batched(srt_path, target_language, service, batch_size=10):
-    content = read_file(srt_path)
-    segments = parse_srt_segments(content)
-    translated_texts = []
-
-    for i in range(0, len(segments), batch_size):
-        batch = segments[i:i + batch_size]
-        # batch_texts est la liste de tous les textes de ce batch y compris les orphelins
-        batch_texts = [seg["text"] for seg in batch]
-        result_batch = []
-
-        if service.lower() in ("o3", "o3-mini"):
-            # Traduire batch complet groupé (si tous les batch_text sont non vides)
-            for text in batch_texts:
-                if text.strip():
-                    translation = translate_text_o3(text, target_language)
-                    retries = 3
-                    while not verify_translation(translation, target_language) and retries > 0:
-                        translation = translate_text_o3(text, target_language)
-                        retries -= 1
-                    result_batch.append(translation)
-                else:
-                    result_batch.append("")
-        elif service.lower() == "deepl":
-            for text in batch_texts:
-                if text.strip():
-                    result_batch.append(translate_text_deepl(text, target_language))
-                else:
-                    result_batch.append("")
-        else:
-            for text in batch_texts:
-                if text.strip():
-                    result_batch.append(translate_text_openai(text, target_language))
-                else:
-                    result_batch.append("")
-        translated_texts.extend(result_batch)
-
-    translated_content = reconstruct_srt(segments, translated_texts)
-    translated_path = srt_path.replace('.srt', f'_translated_{target_language}.srt')
-    write_file(translated_path, translated_content)
-    return translated_path, translated_content
+        translate_fn = lambda texts, cb, **job: translate_texts(
+            texts, target_language, service, on_translated=cb, **job)
+    return _translate_srt_paths(srt_paths, target_language, service, translate_fn)
+
+
+def parse_target_languages(target_language):
+    """Liste de langues cibles à partir d'une langue, d'une liste ou d'une chaîne "FR, DE, ES"."""
+    if isinstance(target_language, str):
+        target_language = target_language.split(",")
+    languages = []
+    for lang in target_language:
+        lang = lang.strip()
+        if lang and lang not in languages:
+            languages.append(lang)
+    return languages
+
+
+def translate_srt_files_multi(srt_paths, target_languages, service='openai', mode=None, use_threading=None):
+    """
+    Traduit les mêmes fichiers SRT vers plusieurs langues en parallèle.
+
+    Toutes les requêtes partagent le limiteur de débit du gestionnaire de clients.
+
+    Returns:
+        Dictionnaire langue -> liste de (chemin traduit, contenu traduit)
+    """
+    languages = parse_target_languages(target_languages)
+    segments = sum(len(read_cues(path)) for path in srt_paths)
+    results, timings = {}, {}
+
+    def translate_language(lang):
+        start = time.perf_counter()
+        results[lang] = translate_srt_files(srt_paths, lang, service, mode, use_threading)
+        timings[lang] = time.perf_counter() - start
+
+    workers = max(1, min(len(languages), config.translation_language_workers))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(translate_language, lang) for lang in languages]:
+            future.result()
+
+    for lang in languages:
+        elapsed = timings[lang]
+        logger.info(
+            f"Débit {lang}: {segments} segments en {elapsed:.1f}s "
+            f"({segments / elapsed if elapsed else 0.0:.1f} seg/s)"
+        )
+    return results
+
+
+def translate_srt_file(srt_path, target_language, service='openai', mode=None, use_threading=None):
+    return translate_srt_files([srt_path], target_language, service, mode, use_threading)[0]
+
+def translate_srt_file_batched(srt_path, target_language, service, max_tokens=None):
+    # Les fenêtres de sous-titres consécutifs sont bornées par un budget de jetons
+    return _translate_srt_paths(
+        [srt_path], target_language, service,
+        lambda texts, cb, **job: translate_texts(texts, target_language, service, max_tokens=max_tokens,
+                                                 on_translated=cb, **job)
+    )[0]
 
 def translate_srt_file_threaded(srt_path, target_language, service, max_workers=4):
-    content = read_file(srt_path)
-    segments = parse_srt_segments(content)
-    translated_texts = [None]*len(segments)
+    # Les lots sont traduits en parallèle par le pool de threads
+    return _translate_srt_paths(
+        [srt_path], target_language, service,
+        lambda texts, cb, **job: translate_texts(texts, target_language, service, max_workers=max_workers,
+                                                 on_translated=cb, **job)
+    )[0]
 
-    def translate_one(idx, text):
-        if not text.strip():
-            return ""
-        if service.lower() == "deepl":
-            return translate_text_deepl(text, target_language)
-        elif service.lower() in ("o3", "o3-mini"):
-            translation = translate_text_o3(text, target_language)
-            retries = 3
-            while not verify_translation(translation, target_language) and retries > 0:
-                translation = translate_text_o3(text, target_language)
-                retries -= 1
-            return translation
-        else:
-            return translate_text_openai(text, target_language)
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_dict = {
-            executor.submit(translate_one, idx, seg["text"]): idx
-            for idx, seg in enumerate(segments)
-        }
-        for future in concurrent.futures.as_completed(future_dict):
-            idx = future_dict[future]
-            translated_texts[idx] = future.result()
-
-    translated_content = reconstruct_srt(segments, translated_texts)
-    translated_path = srt_path.replace('.srt', f'_translated_{target_language}.srt')
-    write_file(translated_path, translated_content)
-    return translated_path, translated_content
+def translate_srt_file_async(srt_path, target_language, service):
+    from async_translator import translate_texts_async
+    return _translate_srt_paths(
+        [srt_path], target_language, service,
+        lambda texts, cb, **job: translate_texts_async(texts, target_language, service, on_translated=cb, **job)
+    )[0]
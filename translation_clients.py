@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Clients HTTP partagés pour les services de traduction.
+
+Un pool de connexions keep-alive par service (HTTP/2 si le paquet `h2` est
+installé), réutilisé entre les threads et d'un traitement à l'autre. Chaque
+requête est tracée pour mesurer la réutilisation des connexions et le temps
+passé en établissement TCP + TLS, et passe par un limiteur de débit commun.
+La concurrence du moteur asynchrone est pilotée par un contrôleur AIMD
+partagé par service.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+import importlib.util
+
+import httpx
+from openai import OpenAI
+
+from utils import config
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class ConnectionMetrics:
+    """Compteurs de requêtes, de nouvelles connexions et de temps de handshake d'un pool."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.handshake_time = 0.0
+        self._lock = threading.Lock()
+
+    def _record(self, events):
+        with self._lock:
+            self.requests += 1
+            if "connection.connect_tcp.started" in events:
+                self.connections += 1
+                end = events.get("connection.start_tls.complete", events.get("connection.connect_tcp.complete"))
+                if end is not None:
+                    self.handshake_time += end - events["connection.connect_tcp.started"]
+
+    def tracer(self):
+        """Fonction de trace httpcore propre à une requête (synchrone)."""
+        events = {}
+
+        def trace(name, info):
+            events[name] = time.perf_counter()
+            if name.endswith("response_closed.complete") or name.endswith("response_closed.failed"):
+                self._record(events)
+        return trace
+
+    def async_tracer(self):
+        """Fonction de trace httpcore propre à une requête (asynchrone)."""
+        trace = self.tracer()
+
+        async def async_trace(name, info):
+            trace(name, info)
+        return async_trace
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "reuse_rate": 1 - self.connections / self.requests if self.requests else 0.0,
+                "avg_handshake_ms": 1000 * self.handshake_time / self.connections if self.connections else 0.0,
+            }
+
+
+class RateLimiter:
+    """
+    Seau à jetons partagé par tous les threads et boucles asyncio.
+
+    Chaque requête réserve un créneau ; l'appelant attend jusqu'à ce créneau.
+    `rate` en requêtes par seconde (None = illimité), `burst` requêtes d'avance.
+    """
+
+    def __init__(self, rate=None, burst=10):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        if not self.rate:
+            return 0.0
+        interval = 1.0 / self.rate
+        with self._lock:
+            now = time.monotonic()
+            # Le crédit accumulé pendant l'inactivité est plafonné à `burst` requêtes
+            slot = max(self._next, now - self.burst * interval)
+            self._next = slot + interval
+            return max(0.0, slot - now)
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def async_acquire(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class AIMDController:
+    """
+    Limiteur de concurrence AIMD (additive increase, multiplicative decrease).
+
+    La limite augmente d'environ 1 par fenêtre de `limit` succès et est
+    multipliée par `decrease_factor` sur un 429 ou lorsque la latence dépasse
+    `latency_factor` fois la latence de référence (moyenne glissante).
+
+    Partageable entre threads et boucles asyncio : chaque traduction asynchrone
+    tourne dans son propre asyncio.run, et les requêtes en attente sont
+    réveillées dans leur boucle.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, decrease_factor=0.5, latency_factor=2.5):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.baseline = None
+        self.in_flight = 0
+        self.peak_limit = self.limit
+        self._last_decrease = 0.0
+        self._waiters = []
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            await waiter
+
+    def _wake_all(self):
+        # Appelé sous self._lock
+        waiters, self._waiters = self._waiters, []
+        for loop, waiter in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(lambda w=waiter: w.done() or w.set_result(None))
+
+    async def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._wake_all()
+
+    def on_success(self, latency):
+        with self._lock:
+            if self.baseline is None:
+                self.baseline = latency
+            if latency > self.latency_factor * self.baseline:
+                self._decrease("latence")
+                return
+            self.baseline = 0.9 * self.baseline + 0.1 * latency
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self.peak_limit = max(self.peak_limit, self.limit)
+            self._wake_all()
+
+    def on_throttle(self):
+        with self._lock:
+            self._decrease("429")
+
+    def _decrease(self, reason):
+        # Les requêtes déjà en vol reflètent l'ancienne limite : une seule réduction par latence de référence
+        now = time.monotonic()
+        if now - self._last_decrease < (self.baseline or 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.decrease_factor)
+        logger.info(f"Concurrence réduite à {int(self.limit)} ({reason})")
+
+
+class _TracingTransport(httpx.HTTPTransport):
+    def __init__(self, metrics, limiter, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+        self.limiter = limiter
+
+    def handle_request(self, request):
+        self.limiter.acquire()
+        request.extensions["trace"] = self.metrics.tracer()
+        return super().handle_request(request)
+
+
+class _AsyncTracingTransport(httpx.AsyncHTTPTransport):
+    # Pas de limiteur ici : le moteur asynchrone l'attend avant de chronométrer la requête
+    def __init__(self, metrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    async def handle_async_request(self, request):
+        request.extensions["trace"] = self.metrics.async_tracer()
+        return await super().handle_async_request(request)
+
+
+class TranslationClientManager:
+    """Fabrique et conserve les clients HTTP/OpenAI partagés par service."""
+
+    def __init__(self, pool_size=None, timeout=120):
+        """
+        Initialise le gestionnaire.
+
+        Args:
+            pool_size: Connexions maximales par service (None = config.translation_pool_size)
+            timeout: Délai d'attente des requêtes en secondes
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._clients = {}
+        self._metrics = {}
+        self._openai = None
+        self._openai_key = None
+        self._openai_base_url = None
+        self._controllers = {}
+        self._lock = threading.Lock()
+        # Débit commun à toutes les requêtes (toutes langues et tous moteurs confondus)
+        self.rate_limiter = RateLimiter(config.translation_rate_limit, config.translation_rate_burst)
+
+    def _limits(self):
+        size = self.pool_size or config.translation_pool_size
+        return httpx.Limits(max_connections=size, max_keepalive_connections=size, keepalive_expiry=60)
+
+    def metrics(self, service):
+        with self._lock:
+            return self._metrics.setdefault(service, ConnectionMetrics())
+
+    def http(self, service):
+        """Client httpx synchrone partagé du service (créé au premier appel)."""
+        metrics = self.metrics(service)
+        with self._lock:
+            client = self._clients.get(service)
+            if client is None:
+                transport = _TracingTransport(
+                    metrics, self.rate_limiter, http2=HTTP2_AVAILABLE, limits=self._limits()
+                )
+                client = httpx.Client(transport=transport, timeout=self.timeout)
+                self._clients[service] = client
+                logger.info(f"Pool HTTP '{service}' créé (HTTP/2: {'oui' if HTTP2_AVAILABLE else 'non'})")
+            return client
+
+    def async_http(self, service):
+        """
+        Nouveau client httpx asynchrone instrumenté.
+
+        Un client asynchrone est lié à sa boucle d'événements : il vit le temps
+        d'un asyncio.run et doit être fermé par l'appelant. Il ne passe pas par
+        le limiteur de débit : l'appelant attend `rate_limiter.async_acquire()`.
+        """
+        transport = _AsyncTracingTransport(self.metrics(service), http2=HTTP2_AVAILABLE, limits=self._limits())
+        return httpx.AsyncClient(transport=transport, timeout=self.timeout)
+
+    def concurrency_controller(self, service):
+        """Contrôleur AIMD partagé du service : la limite apprise vaut pour toutes les langues et tous les traitements."""
+        with self._lock:
+            controller = self._controllers.get(service)
+            if controller is None:
+                controller = AIMDController(config.async_initial_concurrency, maximum=config.async_max_concurrency)
+                self._controllers[service] = controller
+            return controller
+
+    def openai_client(self, api_key, base_url=None):
+        """Client OpenAI partagé, recréé seulement si la clé ou l'URL de base change."""
+        with self._lock:
+            if self._openai is not None and (api_key, base_url) == (self._openai_key, self._openai_base_url):
+                return self._openai
+        client = OpenAI(api_key=api_key, base_url=base_url, http_client=self.http("openai"))
+        with self._lock:
+            self._openai, self._openai_key, self._openai_base_url = client, api_key, base_url
+        return client
+
+    def stats(self):
+        """Statistiques de connexion par service."""
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {service: m.stats() for service, m in metrics.items()}
+
+    def log_stats(self):
+        for service, stats in self.stats().items():
+            if stats["requests"]:
+                logger.info(
+                    f"Connexions {service}: {stats['requests']} requêtes, {stats['connections']} connexions "
+                    f"(réutilisation {stats['reuse_rate']:.0%}), handshake moyen {stats['avg_handshake_ms']:.0f} ms"
+                )
+
+    def close(self):
+        """Ferme tous les pools."""
+        with self._lock:
+            clients, self._clients = self._clients, {}
+            self._openai = self._openai_key = self._openai_base_url = None
+        for client in clients.values():
+            client.close()
+
+
+# Gestionnaire partagé par tous les traitements
+client_manager = TranslationClientManager()
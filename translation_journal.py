@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Journal de reprise de la traduction.
+
+Fichier JSON Lines en ajout seul, écrit à côté du SRT : chaque segment
+traduit y est consigné dès réception et le fichier est synchronisé sur
+disque (fsync) par paquets. Après une interruption, la traduction reprend
+avec les segments déjà journalisés ; le journal est supprimé une fois les
+fichiers traduits écrits.
+"""
+
+import os
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationJournal:
+    """Journal des segments traduits d'un traitement, partagé entre threads."""
+
+    def __init__(self, path, sync_every=20):
+        """
+        Initialise le journal.
+
+        Args:
+            path: Chemin du fichier journal
+            sync_every: Nombre d'entrées entre deux fsync
+        """
+        self.path = path
+        self.sync_every = max(1, sync_every)
+        self._file = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Relit les traductions déjà journalisées.
+
+        Returns:
+            Dictionnaire texte source -> traduction (vide si pas de journal)
+        """
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    entries[entry["source"]] = entry["translation"]
+                except (ValueError, KeyError, TypeError):
+                    # Dernière ligne tronquée par une interruption : ignorée
+                    continue
+        if entries:
+            logger.info(f"Reprise de la traduction: {len(entries)} segments déjà traduits ({self.path})")
+        return entries
+
+    def record(self, source, translation):
+        """Ajoute un segment traduit au journal."""
+        line = json.dumps({"source": source, "translation": translation}, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._pending += 1
+            if self._pending >= self.sync_every:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        """Synchronise et ferme le journal (les entrées sont conservées pour une reprise)."""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def remove(self):
+        """Ferme et supprime le journal une fois la traduction terminée."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
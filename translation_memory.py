@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Mémoire de traduction persistante (SQLite).
+
+Chaque traduction est indexée par (texte source normalisé, langue source,
+langue cible, service, modèle) : un segment déjà traduit (génériques,
+répliques répétées, SRT principal et vocal quasi identiques) n'est pas
+renvoyé à l'API.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    source_text TEXT NOT NULL,
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    service TEXT NOT NULL,
+    model TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (source_text, source_lang, target_lang, service, model)
+);
+CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used);
+"""
+
+
+def normalize_text(text):
+    """Normalisation de la clé : Unicode NFC et espaces compactés."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TranslationMemory:
+    """Mémoire de traduction partagée entre threads, avec expiration et taille maximale."""
+
+    def __init__(self, db_path, ttl_days=90, max_entries=500000):
+        """
+        Initialise la mémoire de traduction.
+
+        Args:
+            db_path: Chemin du fichier SQLite
+            ttl_days: Durée de vie d'une entrée en jours (None = illimitée)
+            max_entries: Nombre maximal d'entrées (None = illimité)
+        """
+        self.db_path = db_path
+        self.ttl_days = ttl_days
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connection(self):
+        # Une connexion par thread : sqlite3 ne partage pas ses connexions entre threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+                    self._purge(conn)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(text, target_lang, service, model, source_lang):
+        return (normalize_text(text), (source_lang or "auto").lower(), target_lang.lower(), service.lower(), model)
+
+    def get(self, text, target_lang, service, model, source_lang=None):
+        """Retourne la traduction mémorisée ou None."""
+        key = self._key(text, target_lang, service, model, source_lang)
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT translation, created_at FROM translations WHERE source_text=? AND source_lang=? "
+            "AND target_lang=? AND service=? AND model=?",
+            key
+        ).fetchone()
+        now = time.time()
+        if row is not None and self.ttl_days is not None and now - row[1] > self.ttl_days * 86400:
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        with conn:
+            conn.execute(
+                "UPDATE translations SET last_used=? WHERE source_text=? AND source_lang=? "
+                "AND target_lang=? AND service=? AND model=?",
+                (now,) + key
+            )
+        return row[0]
+
+    def put(self, text, translation, target_lang, service, model, source_lang=None):
+        """Mémorise une traduction."""
+        key = self._key(text, target_lang, service, model, source_lang)
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO translations "
+                "(source_text, source_lang, target_lang, service, model, translation, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                key + (translation, now, now)
+            )
+        with self._lock:
+            self.writes += 1
+            purge = self.max_entries is not None and self.writes % 1000 == 0
+        if purge:
+            self._purge(conn)
+
+    def _purge(self, conn):
+        """Supprime les entrées expirées puis les moins récemment utilisées au-delà de max_entries."""
+        with conn:
+            if self.ttl_days is not None:
+                conn.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl_days * 86400,))
+            if self.max_entries is not None:
+                conn.execute(
+                    "DELETE FROM translations WHERE rowid IN (SELECT rowid FROM translations "
+                    "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+    def stats(self):
+        """Compteurs de succès/échecs et nombre d'entrées."""
+        entries = self._connection().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Planification des requêtes de traduction en fenêtres de contexte.
+
+Les sous-titres consécutifs sont regroupés en fenêtres bornées par un budget
+de jetons ; chaque fenêtre emporte les quelques sous-titres qui la précèdent
+comme contexte (source et, si elle est déjà connue, traduction), ce qui aide
+le modèle à corriger les erreurs de transcription sans les retraduire.
+"""
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    # tiktoken optionnel : estimation à ~4 caractères par jeton
+    _ENCODING = None
+
+# Surcoût JSON par sous-titre dans le prompt ({"id": n, "text": "..."})
+ITEM_OVERHEAD_TOKENS = 8
+
+
+def estimate_tokens(text):
+    """Nombre de jetons (tiktoken si disponible, sinon estimation)."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return (len(text) + 3) // 4
+
+
+class Window:
+    """Fenêtre de traduction : sous-titres à traduire et sous-titres de contexte (indices)."""
+
+    __slots__ = ("indices", "context")
+
+    def __init__(self, indices, context):
+        self.indices = indices
+        self.context = context
+
+
+def _context_before(texts, first, count, floor=0):
+    context = []
+    idx = first - 1
+    while idx >= floor and len(context) < count:
+        if texts[idx].strip():
+            context.append(idx)
+        idx -= 1
+    return context[::-1]
+
+
+def plan_windows(texts, indices, budget, cost=None, max_items=None, context_cues=0, context_floor=0):
+    """
+    Regroupe des sous-titres consécutifs en fenêtres.
+
+    Args:
+        texts: Tous les textes, dans l'ordre du fichier
+        indices: Positions à traduire (croissantes)
+        budget: Coût maximal d'une fenêtre (jetons, ou unité de `cost`)
+        cost: Coût d'un texte (None = estimate_tokens + surcoût JSON)
+        max_items: Nombre maximal de sous-titres par fenêtre (None = illimité)
+        context_cues: Sous-titres précédents à joindre comme contexte
+        context_floor: Première position utilisable comme contexte (début du fichier)
+
+    Returns:
+        Liste de Window
+    """
+    if cost is None:
+        cost = lambda text: estimate_tokens(text) + ITEM_OVERHEAD_TOKENS
+    windows, current, size = [], [], 0
+
+    def flush():
+        context = _context_before(texts, current[0], context_cues, context_floor) if context_cues else []
+        windows.append(Window(current, context))
+
+    for idx in indices:
+        item_cost = cost(texts[idx])
+        if current and (size + item_cost > budget or (max_items and len(current) >= max_items)):
+            flush()
+            current, size = [], 0
+        current.append(idx)
+        size += item_cost
+    if current:
+        flush()
+    return windows
@@ -134,6 +134,53 @@ class Config:
         self.output_folder = "output"
         self.whisper_model = "large-v3-turbo"
         self.use_threading = True
+        self.model_cache_size = 2
+        self.model_memory_budget_mb = None
+        self.transcription_threads = None
+        self.streaming_window_sec = 600
+        self.streaming_min_duration = 3 * 3600
+        # > 1 : transcription CPU en plusieurs processus (pipelines séquentiel et multi-thread)
+        self.transcription_shards = 1
+        self.threads_per_shard = None
+        self.use_transcription_cache = True
+        self.transcription_cache_dir = os.path.join("cache", "transcriptions")
+        self.transcription_cache_max_mb = 2048
+        self.transcription_backend = "whisper_timestamped"
+        self.transcription_mode = "dual"
+        self.quality_confidence_threshold = 0.6
+        self.use_translation_memory = True
+        self.translation_memory_path = os.path.join("cache", "translation_memory.sqlite")
+        self.translation_memory_ttl_days = 90
+        self.translation_memory_max_entries = 500000
+        self.translation_window_tokens = 1500
+        self.translation_context_cues = 3
+        self.deepl_batch_chars = 20000
+        self.translation_engine = "batched"
+        self.async_initial_concurrency = 4
+        self.async_max_concurrency = 32
+        self.translation_max_retries = 6
+        self.translation_pool_size = 32
+        self.local_translation_verifier = True
+        self.translation_journal = True
+        self.translation_journal_sync_every = 20
+        # Requêtes/s de tous les services, langues et moteurs confondus (None = illimité)
+        self.translation_rate_limit = None
+        self.translation_rate_burst = 10
+        self.translation_language_workers = 4
+        # Points d'accès des services (None = API publiques)
+        self.deepl_api_url = None
+        self.openai_base_url = None
+        self.separation_engine = "inprocess"
+        self.demucs_model = "mdx_extra_q"
+        # Séparation : "auto" (ignorée si peu de musique), "always" ou "never"
+        self.separation_mode = "auto"
+        self.music_threshold = 0.35
+        # Séparation par fenêtres recouvrantes (0 = fichier entier en mémoire)
+        self.separation_segment_sec = 60
+        self.separation_overlap_sec = 1.0
+        # Rééchantillonnage : qualité fast/medium/high/very_high, moteur soxr/polyphase (None = auto)
+        self.resample_quality = "high"
+        self.resample_engine = None
         self.load_config()
 
     def load_api_keys(self):
@@ -172,6 +219,47 @@ class Config:
                     self.output_folder = config.get("output_folder", self.output_folder)
                     self.whisper_model = config.get("whisper_model", self.whisper_model)
                     self.use_threading = config.get("use_threading", self.use_threading)
+                    self.model_cache_size = config.get("model_cache_size", self.model_cache_size)
+                    self.model_memory_budget_mb = config.get("model_memory_budget_mb", self.model_memory_budget_mb)
+                    self.transcription_threads = config.get("transcription_threads", self.transcription_threads)
+                    self.streaming_window_sec = config.get("streaming_window_sec", self.streaming_window_sec)
+                    self.streaming_min_duration = config.get("streaming_min_duration", self.streaming_min_duration)
+                    self.transcription_shards = config.get("transcription_shards", self.transcription_shards)
+                    self.threads_per_shard = config.get("threads_per_shard", self.threads_per_shard)
+                    self.use_transcription_cache = config.get("use_transcription_cache", self.use_transcription_cache)
+                    self.transcription_cache_dir = config.get("transcription_cache_dir", self.transcription_cache_dir)
+                    self.transcription_cache_max_mb = config.get("transcription_cache_max_mb", self.transcription_cache_max_mb)
+                    self.transcription_backend = config.get("transcription_backend", self.transcription_backend)
+                    self.transcription_mode = config.get("transcription_mode", self.transcription_mode)
+                    self.quality_confidence_threshold = config.get("quality_confidence_threshold", self.quality_confidence_threshold)
+                    self.use_translation_memory = config.get("use_translation_memory", self.use_translation_memory)
+                    self.translation_memory_path = config.get("translation_memory_path", self.translation_memory_path)
+                    self.translation_memory_ttl_days = config.get("translation_memory_ttl_days", self.translation_memory_ttl_days)
+                    self.translation_memory_max_entries = config.get("translation_memory_max_entries", self.translation_memory_max_entries)
+                    self.translation_window_tokens = config.get("translation_window_tokens", self.translation_window_tokens)
+                    self.translation_context_cues = config.get("translation_context_cues", self.translation_context_cues)
+                    self.deepl_batch_chars = config.get("deepl_batch_chars", self.deepl_batch_chars)
+                    self.translation_engine = config.get("translation_engine", self.translation_engine)
+                    self.async_initial_concurrency = config.get("async_initial_concurrency", self.async_initial_concurrency)
+                    self.async_max_concurrency = config.get("async_max_concurrency", self.async_max_concurrency)
+                    self.translation_max_retries = config.get("translation_max_retries", self.translation_max_retries)
+                    self.translation_pool_size = config.get("translation_pool_size", self.translation_pool_size)
+                    self.local_translation_verifier = config.get("local_translation_verifier", self.local_translation_verifier)
+                    self.translation_journal = config.get("translation_journal", self.translation_journal)
+                    self.translation_journal_sync_every = config.get("translation_journal_sync_every", self.translation_journal_sync_every)
+                    self.translation_rate_limit = config.get("translation_rate_limit", self.translation_rate_limit)
+                    self.translation_rate_burst = config.get("translation_rate_burst", self.translation_rate_burst)
+                    self.translation_language_workers = config.get("translation_language_workers", self.translation_language_workers)
+                    self.deepl_api_url = config.get("deepl_api_url", self.deepl_api_url)
+                    self.openai_base_url = config.get("openai_base_url", self.openai_base_url)
+                    self.separation_engine = config.get("separation_engine", self.separation_engine)
+                    self.demucs_model = config.get("demucs_model", self.demucs_model)
+                    self.separation_mode = config.get("separation_mode", self.separation_mode)
+                    self.music_threshold = config.get("music_threshold", self.music_threshold)
+                    self.separation_segment_sec = config.get("separation_segment_sec", self.separation_segment_sec)
+                    self.separation_overlap_sec = config.get("separation_overlap_sec", self.separation_overlap_sec)
+                    self.resample_quality = config.get("resample_quality", self.resample_quality)
+                    self.resample_engine = config.get("resample_engine", self.resample_engine)
                 logging.info("Configuration chargée avec succès")
             except Exception as e:
                 logging.error(f"Erreur lors du chargement de la configuration: {str(e)}")
@@ -185,7 +273,48 @@ class Config:
                 "use_gpu": self.use_gpu,
                 "output_folder": self.output_folder,
                 "whisper_model": self.whisper_model,
-                "use_threading": self.use_threading
+                "use_threading": self.use_threading,
+                "model_cache_size": self.model_cache_size,
+                "model_memory_budget_mb": self.model_memory_budget_mb,
+                "transcription_threads": self.transcription_threads,
+                "streaming_window_sec": self.streaming_window_sec,
+                "streaming_min_duration": self.streaming_min_duration,
+                "transcription_shards": self.transcription_shards,
+                "threads_per_shard": self.threads_per_shard,
+                "use_transcription_cache": self.use_transcription_cache,
+                "transcription_cache_dir": self.transcription_cache_dir,
+                "transcription_cache_max_mb": self.transcription_cache_max_mb,
+                "transcription_backend": self.transcription_backend,
+                "transcription_mode": self.transcription_mode,
+                "quality_confidence_threshold": self.quality_confidence_threshold,
+                "use_translation_memory": self.use_translation_memory,
+                "translation_memory_path": self.translation_memory_path,
+                "translation_memory_ttl_days": self.translation_memory_ttl_days,
+                "translation_memory_max_entries": self.translation_memory_max_entries,
+                "translation_window_tokens": self.translation_window_tokens,
+                "translation_context_cues": self.translation_context_cues,
+                "deepl_batch_chars": self.deepl_batch_chars,
+                "translation_engine": self.translation_engine,
+                "async_initial_concurrency": self.async_initial_concurrency,
+                "async_max_concurrency": self.async_max_concurrency,
+                "translation_max_retries": self.translation_max_retries,
+                "translation_pool_size": self.translation_pool_size,
+                "local_translation_verifier": self.local_translation_verifier,
+                "translation_journal": self.translation_journal,
+                "translation_journal_sync_every": self.translation_journal_sync_every,
+                "translation_rate_limit": self.translation_rate_limit,
+                "translation_rate_burst": self.translation_rate_burst,
+                "translation_language_workers": self.translation_language_workers,
+                "deepl_api_url": self.deepl_api_url,
+                "openai_base_url": self.openai_base_url,
+                "separation_engine": self.separation_engine,
+                "demucs_model": self.demucs_model,
+                "separation_mode": self.separation_mode,
+                "music_threshold": self.music_threshold,
+                "separation_segment_sec": self.separation_segment_sec,
+                "separation_overlap_sec": self.separation_overlap_sec,
+                "resample_quality": self.resample_quality,
+                "resample_engine": self.resample_engine
             }
             with open(CONFIG_FILE, 'w') as file:
                 json.dump(config, file)
@@ -6,19 +6,19 @@ Module coordinateur du traitement des vidéos.
 """
 
 import os
+import json
 import logging
 import shutil
 import threading
 import concurrent.futures
-from openai import OpenAI
 import time
 import queue
 
 from utils import progress_queue, command_queue, restore_std_redirects, enable_std_redirects
 from video_downloader import download_video, sanitize_filename, ensure_unique_path
-from audio_extractor import extract_audio, separate_audio
-from transcriber import transcribe_audio
-from translate import translate_srt_file, set_api_keys
+from audio_extractor import extract_audio, separate_audio, is_file_empty
+from transcriber import transcribe_audio, transcribe_single_pass, TranscriptionService
+from translate import translate_srt_files_multi, parse_target_languages, set_api_keys
 from utils import progress_queue, command_queue, restore_std_redirects, enable_std_redirects, format_whisper_model_name
 
 class VideoProcessor:
@@ -38,9 +38,8 @@ class VideoProcessor:
     
     def update_api_client(self):
         """Met à jour le client OpenAI avec la clé de l'utilisateur."""
-        self.client = OpenAI(api_key=self.config.openai_key)
-        # Mettre à jour aussi dans le module translate
-        set_api_keys(self.config.deepl_key, self.config.openai_key)
+        # Client partagé avec le module translate, réutilisé tant que la clé ne change pas
+        self.client = set_api_keys(self.config.deepl_key, self.config.openai_key)
     
     def process_video(self, url=None, video_path=None, target_language=None, translation_service=None, use_gpu=None):
         """
@@ -49,7 +48,7 @@ class VideoProcessor:
         Args:
             url: URL de la vidéo à télécharger (facultatif)
             video_path: Chemin vers un fichier vidéo local (facultatif)
-            target_language: Langue cible pour la traduction
+            target_language: Langue cible, ou liste de langues cibles ("FR", ["FR", "DE"], "FR, DE")
             translation_service: Service de traduction à utiliser ('DeepL' ou 'ChatGPT')
             use_gpu: Indique s'il faut utiliser le GPU pour le traitement
             
@@ -81,14 +80,72 @@ class VideoProcessor:
         
         return True
     
-    def _process_video_thread(self, url, video_path, target_language, translation_service, use_gpu):
+    def resume_video(self, video_path, target_language=None, translation_service=None, use_gpu=None):
+        """
+        Reprend un traitement interrompu à partir de la vidéo déjà présente dans le dossier de sortie.
+        
+        Les étapes consignées comme terminées (extraction, séparation, transcription,
+        traduction) dont les fichiers existent encore sont sautées ; la traduction
+        reprend au dernier segment journalisé.
+        
+        Args:
+            video_path: Chemin de la vidéo (dans le dossier du traitement interrompu)
+            target_language: Langue cible pour la traduction
+            translation_service: Service de traduction à utiliser ('DeepL' ou 'ChatGPT')
+            use_gpu: Indique s'il faut utiliser le GPU pour le traitement
+            
+        Returns:
+            True si la reprise a démarré, False sinon
+        """
+        if not video_path or not os.path.exists(video_path):
+            logging.error(f"Vidéo à reprendre introuvable: {video_path}")
+            command_queue.put({"command": "error", "message": "Vidéo à reprendre introuvable."})
+            return False
+        
+        if not target_language:
+            target_language = self.config.default_language.split(' - ')[0]
+        
+        if not translation_service:
+            translation_service = self.config.default_service
+        
+        if use_gpu is None:
+            use_gpu = self.config.use_gpu
+        
+        processing_thread = threading.Thread(
+            target=self._process_video_thread,
+            args=(None, video_path, target_language, translation_service, use_gpu, True)
+        )
+        processing_thread.daemon = True
+        processing_thread.start()
+        
+        return True
+    
+    def _load_job_state(self, video_folder):
+        """Étapes terminées d'un traitement (fichier job_state.json du dossier vidéo)."""
+        state_path = os.path.join(video_folder, "job_state.json")
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                return set(json.load(f).get("stages", []))
+        except (OSError, ValueError):
+            return set()
+    
+    def _mark_stage_done(self, video_folder, stages, stage):
+        """Consigne une étape terminée (écriture atomique)."""
+        stages.add(stage)
+        state_path = os.path.join(video_folder, "job_state.json")
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"stages": sorted(stages)}, f)
+        os.replace(tmp_path, state_path)
+    
+    def _process_video_thread(self, url, video_path, target_language, translation_service, use_gpu, resume=False):
         """Fonction exécutée dans un thread séparé pour traiter la vidéo."""
         try:
             # Désactiver temporairement la redirection pour yt-dlp
             restore_std_redirects()
             
             # Log des paramètres
-            logging.info("=== Début du traitement de la vidéo ===")
+            logging.info("=== Reprise du traitement de la vidéo ===" if resume else "=== Début du traitement de la vidéo ===")
             if video_path:
                 logging.info(f"Fichier vidéo local: {video_path}")
             else:
@@ -162,110 +219,143 @@ class VideoProcessor:
                 shutil.copy(video_path, destination_video_path)
                 video_path = destination_video_path
 
-            audio_path = os.path.join(video_folder, f"{video_title}.mp3")
+            # Audio extrait en PCM : mono 16 kHz pour Whisper, stéréo 44.1 kHz pour Demucs
+            audio_path = os.path.join(video_folder, f"{video_title}.wav")
+            mix_path = os.path.join(video_folder, f"{video_title}_44k.wav")
             transcript_path = os.path.join(video_folder, video_title)
             vocal_transcript_path = os.path.join(video_folder, f"{video_title}_vocal")
             separated_folder = os.path.join(video_folder, "separated")
 
             logging.info(f"Chemin de la vidéo : {video_path}")
             logging.info(f"Chemin de l'audio : {audio_path}")
+            logging.info(f"Chemin de l'audio à séparer : {mix_path}")
             logging.info(f"Chemin de la transcription : {transcript_path}")
             logging.info(f"Chemin de la transcription vocale : {vocal_transcript_path}")
             logging.info(f"Chemin des fichiers séparés : {separated_folder}")
 
+            # Étapes déjà terminées lors d'un précédent traitement (reprise uniquement)
+            stages = self._load_job_state(video_folder) if resume else set()
+
             if self._check_cancelled():
                 return
 
+            vocal_path = os.path.join(separated_folder, 'vocals.wav')
+            accompagnement_path = os.path.join(separated_folder, 'accompaniment.wav')
+            mode = self.config.transcription_mode
+
             # Étape 3: Extraction audio (35%)
-            progress_queue.put({"value": 30, "status_text": "Extraction de l'audio..."})
-            extract_audio(video_path, audio_path)
-            
-            if self._check_cancelled():
-                return
+            if "extraction" in stages and os.path.exists(audio_path) and os.path.exists(mix_path):
+                logging.info("Reprise : extraction audio déjà effectuée")
+            else:
+                progress_queue.put({"value": 30, "status_text": "Extraction de l'audio..."})
+                extract_audio(video_path, audio_path, mix_path)
                 
-            if not os.path.exists(audio_path):
-                raise FileNotFoundError(f"Audio non trouvé à {audio_path}")
+                if self._check_cancelled():
+                    return
+                    
+                if not os.path.exists(audio_path) or not os.path.exists(mix_path):
+                    raise FileNotFoundError(f"Audio non trouvé à {audio_path}")
+                self._mark_stage_done(video_folder, stages, "extraction")
 
             # Étape 4: Séparation audio (50%)
-            progress_queue.put({"value": 40, "status_text": "Séparation des pistes audio..."})
-            separate_audio(audio_path, separated_folder, use_gpu=use_gpu)
-            
-            if self._check_cancelled():
-                return
-            
-            vocal_path = os.path.join(separated_folder, 'vocals.wav')
-            accompagnement_path = os.path.join(separated_folder, 'accompaniment.wav')
+            if "separation" in stages and os.path.exists(vocal_path) and os.path.exists(accompagnement_path):
+                logging.info("Reprise : séparation audio déjà effectuée")
+            else:
+                progress_queue.put({"value": 40, "status_text": "Séparation des pistes audio..."})
+                separate_audio(mix_path, separated_folder, use_gpu=use_gpu)
+                
+                if self._check_cancelled():
+                    return
 
-            if not os.path.exists(vocal_path):
-                raise FileNotFoundError(f"Piste vocale non trouvée à {vocal_path}.")
-            if not os.path.exists(accompagnement_path):
-                raise FileNotFoundError(f"Piste d'accompagnement non trouvée à {accompagnement_path}.")
+                if not os.path.exists(vocal_path):
+                    raise FileNotFoundError(f"Piste vocale non trouvée à {vocal_path}.")
+                if not os.path.exists(accompagnement_path):
+                    raise FileNotFoundError(f"Piste d'accompagnement non trouvée à {accompagnement_path}.")
+                self._mark_stage_done(video_folder, stages, "separation")
 
             # Étape 5: Transcription (70%)
-            progress_queue.put({"value": 55, "status_text": "Transcription de l'audio principal..."})
-            transcribe_audio(audio_path, transcript_path, model_name=format_whisper_model_name(self.config.whisper_model), use_gpu=use_gpu)
+            if f"transcription_{mode}" in stages and os.path.exists(f"{transcript_path}.srt"):
+                logging.info("Reprise : transcription déjà effectuée")
+            elif mode == "dual":
+                if "transcription_main" in stages and os.path.exists(f"{transcript_path}.srt"):
+                    logging.info("Reprise : transcription principale déjà effectuée")
+                else:
+                    progress_queue.put({"value": 55, "status_text": "Transcription de l'audio principal..."})
+                    transcribe_audio(audio_path, transcript_path, model_name=format_whisper_model_name(self.config.whisper_model), use_gpu=use_gpu)
+                    self._mark_stage_done(video_folder, stages, "transcription_main")
 
-            if self._check_cancelled():
-                return
-                
-            progress_queue.put({"value": 70, "status_text": "Transcription de la piste vocale..."})
-            transcribe_audio(vocal_path, vocal_transcript_path, model_name=format_whisper_model_name(self.config.whisper_model), use_gpu=use_gpu)
+                if self._check_cancelled():
+                    return
+                    
+                progress_queue.put({"value": 70, "status_text": "Transcription de la piste vocale..."})
+                transcribe_audio(vocal_path, vocal_transcript_path, model_name=format_whisper_model_name(self.config.whisper_model), use_gpu=use_gpu)
+            else:
+                # Une seule transcription complète (vocale si la séparation a réussi), la seconde en est dérivée
+                progress_queue.put({"value": 55, "status_text": "Transcription unique de la piste vocale..."})
+                transcribe_single_pass(
+                    audio_path,
+                    None if is_file_empty(vocal_path) else vocal_path,
+                    transcript_path,
+                    vocal_transcript_path,
+                    mode=mode,
+                    model_name=format_whisper_model_name(self.config.whisper_model),
+                    use_gpu=use_gpu
+                )
             
             if self._check_cancelled():
                 return
 
             if not os.path.exists(f"{transcript_path}.srt"):
                 raise FileNotFoundError(f"Transcription non trouvée à {transcript_path}.srt")
+            self._mark_stage_done(video_folder, stages, f"transcription_{mode}")
+            
+            # Étape 6: Traduction (90%), vers toutes les langues cibles en parallèle
+            target_languages = parse_target_languages(target_language)
+            pending_languages = [
+                lang for lang in target_languages
+                if not (f"translation_{lang}" in stages
+                        and os.path.exists(os.path.join(video_folder, f"{lang}_{video_title}_{lang}.srt")))
+            ]
+            if not pending_languages:
+                logging.info("Reprise : traduction déjà effectuée")
+            else:
+                progress_queue.put({"value": 80, "status_text": f"Traduction des transcriptions en {', '.join(pending_languages)}..."})
             
-            # Étape 6: Traduction (90%)
-            progress_queue.put({"value": 80, "status_text": f"Traduction des transcriptions en {target_language}..."})
-            
-            # Traduction de la transcription principale
-            try:
-                progress_queue.put({"value": 85, "status_text": f"Traduction de la transcription principale en {target_language}..."})
-                
-                # Traduction
-                translated_srt_path, full_translated_content = translate_srt_file(
-                    f"{transcript_path}.srt", 
-                    target_language, 
-                    translation_service
-                )
-                
-                final_translated_path = os.path.join(video_folder, f"{target_language}_{video_title}_{target_language}.srt")
-                with open(final_translated_path, 'w', encoding='utf-8') as f:
-                    f.write(full_translated_content)
-                
-                logging.info(f"Transcription traduite enregistrée: {final_translated_path}")
-
-                if self._check_cancelled():
-                    return
-                    
-                # Traduction de la transcription vocale si disponible
-                if os.path.exists(f"{vocal_transcript_path}.srt"):
-                    progress_queue.put({"value": 90, "status_text": f"Traduction de la transcription vocale en {target_language}..."})
-                    
-                    translated_vocal_srt_path, vocal_translated_content = translate_srt_file(
-                        f"{vocal_transcript_path}.srt", 
-                        target_language, 
-                        translation_service
-                    )
-                    
-                    final_vocal_translated_path = os.path.join(video_folder, f"{target_language}_{video_title}_vocal_{target_language}.srt")
-                    with open(final_vocal_translated_path, 'w', encoding='utf-8') as f:
-                        f.write(vocal_translated_content)
-                    
-                    logging.info(f"Transcription vocale traduite enregistrée: {final_vocal_translated_path}")
+                # Traduction des transcriptions principale et vocale en une passe (segments communs traduits une fois)
+                try:
+                    srt_paths = [f"{transcript_path}.srt"]
+                    # En mode 'single', la transcription vocale est identique : pas de seconde traduction
+                    if mode != "single" and os.path.exists(f"{vocal_transcript_path}.srt"):
+                        srt_paths.append(f"{vocal_transcript_path}.srt")
+                    translations_by_language = translate_srt_files_multi(srt_paths, pending_languages, translation_service)
 
                     if self._check_cancelled():
                         return
-                        
+
                     progress_queue.put({"value": 95, "status_text": "Finalisation des traductions..."})
-                    
-            except Exception as e:
-                # Ajouter un log plus détaillé pour le débogage
-                logging.error(f"Erreur de traduction détaillée: {e}")
-                logging.error(f"Type d'exception: {type(e)}")
-                raise
+                    for lang in pending_languages:
+                        translations = translations_by_language[lang]
+                        final_translated_path = os.path.join(video_folder, f"{lang}_{video_title}_{lang}.srt")
+                        with open(final_translated_path, 'w', encoding='utf-8') as f:
+                            f.write(translations[0][1])
+                        logging.info(f"Transcription traduite enregistrée: {final_translated_path}")
+
+                        final_vocal_translated_path = os.path.join(video_folder, f"{lang}_{video_title}_vocal_{lang}.srt")
+                        if mode == "single":
+                            shutil.copyfile(final_translated_path, final_vocal_translated_path)
+                            logging.info(f"Transcription vocale traduite enregistrée: {final_vocal_translated_path}")
+                        # Transcription vocale traduite si disponible
+                        elif len(translations) > 1:
+                            with open(final_vocal_translated_path, 'w', encoding='utf-8') as f:
+                                f.write(translations[1][1])
+                            logging.info(f"Transcription vocale traduite enregistrée: {final_vocal_translated_path}")
+
+                        self._mark_stage_done(video_folder, stages, f"translation_{lang}")
+                except Exception as e:
+                    # Ajouter un log plus détaillé pour le débogage
+                    logging.error(f"Erreur de traduction détaillée: {e}")
+                    logging.error(f"Type d'exception: {type(e)}")
+                    raise
                 
             # Finalisation (100%)
             progress_queue.put({"value": 100, "status_text": "Traitement terminé avec succès!"})
@@ -336,12 +426,14 @@ class ThreadedVideoProcessor:
         
         # Verrou pour éviter les conflits d'accès
         self.lock = threading.Lock()
+        
+        # Service de transcription du traitement en cours
+        self.transcription_service = None
     
     def update_api_client(self):
         """Met à jour le client OpenAI avec la clé de l'utilisateur."""
-        self.client = OpenAI(api_key=self.config.openai_key)
-        # Mettre à jour aussi dans le module translate
-        set_api_keys(self.config.deepl_key, self.config.openai_key)
+        # Client partagé avec le module translate, réutilisé tant que la clé ne change pas
+        self.client = set_api_keys(self.config.deepl_key, self.config.openai_key)
     
     def process_video(self, url=None, video_path=None, target_language=None, translation_service=None, use_gpu=None):
         """
@@ -350,7 +442,7 @@ class ThreadedVideoProcessor:
         Args:
             url: URL de la vidéo à télécharger (facultatif)
             video_path: Chemin vers un fichier vidéo local (facultatif)
-            target_language: Langue cible pour la traduction
+            target_language: Langue cible, ou liste de langues cibles ("FR", ["FR", "DE"], "FR, DE")
             translation_service: Service de traduction à utiliser ('DeepL' ou 'ChatGPT')
             use_gpu: Indique s'il faut utiliser le GPU pour le traitement
             
@@ -445,16 +537,16 @@ class ThreadedVideoProcessor:
             
             return video_path, video_title
     
-    def _extract_audio_task(self, video_path, audio_path):
+    def _extract_audio_task(self, video_path, audio_path, mix_path):
         """Tâche d'extraction audio exécutée dans un thread."""
         self._update_progress(30, "Extraction de l'audio...")
-        extract_audio(video_path, audio_path)
+        extract_audio(video_path, audio_path, mix_path)
         return audio_path
     
-    def _separate_audio_task(self, audio_path, separated_folder, use_gpu):
+    def _separate_audio_task(self, mix_path, separated_folder, use_gpu):
         """Tâche de séparation audio exécutée dans un thread."""
         self._update_progress(40, "Séparation des pistes audio...")
-        separate_audio(audio_path, separated_folder, use_gpu=use_gpu)
+        separate_audio(mix_path, separated_folder, use_gpu=use_gpu)
         
         vocal_path = os.path.join(separated_folder, 'vocals.wav')
         accompaniment_path = os.path.join(separated_folder, 'accompaniment.wav')
@@ -477,23 +569,29 @@ class ThreadedVideoProcessor:
         model_name = format_whisper_model_name(self.config.whisper_model)
         logging.info(f"🔍 Utilisation du modèle: {model_name}")
     
-        transcribe_audio(audio_path, transcript_path, model_name=model_name, use_gpu=use_gpu)
+        # Le service partagé évite de charger une seconde copie du modèle
+        self.transcription_service.transcribe(audio_path, transcript_path, use_gpu=use_gpu)
         return f"{transcript_path}.srt"
         
-    def _translate_srt_task(self, srt_path, target_language, translation_service, is_vocal):
-        """Tâche de traduction exécutée dans un thread."""
-        if is_vocal:
-            self._update_progress(90, f"Traduction de la transcription vocale en {target_language}...")
-        else:
-            self._update_progress(80, f"Traduction de la transcription principale en {target_language}...")
-            
-        translated_path, translated_content = translate_srt_file(
-            srt_path, 
-            target_language, 
-            translation_service
+    def _transcribe_single_pass_task(self, audio_path, vocal_path, transcript_path, vocal_transcript_path, mode, use_gpu):
+        """Tâche de transcription unique : la transcription principale est dérivée de la vocale."""
+        self._update_progress(55, "Transcription unique de la piste vocale...")
+        vocal_ok = os.path.exists(vocal_path) and not is_file_empty(vocal_path)
+        transcribe_single_pass(
+            audio_path,
+            vocal_path if vocal_ok else None,
+            transcript_path,
+            vocal_transcript_path,
+            mode=mode,
+            service=self.transcription_service,
+            use_gpu=use_gpu
         )
-        
-        return translated_path, translated_content
+        return f"{transcript_path}.srt", f"{vocal_transcript_path}.srt"
+    
+    def _translate_srt_task(self, srt_paths, target_languages, translation_service):
+        """Tâche de traduction exécutée dans un thread (fichiers traduits ensemble, toutes langues en parallèle)."""
+        self._update_progress(80, f"Traduction des transcriptions en {', '.join(target_languages)}...")
+        return translate_srt_files_multi(srt_paths, target_languages, translation_service)
     
     def _process_video_thread(self, url, video_path, target_language, translation_service, use_gpu):
         """Fonction exécutée dans un thread séparé pour traiter la vidéo avec parallélisation."""
@@ -548,7 +646,9 @@ class ThreadedVideoProcessor:
                 shutil.copy(video_path, destination_video_path)
                 video_path = destination_video_path
 
-            audio_path = os.path.join(video_folder, f"{video_title}.mp3")
+            # Audio extrait en PCM : mono 16 kHz pour Whisper, stéréo 44.1 kHz pour Demucs
+            audio_path = os.path.join(video_folder, f"{video_title}.wav")
+            mix_path = os.path.join(video_folder, f"{video_title}_44k.wav")
             transcript_path = os.path.join(video_folder, video_title)
             vocal_transcript_path = os.path.join(video_folder, f"{video_title}_vocal")
             separated_folder = os.path.join(video_folder, "separated")
@@ -558,6 +658,7 @@ class ThreadedVideoProcessor:
 
             logging.info(f"Chemin de la vidéo : {video_path}")
             logging.info(f"Chemin de l'audio : {audio_path}")
+            logging.info(f"Chemin de l'audio à séparer : {mix_path}")
             logging.info(f"Chemin de la transcription : {transcript_path}")
             logging.info(f"Chemin de la transcription vocale : {vocal_transcript_path}")
             logging.info(f"Chemin des fichiers séparés : {separated_folder}")
@@ -565,13 +666,19 @@ class ThreadedVideoProcessor:
             if self._check_cancelled():
                 return
 
+            # Un seul modèle Whisper partagé par les transcriptions principale et vocale
+            self.transcription_service = TranscriptionService(
+                model_name=format_whisper_model_name(self.config.whisper_model)
+            )
+
             # Utiliser un ThreadPoolExecutor pour paralléliser les tâches
             with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
                 # Étape 3: Extraction audio (exécutée séquentiellement car nécessaire avant la séparation)
                 future_extract = executor.submit(
                     self._extract_audio_task, 
                     video_path, 
-                    audio_path
+                    audio_path,
+                    mix_path
                 )
                 
                 try:
@@ -581,26 +688,28 @@ class ThreadedVideoProcessor:
                     if self._check_cancelled():
                         return
                     
-                    if not os.path.exists(audio_path):
+                    if not os.path.exists(audio_path) or not os.path.exists(mix_path):
                         raise FileNotFoundError(f"Audio non trouvé à {audio_path}")
                     
                     # Soumettre les tâches en parallèle
                     # 1. Séparation audio
                     future_separate = executor.submit(
                         self._separate_audio_task,
-                        audio_path,
+                        mix_path,
                         separated_folder,
                         use_gpu
                     )
                     
-                    # 2. Transcription de l'audio principal
-                    future_transcribe_main = executor.submit(
-                        self._transcribe_audio_task,
-                        audio_path,
-                        transcript_path,
-                        False,
-                        use_gpu
-                    )
+                    # 2. Transcription de l'audio principal (mode double uniquement)
+                    mode = self.config.transcription_mode
+                    if mode == "dual":
+                        future_transcribe_main = executor.submit(
+                            self._transcribe_audio_task,
+                            audio_path,
+                            transcript_path,
+                            False,
+                            use_gpu
+                        )
                     
                     # Attendre la séparation audio
                     vocal_path, _ = future_separate.result()
@@ -608,65 +717,76 @@ class ThreadedVideoProcessor:
                     if self._check_cancelled():
                         return
                     
-                    # 3. Transcription de la piste vocale (démarre après séparation)
-                    future_transcribe_vocal = executor.submit(
-                        self._transcribe_audio_task,
-                        vocal_path,
-                        vocal_transcript_path,
-                        True,
-                        use_gpu
-                    )
-                    
-                    # Attendre la transcription principale
-                    main_srt_path = future_transcribe_main.result()
+                    if mode == "dual":
+                        # 3. Transcription de la piste vocale (démarre après séparation)
+                        future_transcribe_vocal = executor.submit(
+                            self._transcribe_audio_task,
+                            vocal_path,
+                            vocal_transcript_path,
+                            True,
+                            use_gpu
+                        )
+                        
+                        # Attendre la transcription principale
+                        main_srt_path = future_transcribe_main.result()
+                    else:
+                        # 3. Une seule transcription complète, la seconde en est dérivée
+                        main_srt_path, _ = self._transcribe_single_pass_task(
+                            audio_path, vocal_path, transcript_path, vocal_transcript_path, mode, use_gpu
+                        )
+                        future_transcribe_vocal = None
                     
                     if self._check_cancelled():
                         return
                     
-                    # 4. Traduction de la transcription principale
-                    future_translate_main = executor.submit(
-                        self._translate_srt_task,
-                        main_srt_path,
-                        target_language,
-                        translation_service,
-                        False
-                    )
-                    
                     # Attendre la transcription vocale
-                    vocal_srt_path = future_transcribe_vocal.result()
+                    if future_transcribe_vocal is not None:
+                        vocal_srt_path = future_transcribe_vocal.result()
+                    else:
+                        vocal_srt_path = f"{vocal_transcript_path}.srt"
                     
                     if self._check_cancelled():
                         return
                     
-                    # 5. Traduction de la transcription vocale
-                    future_translate_vocal = executor.submit(
+                    # 4. Traduction des transcriptions principale et vocale en une passe :
+                    # les segments communs aux deux fichiers ne sont traduits qu'une fois
+                    # (la vocale est identique à la principale en mode 'single')
+                    srt_paths = [main_srt_path] if mode == "single" else [main_srt_path, vocal_srt_path]
+                    target_languages = parse_target_languages(target_language)
+                    future_translate = executor.submit(
                         self._translate_srt_task,
-                        vocal_srt_path,
-                        target_language,
-                        translation_service,
-                        True
+                        srt_paths,
+                        target_languages,
+                        translation_service
                     )
                     
                     # Attendre les traductions et enregistrer les résultats
-                    _, main_translated_content = future_translate_main.result()
-                    
-                    final_translated_path = os.path.join(video_folder, f"{target_language}_{video_title}_{target_language}.srt")
-                    with open(final_translated_path, 'w', encoding='utf-8') as f:
-                        f.write(main_translated_content)
-                    
-                    logging.info(f"Transcription traduite enregistrée: {final_translated_path}")
+                    translations_by_language = future_translate.result()
                     
                     if self._check_cancelled():
                         return
                     
-                    # Sauvegarder la traduction vocale
-                    _, vocal_translated_content = future_translate_vocal.result()
-                    
-                    final_vocal_translated_path = os.path.join(video_folder, f"{target_language}_{video_title}_vocal_{target_language}.srt")
-                    with open(final_vocal_translated_path, 'w', encoding='utf-8') as f:
-                        f.write(vocal_translated_content)
-                    
-                    logging.info(f"Transcription vocale traduite enregistrée: {final_vocal_translated_path}")
+                    for lang in target_languages:
+                        translations = translations_by_language[lang]
+                        main_translated_content = translations[0][1]
+                        
+                        final_translated_path = os.path.join(video_folder, f"{lang}_{video_title}_{lang}.srt")
+                        with open(final_translated_path, 'w', encoding='utf-8') as f:
+                            f.write(main_translated_content)
+                        
+                        logging.info(f"Transcription traduite enregistrée: {final_translated_path}")
+                        
+                        # Sauvegarder la traduction vocale
+                        if len(translations) > 1:
+                            vocal_translated_content = translations[1][1]
+                        else:
+                            vocal_translated_content = main_translated_content
+                        
+                        final_vocal_translated_path = os.path.join(video_folder, f"{lang}_{video_title}_vocal_{lang}.srt")
+                        with open(final_vocal_translated_path, 'w', encoding='utf-8') as f:
+                            f.write(vocal_translated_content)
+                        
+                        logging.info(f"Transcription vocale traduite enregistrée: {final_vocal_translated_path}")
                     
                 except concurrent.futures.CancelledError:
                     logging.warning("Une ou plusieurs tâches ont été annulées")
@@ -684,6 +804,9 @@ class ThreadedVideoProcessor:
             # Signal d'erreur
             command_queue.put({"command": "error", "message": str(e)})
         finally:
+            if self.transcription_service is not None:
+                self.transcription_service.close()
+                self.transcription_service = None
             # S'assurer que la redirection est restaurée
             enable_std_redirects()
     